@@ -1,5 +1,6 @@
 # Configuration
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 from dotenv import load_dotenv
 from google.ads.googleads.client import GoogleAdsClient
@@ -7,6 +8,8 @@ from google.oauth2 import service_account
 from pandas_gbq import to_gbq
 from google.cloud import bigquery
 
+from stream_frames import frame_from_stream
+
 # ✅ Set up Google Cloud Credentials
 
 
@@ -19,6 +22,15 @@ JSON_KEY_FILE_PATH = os.getenv('GOOGLE_ADS_JSON_KEY_FILE_PATH')
 GOOGLE_ADS_IMPERSONATED_EMAIL = os.getenv('GOOGLE_ADS_IMPERSONATED_EMAIL')
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
 TABLE_ID = f"{GCP_PROJECT_ID}.{os.getenv('BIGQUERY_DATASET_ALL_MAIN')}.{os.getenv('BIGQUERY_TABLE_ALL_AGE')}"
+MAX_WORKERS = int(os.getenv("BRONZE_MAX_WORKERS", "8"))
+
+CLIENT_CONFIG = {
+    "developer_token": DEVELOPER_TOKEN,
+    "login_customer_id": GOOGLE_ADS_LOGIN_CUSTOMER_ID,
+    "json_key_file_path": JSON_KEY_FILE_PATH,
+    "impersonated_email": GOOGLE_ADS_IMPERSONATED_EMAIL,
+    "use_proto_plus": True
+}
 
 AGE_RANGE_MAPPING = {
     503001: "18-24",
@@ -30,17 +42,7 @@ AGE_RANGE_MAPPING = {
     503999: "Unknown"
 }
 
-def fetch_enabled_accounts():
-    config = {
-        "developer_token": DEVELOPER_TOKEN,
-        "login_customer_id": GOOGLE_ADS_LOGIN_CUSTOMER_ID,
-        "json_key_file_path": JSON_KEY_FILE_PATH,
-        "impersonated_email": GOOGLE_ADS_IMPERSONATED_EMAIL,
-        "use_proto_plus": True
-    }
-    client = GoogleAdsClient.load_from_dict(config)
-    service = client.get_service("GoogleAdsService")
-
+def fetch_enabled_accounts(ga_service):
     query = """
         SELECT customer_client.client_customer,
                customer_client.descriptive_name,
@@ -51,7 +53,7 @@ def fetch_enabled_accounts():
         AND customer_client.status = 'ENABLED'
     """
 
-    response = service.search(customer_id=GOOGLE_ADS_LOGIN_CUSTOMER_ID, query=query)
+    response = ga_service.search(customer_id=GOOGLE_ADS_LOGIN_CUSTOMER_ID, query=query)
     accounts = []
     for row in response:
         if not row.customer_client.manager:
@@ -62,8 +64,7 @@ def fetch_enabled_accounts():
     print(f"✅ {len(accounts)} active client accounts found.")
     return accounts
 
-def get_age_range_data(client, customer_id):
-    ga_service = client.get_service("GoogleAdsService")
+def get_age_range_data(ga_service, customer_id):
     query = """
         SELECT 
             age_range_view.resource_name,
@@ -84,31 +85,23 @@ def get_age_range_data(client, customer_id):
     """
 
     stream = ga_service.search_stream(customer_id=customer_id, query=query)
-    age_data = []
-    for batch in stream:
-        for row in batch.results:
-            age_id = row.ad_group_criterion.age_range.type
-            age_range_label = AGE_RANGE_MAPPING.get(age_id, "Unknown")
-
-            age_data.append({
-                'Resource Name': row.age_range_view.resource_name,
-                'Campaign ID': row.campaign.id,
-                'Campaign Name': row.campaign.name,
-                'Campaign Type': row.campaign.advertising_channel_type.name if row.campaign.advertising_channel_type else 'Unknown',
-                'Ad Group ID': row.ad_group.id,
-                'Ad Group Name': row.ad_group.name,
-                'Age Range': age_range_label, 
-                'Impressions': row.metrics.impressions,
-                'Clicks': row.metrics.clicks,
-                'Cost Micros': row.metrics.cost_micros,
-                'All Conversions': float(row.metrics.all_conversions),
-                'All Conversions Value': float(row.metrics.all_conversions_value),
-                'Date': row.segments.date
-            })
-    return age_data
-
-def get_conversion_data(client, customer_id):
-    ga_service = client.get_service("GoogleAdsService")
+    return frame_from_stream(stream, {
+        'Resource Name': lambda row: row.age_range_view.resource_name,
+        'Campaign ID': lambda row: row.campaign.id,
+        'Campaign Name': lambda row: row.campaign.name,
+        'Campaign Type': lambda row: row.campaign.advertising_channel_type.name if row.campaign.advertising_channel_type else 'Unknown',
+        'Ad Group ID': lambda row: row.ad_group.id,
+        'Ad Group Name': lambda row: row.ad_group.name,
+        'Age Range': lambda row: AGE_RANGE_MAPPING.get(row.ad_group_criterion.age_range.type, "Unknown"),
+        'Impressions': lambda row: row.metrics.impressions,
+        'Clicks': lambda row: row.metrics.clicks,
+        'Cost Micros': lambda row: row.metrics.cost_micros,
+        'All Conversions': lambda row: float(row.metrics.all_conversions),
+        'All Conversions Value': lambda row: float(row.metrics.all_conversions_value),
+        'Date': lambda row: row.segments.date,
+    })
+
+def get_conversion_data(ga_service, customer_id):
     query = """
         SELECT 
             campaign.name,
@@ -125,88 +118,88 @@ def get_conversion_data(client, customer_id):
     """
 
     stream = ga_service.search_stream(customer_id=customer_id, query=query)
-    conversion_data = []
-    for batch in stream:
-        for row in batch.results:
-            age_id = row.ad_group_criterion.age_range.type
-            age_range_label = AGE_RANGE_MAPPING.get(age_id, "Unknown")
-
-            conversion_data.append({
-                'Campaign Name': row.campaign.name,
-                'Ad Group ID': row.ad_group.id,
-                'Age Range': age_range_label, 
-                'Conversion Name': row.segments.conversion_action_name,
-                'All Conversions': float(row.metrics.all_conversions),
-                'All Conversions Value': float(row.metrics.all_conversions_value),
-                'Date': row.segments.date
-            })
-    return conversion_data
+    return frame_from_stream(stream, {
+        'Campaign Name': lambda row: row.campaign.name,
+        'Ad Group ID': lambda row: row.ad_group.id,
+        'Age Range': lambda row: AGE_RANGE_MAPPING.get(row.ad_group_criterion.age_range.type, "Unknown"),
+        'Conversion Name': lambda row: row.segments.conversion_action_name,
+        'All Conversions': lambda row: float(row.metrics.all_conversions),
+        'All Conversions Value': lambda row: float(row.metrics.all_conversions_value),
+        'Date': lambda row: row.segments.date,
+    })
+
+
+def process_account(ga_service, acc):
+    acc_id = acc["customer_id"]
+    acc_name = acc["name"]
+    print(f"\n▶️ Processing account: {acc_id} - {acc_name}")
+
+    df_age = get_age_range_data(ga_service, acc_id)
+    df_conversion = get_conversion_data(ga_service, acc_id)
+
+    if df_age.empty and df_conversion.empty:
+        print(f"⚠️ No data for account {acc_id}, skipping.")
+        return None
+
+    # Convert dates
+    df_age["Date"] = pd.to_datetime(df_age["Date"])
+    df_conversion["Date"] = pd.to_datetime(df_conversion["Date"])
+
+    # Prepare age metrics
+    df_age["Conversion Name"] = "Unknown"
+    df_age["Cost"] = df_age["Cost Micros"].fillna(0) / 1_000_000
+    df_age = df_age.drop(columns=["Cost Micros"], errors='ignore')
+
+    # Prepare conversion rows
+    df_conversion["Clicks"] = None
+    df_conversion["Impressions"] = None
+    df_conversion["Cost"] = None
+    df_conversion["Campaign ID"] = None
+    df_conversion["Campaign Type"] = None
+    df_conversion["Ad Group Name"] = None
+    df_conversion["Resource Name"] = "Unknown"
+
+    # Add account info
+    df_age["Account ID"] = int(acc_id)
+    df_age["Account Name"] = acc_name
+    df_conversion["Account ID"] = int(acc_id)
+    df_conversion["Account Name"] = acc_name
+
+    # Reindex to BigQuery schema
+    column_order = [
+        "Account ID", "Account Name", "Campaign ID", "Campaign Name", "Campaign Type",
+        "Ad Group ID", "Ad Group Name", "Date", "Age Range", "Conversion Name",
+        "Impressions", "Clicks", "Cost", "All Conversions", "All Conversions Value", "Resource Name"
+    ]
+    df_age = df_age.reindex(columns=column_order)
+    df_conversion = df_conversion.reindex(columns=column_order)
 
-def main():
-    accounts = fetch_enabled_accounts()
-    final_dataframes = []
+    # Concatenate safely
+    df_final = pd.concat([df_age, df_conversion], ignore_index=True)
+    return df_final
 
-    for acc in accounts:
-        acc_id = acc["customer_id"]
-        acc_name = acc["name"]
-        print(f"\n▶️ Processing account: {acc_id} - {acc_name}")
-
-        try:
-            client = GoogleAdsClient.load_from_dict({
-                'client_customer_id': acc_id,
-                'login_customer_id': GOOGLE_ADS_LOGIN_CUSTOMER_ID,
-                'developer_token': DEVELOPER_TOKEN,
-                'json_key_file_path': JSON_KEY_FILE_PATH,
-                'impersonated_email': GOOGLE_ADS_IMPERSONATED_EMAIL,
-                'use_proto_plus': True,
-            })
 
-            df_age = pd.DataFrame(get_age_range_data(client, acc_id))
-            df_conversion = pd.DataFrame(get_conversion_data(client, acc_id))
+def main():
+    # One client and one gRPC channel shared by every account
+    client = GoogleAdsClient.load_from_dict(CLIENT_CONFIG)
+    ga_service = client.get_service("GoogleAdsService")
+
+    accounts = fetch_enabled_accounts(ga_service)
+    final_dataframes = []
 
-            if df_age.empty and df_conversion.empty:
-                print(f"⚠️ No data for account {acc_id}, skipping.")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {pool.submit(process_account, ga_service, acc): acc for acc in accounts}
+        for future in as_completed(futures):
+            acc = futures[future]
+            acc_id, acc_name = acc["customer_id"], acc["name"]
+            try:
+                df_final = future.result()
+            except Exception as e:
+                print(f"❌ Error in account {acc_id}: {e}")
                 continue
+            if df_final is not None:
+                final_dataframes.append(df_final)
 
-            # Convert dates
-            df_age["Date"] = pd.to_datetime(df_age["Date"])
-            df_conversion["Date"] = pd.to_datetime(df_conversion["Date"])
-
-            # Prepare age metrics
-            df_age["Conversion Name"] = "Unknown"
-            df_age["Cost"] = df_age["Cost Micros"].fillna(0) / 1_000_000
-            df_age = df_age.drop(columns=["Cost Micros"], errors='ignore')
-
-            # Prepare conversion rows
-            df_conversion["Clicks"] = None
-            df_conversion["Impressions"] = None
-            df_conversion["Cost"] = None
-            df_conversion["Campaign ID"] = None
-            df_conversion["Campaign Type"] = None
-            df_conversion["Ad Group Name"] = None
-            df_conversion["Resource Name"] = "Unknown"
-
-            # Add account info
-            df_age["Account ID"] = int(acc_id)
-            df_age["Account Name"] = acc_name
-            df_conversion["Account ID"] = int(acc_id)
-            df_conversion["Account Name"] = acc_name
-
-            # Reindex to BigQuery schema
-            column_order = [
-                "Account ID", "Account Name", "Campaign ID", "Campaign Name", "Campaign Type",
-                "Ad Group ID", "Ad Group Name", "Date", "Age Range", "Conversion Name",
-                "Impressions", "Clicks", "Cost", "All Conversions", "All Conversions Value", "Resource Name"
-            ]
-            df_age = df_age.reindex(columns=column_order)
-            df_conversion = df_conversion.reindex(columns=column_order)
-
-            # Concatenate safely
-            df_final = pd.concat([df_age, df_conversion], ignore_index=True)
-            final_dataframes.append(df_final)
-
-        except Exception as e:
-            print(f"❌ Error in account {acc_id}: {e}")
 
     if not final_dataframes:
         print("❌ No valid data collected. Exiting.")
@@ -1,5 +1,6 @@
 # Configuration
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 from dotenv import load_dotenv
 from google.ads.googleads.client import GoogleAdsClient
@@ -7,6 +8,8 @@ from google.oauth2 import service_account
 from pandas_gbq import to_gbq
 from google.cloud import bigquery
 
+from stream_frames import frame_from_stream
+
 # ✅ Set up Google Cloud Credentials
 
 
@@ -19,6 +22,15 @@ JSON_KEY_FILE_PATH = os.getenv('GOOGLE_ADS_JSON_KEY_FILE_PATH')
 GOOGLE_ADS_IMPERSONATED_EMAIL = os.getenv('GOOGLE_ADS_IMPERSONATED_EMAIL')
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
 TABLE_ID = f"{GCP_PROJECT_ID}.{os.getenv('BIGQUERY_DATASET_ALL_MAIN')}.{os.getenv('BIGQUERY_TABLE_ALL_GENDER')}"
+MAX_WORKERS = int(os.getenv("BRONZE_MAX_WORKERS", "8"))
+
+CLIENT_CONFIG = {
+    "developer_token": DEVELOPER_TOKEN,
+    "login_customer_id": GOOGLE_ADS_LOGIN_CUSTOMER_ID,
+    "json_key_file_path": JSON_KEY_FILE_PATH,
+    "impersonated_email": GOOGLE_ADS_IMPERSONATED_EMAIL,
+    "use_proto_plus": True
+}
 
 GENDER_MAPPING = {
     10: "Male",
@@ -26,17 +38,7 @@ GENDER_MAPPING = {
     20: "Unknown"
 }
 
-def fetch_enabled_accounts():
-    config = {
-        "developer_token": DEVELOPER_TOKEN,
-        "login_customer_id": GOOGLE_ADS_LOGIN_CUSTOMER_ID,
-        "json_key_file_path": JSON_KEY_FILE_PATH,
-        "impersonated_email": GOOGLE_ADS_IMPERSONATED_EMAIL,
-        "use_proto_plus": True
-    }
-    client = GoogleAdsClient.load_from_dict(config)
-    service = client.get_service("GoogleAdsService")
-
+def fetch_enabled_accounts(ga_service):
     query = """
         SELECT customer_client.client_customer,
                customer_client.descriptive_name,
@@ -47,7 +49,7 @@ def fetch_enabled_accounts():
         AND customer_client.status = 'ENABLED'
     """
 
-    response = service.search(customer_id=GOOGLE_ADS_LOGIN_CUSTOMER_ID, query=query)
+    response = ga_service.search(customer_id=GOOGLE_ADS_LOGIN_CUSTOMER_ID, query=query)
     accounts = []
     for row in response:
         if not row.customer_client.manager:
@@ -58,8 +60,7 @@ def fetch_enabled_accounts():
     print(f"✅ {len(accounts)} active client accounts found.")
     return accounts
 
-def get_gender_data(client, customer_id):
-    ga_service = client.get_service("GoogleAdsService")
+def get_gender_data(ga_service, customer_id):
     query = """
       SELECT 
         gender_view.resource_name,
@@ -81,32 +82,23 @@ def get_gender_data(client, customer_id):
 
     stream = ga_service.search_stream(customer_id=customer_id, query=query)
 
-    gender_data = []
-    for batch in stream:
-        for row in batch.results:
-            gender_id = row.ad_group_criterion.gender.type
-            gender_label = GENDER_MAPPING.get(gender_id, "Unknown")
-
-            gender_data.append({
-                'Resource Name': row.gender_view.resource_name,
-                'Campaign ID': row.campaign.id,
-                'Campaign Name': row.campaign.name,
-                'Campaign Type': row.campaign.advertising_channel_type.name if row.campaign.advertising_channel_type else 'Unknown',
-                'Ad Group ID': row.ad_group.id,
-                'Ad Group Name': row.ad_group.name,
-                'Gender': gender_label, 
-                'Impressions': row.metrics.impressions,
-                'Clicks': row.metrics.clicks,
-                'Cost Micros': row.metrics.cost_micros,
-                'All Conversions': row.metrics.all_conversions if row.metrics.all_conversions is not None else 0.0,
-                'All Conversions Value': row.metrics.all_conversions_value if row.metrics.all_conversions_value is not None else 0.0,
-                'Date': row.segments.date
-            })
-
-    return gender_data
-
-def get_gender_conversion_data(client, customer_id):
-    ga_service = client.get_service("GoogleAdsService")
+    return frame_from_stream(stream, {
+        'Resource Name': lambda row: row.gender_view.resource_name,
+        'Campaign ID': lambda row: row.campaign.id,
+        'Campaign Name': lambda row: row.campaign.name,
+        'Campaign Type': lambda row: row.campaign.advertising_channel_type.name if row.campaign.advertising_channel_type else 'Unknown',
+        'Ad Group ID': lambda row: row.ad_group.id,
+        'Ad Group Name': lambda row: row.ad_group.name,
+        'Gender': lambda row: GENDER_MAPPING.get(row.ad_group_criterion.gender.type, "Unknown"),
+        'Impressions': lambda row: row.metrics.impressions,
+        'Clicks': lambda row: row.metrics.clicks,
+        'Cost Micros': lambda row: row.metrics.cost_micros,
+        'All Conversions': lambda row: row.metrics.all_conversions if row.metrics.all_conversions is not None else 0.0,
+        'All Conversions Value': lambda row: row.metrics.all_conversions_value if row.metrics.all_conversions_value is not None else 0.0,
+        'Date': lambda row: row.segments.date,
+    })
+
+def get_gender_conversion_data(ga_service, customer_id):
     query = """
         SELECT 
             gender_view.resource_name,
@@ -128,92 +120,90 @@ def get_gender_conversion_data(client, customer_id):
 
     stream = ga_service.search_stream(customer_id=customer_id, query=query)
 
-    conversion_data = []
-    for batch in stream:
-        for row in batch.results:
-            gender_id = row.ad_group_criterion.gender.type
-            gender_label = GENDER_MAPPING.get(gender_id, "Unknown")
-
-            conversion_data.append({
-                'Resource Name': row.gender_view.resource_name,
-                'Campaign ID': row.campaign.id,
-                'Campaign Name': row.campaign.name,
-                'Campaign Type': row.campaign.advertising_channel_type.name if row.campaign.advertising_channel_type else 'Unknown',
-                'Ad Group ID': row.ad_group.id,
-                'Ad Group Name': row.ad_group.name,
-                'Gender': gender_label, 
-                'Conversion Name': row.segments.conversion_action_name,
-                'All Conversions': row.metrics.all_conversions if row.metrics.all_conversions is not None else 0.0,
-                'All Conversions Value': row.metrics.all_conversions_value if row.metrics.all_conversions_value is not None else 0.0,
-                'Date': row.segments.date
-            })
-
-    return conversion_data
-
-def main():
-    accounts = fetch_enabled_accounts()
-    final_dataframes = []
-
-    for acc in accounts:
-        acc_id = acc["customer_id"]
-        acc_name = acc["name"]
-        print(f"\n▶️ Processing account: {acc_id} - {acc_name}")
-
-        try:
-            client = GoogleAdsClient.load_from_dict({
-                'client_customer_id': acc_id,
-                'login_customer_id': GOOGLE_ADS_LOGIN_CUSTOMER_ID,
-                'developer_token': DEVELOPER_TOKEN,
-                'json_key_file_path': JSON_KEY_FILE_PATH,
-                'impersonated_email': GOOGLE_ADS_IMPERSONATED_EMAIL,
-                'use_proto_plus': True,
-            })
-
-            df_gender = pd.DataFrame(get_gender_data(client, acc_id))
-            df_conversion = pd.DataFrame(get_gender_conversion_data(client, acc_id))
-            print(f"🔍 Conversion rows for account {acc_id}: {df_conversion.shape[0]}")
-
-            if df_gender.empty and df_conversion.empty:
-                print(f"⚠️ No data for account {acc_id}, skipping.")
-                continue
-
-            # Convert date fields
-            df_gender["Date"] = pd.to_datetime(df_gender["Date"])
-            df_conversion["Date"] = pd.to_datetime(df_conversion["Date"])
-
-            # Add fixed values
-            df_gender["Conversion Name"] = "Unknown"
-            df_gender["Cost"] = df_gender["Cost Micros"].fillna(0) / 1_000_000
-            df_gender = df_gender.drop(columns=["Cost Micros"], errors='ignore')
+    return frame_from_stream(stream, {
+        'Resource Name': lambda row: row.gender_view.resource_name,
+        'Campaign ID': lambda row: row.campaign.id,
+        'Campaign Name': lambda row: row.campaign.name,
+        'Campaign Type': lambda row: row.campaign.advertising_channel_type.name if row.campaign.advertising_channel_type else 'Unknown',
+        'Ad Group ID': lambda row: row.ad_group.id,
+        'Ad Group Name': lambda row: row.ad_group.name,
+        'Gender': lambda row: GENDER_MAPPING.get(row.ad_group_criterion.gender.type, "Unknown"),
+        'Conversion Name': lambda row: row.segments.conversion_action_name,
+        'All Conversions': lambda row: row.metrics.all_conversions if row.metrics.all_conversions is not None else 0.0,
+        'All Conversions Value': lambda row: row.metrics.all_conversions_value if row.metrics.all_conversions_value is not None else 0.0,
+        'Date': lambda row: row.segments.date,
+    })
+
+
+def process_account(ga_service, acc):
+    acc_id = acc["customer_id"]
+    acc_name = acc["name"]
+    print(f"\n▶️ Processing account: {acc_id} - {acc_name}")
+
+    df_gender = get_gender_data(ga_service, acc_id)
+    df_conversion = get_gender_conversion_data(ga_service, acc_id)
+    print(f"🔍 Conversion rows for account {acc_id}: {df_conversion.shape[0]}")
+
+    if df_gender.empty and df_conversion.empty:
+        print(f"⚠️ No data for account {acc_id}, skipping.")
+        return None
+
+    # Convert date fields
+    df_gender["Date"] = pd.to_datetime(df_gender["Date"])
+    df_conversion["Date"] = pd.to_datetime(df_conversion["Date"])
+
+    # Add fixed values
+    df_gender["Conversion Name"] = "Unknown"
+    df_gender["Cost"] = df_gender["Cost Micros"].fillna(0) / 1_000_000
+    df_gender = df_gender.drop(columns=["Cost Micros"], errors='ignore')
+
+    df_conversion["Clicks"] = None
+    df_conversion["Impressions"] = None
+    df_conversion["Cost"] = None
+
+    # Add account metadata
+    df_gender["Account ID"] = int(acc_id)
+    df_gender["Account Name"] = acc_name
+    df_conversion["Account ID"] = int(acc_id)
+    df_conversion["Account Name"] = acc_name
+
+    # Align to schema
+    column_order = [
+        "Account ID", "Account Name", "Campaign ID", "Campaign Name", "Campaign Type",
+        "Ad Group ID", "Ad Group Name", "Gender", "Conversion Name", "Date",
+        "Impressions", "Clicks", "Cost", "All Conversions", "All Conversions Value", "Resource Name"
+    ]
 
-            df_conversion["Clicks"] = None
-            df_conversion["Impressions"] = None
-            df_conversion["Cost"] = None
+    df_gender = df_gender.reindex(columns=column_order)
+    df_conversion = df_conversion.reindex(columns=column_order)
 
-            # Add account metadata
-            df_gender["Account ID"] = int(acc_id)
-            df_gender["Account Name"] = acc_name
-            df_conversion["Account ID"] = int(acc_id)
-            df_conversion["Account Name"] = acc_name
+    # Final concat
+    df_final = pd.concat([df_gender, df_conversion], ignore_index=True)
+    print("✅ After concat:", df_final.shape)
+    return df_final
 
-            # Align to schema
-            column_order = [
-                "Account ID", "Account Name", "Campaign ID", "Campaign Name", "Campaign Type",
-                "Ad Group ID", "Ad Group Name", "Gender", "Conversion Name", "Date",
-                "Impressions", "Clicks", "Cost", "All Conversions", "All Conversions Value", "Resource Name"
-            ]
 
-            df_gender = df_gender.reindex(columns=column_order)
-            df_conversion = df_conversion.reindex(columns=column_order)
+def main():
+    # One client and one gRPC channel shared by every account
+    client = GoogleAdsClient.load_from_dict(CLIENT_CONFIG)
+    ga_service = client.get_service("GoogleAdsService")
 
-            # Final concat
-            df_final = pd.concat([df_gender, df_conversion], ignore_index=True)
-            print("✅ After concat:", df_final.shape)
-            final_dataframes.append(df_final)
+    accounts = fetch_enabled_accounts(ga_service)
+    final_dataframes = []
 
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {pool.submit(process_account, ga_service, acc): acc for acc in accounts}
+        for future in as_completed(futures):
+            acc = futures[future]
+            acc_id, acc_name = acc["customer_id"], acc["name"]
+            try:
+                df_final = future.result()
+            except Exception as e:
+                print(f"❌ Error in account {acc_id}: {e}")
+                continue
+            if df_final is not None:
+                final_dataframes.append(df_final)
 
-        except Exception as e:
-            print(f"❌ Error in account {acc_id}: {e}")
 
     if not final_dataframes:
         print("❌ No valid data collected. Exiting.")
@@ -1,4 +1,5 @@
 import os 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 from dotenv import load_dotenv
 
@@ -7,6 +8,8 @@ from google.oauth2 import service_account
 from pandas_gbq import to_gbq
 from google.cloud import bigquery
 
+from stream_frames import frame_from_stream
+
 # Load environment variables
 
 load_dotenv()
@@ -17,20 +20,22 @@ JSON_KEY_FILE_PATH = os.getenv("GOOGLE_ADS_JSON_KEY_FILE_PATH")
 GOOGLE_ADS_IMPERSONATED_EMAIL = os.getenv("GOOGLE_ADS_IMPERSONATED_EMAIL")
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
 TABLE_ID = f"{GCP_PROJECT_ID}.{os.getenv('BIGQUERY_DATASET_ALL_MAIN')}.{os.getenv('BIGQUERY_TABLE_ALL_LOCATION')}"
+MAX_WORKERS = int(os.getenv("BRONZE_MAX_WORKERS", "8"))
+GEOTARGETS_CSV_PATH = os.getenv("GEOTARGETS_CSV_PATH", "geotargets-2025-04-01.csv")
+# Dump each account's location frames to CSV (overwritten per account)
+LEGACY_DEBUG_CSV = os.getenv("LEGACY_DEBUG_CSV", "False").lower() == "true"
 
+CLIENT_CONFIG = {
+    "developer_token": DEVELOPER_TOKEN,
+    "login_customer_id": GOOGLE_ADS_LOGIN_CUSTOMER_ID,
+    "json_key_file_path": JSON_KEY_FILE_PATH,
+    "impersonated_email": GOOGLE_ADS_IMPERSONATED_EMAIL,
+    "use_proto_plus": True
+}
 
 
-def fetch_enabled_accounts():
-    config = {
-        "developer_token": DEVELOPER_TOKEN,
-        "login_customer_id": GOOGLE_ADS_LOGIN_CUSTOMER_ID,
-        "json_key_file_path": JSON_KEY_FILE_PATH,
-        "impersonated_email": GOOGLE_ADS_IMPERSONATED_EMAIL,
-        "use_proto_plus": True
-    }
-    client = GoogleAdsClient.load_from_dict(config)
-    service = client.get_service("GoogleAdsService")
 
+def fetch_enabled_accounts(ga_service):
     query = """
         SELECT customer_client.client_customer,
                customer_client.descriptive_name,
@@ -41,7 +46,7 @@ def fetch_enabled_accounts():
         AND customer_client.status = 'ENABLED'
     """
 
-    response = service.search(customer_id=GOOGLE_ADS_LOGIN_CUSTOMER_ID, query=query)
+    response = ga_service.search(customer_id=GOOGLE_ADS_LOGIN_CUSTOMER_ID, query=query)
     accounts = []
     for row in response:
         if not row.customer_client.manager:
@@ -53,8 +58,7 @@ def fetch_enabled_accounts():
     return accounts              
 
 
-def get_location_data(client, customer_id, id_to_country_code, id_to_city_code):
-    ga_service =client.get_service("GoogleAdsService")
+def get_location_data(ga_service, customer_id, id_to_country_code, id_to_city_code):
     query = """
         SELECT user_location_view.country_criterion_id,
                user_location_view.resource_name,
@@ -81,51 +85,37 @@ def get_location_data(client, customer_id, id_to_country_code, id_to_city_code):
         customer_id=customer_id, query=query
     )
 
-    location_data=[]
-    for batch in stream:
-        for row in batch.results:
-            location_data.append({
-                "resource_name": row.user_location_view.resource_name,
-                "country_criterion_id": row.user_location_view.country_criterion_id,
-                "targeting_location": row.user_location_view.targeting_location,
-                "campaign_id": row.campaign.id,
-                "campaign_name": row.campaign.name,
-                "advertising_channel_type": row.campaign.advertising_channel_type,
-                "ad_group_id": row.ad_group.id,
-                "ad_group_name": row.ad_group.name,
-                "geo_target_city": row.segments.geo_target_city,
-                "geo_target_province": row.segments.geo_target_province,
-                "date": row.segments.date,
-                "all_conversions": row.metrics.all_conversions,
-                "all_conversions_value": row.metrics.all_conversions_value,
-                "clicks": row.metrics.clicks,
-                "cost_micros": row.metrics.cost_micros,
-                "impressions": row.metrics.impressions
-            })
-        
-        
-        df=pd.DataFrame(location_data)
-        df["country_criterion_id"] = pd.to_numeric(df["country_criterion_id"], errors="coerce").astype("Int64")
-        #Pull only integer value from like this geoTargetConstants/1000010
-        df["get_target_city"] = df["geo_target_city"].astype(str).str.extract(r'(\d+)').astype("Int64")
-
-
-        
-
-
-        df["country_code"] = df["country_criterion_id"].map(id_to_country_code)
-        df["geo_target_city"] = df["get_target_city"].map(id_to_city_code)
-    print(df.head(20))
-    #Print schema of the DataFrame
-    print(df.dtypes)
-    #save this Dataframe as csv file
-    df.to_csv("location_data.csv", index=False)
+    df = frame_from_stream(stream, {
+        "resource_name": lambda row: row.user_location_view.resource_name,
+        "country_criterion_id": lambda row: row.user_location_view.country_criterion_id,
+        "targeting_location": lambda row: row.user_location_view.targeting_location,
+        "campaign_id": lambda row: row.campaign.id,
+        "campaign_name": lambda row: row.campaign.name,
+        "advertising_channel_type": lambda row: row.campaign.advertising_channel_type,
+        "ad_group_id": lambda row: row.ad_group.id,
+        "ad_group_name": lambda row: row.ad_group.name,
+        "geo_target_city": lambda row: row.segments.geo_target_city,
+        "geo_target_province": lambda row: row.segments.geo_target_province,
+        "date": lambda row: row.segments.date,
+        "all_conversions": lambda row: row.metrics.all_conversions,
+        "all_conversions_value": lambda row: row.metrics.all_conversions_value,
+        "clicks": lambda row: row.metrics.clicks,
+        "cost_micros": lambda row: row.metrics.cost_micros,
+        "impressions": lambda row: row.metrics.impressions,
+    })
+    enrich_locations(df, id_to_country_code, id_to_city_code)
+
+    if LEGACY_DEBUG_CSV:
+        print(df.head(20))
+        #Print schema of the DataFrame
+        print(df.dtypes)
+        #save this Dataframe as csv file
+        df.to_csv("location_data.csv", index=False)
 
     return df   
     
-def get_location_conversions(client, customer_id, id_to_country_code, id_to_city_code):
+def get_location_conversions(ga_service, customer_id, id_to_country_code, id_to_city_code):
 
-    ga_service=client.get_service("GoogleAdsService")
     query ="""
     SELECT user_location_view.country_criterion_id, 
         user_location_view.resource_name, 
@@ -149,121 +139,149 @@ def get_location_conversions(client, customer_id, id_to_country_code, id_to_city
     stream = ga_service.search_stream(
         customer_id=customer_id, query=query
     )
-    conversion_data=[]
-    for batch in stream:
-        for row in batch.results:
-            conversion_data.append({
-                "resource_name": row.user_location_view.resource_name,
-                "country_criterion_id": row.user_location_view.country_criterion_id,
-                "targeting_location": row.user_location_view.targeting_location,
-                "campaign_id": row.campaign.id,
-                "campaign_name": row.campaign.name,
-                "advertising_channel_type": row.campaign.advertising_channel_type,
-                "ad_group_id": row.ad_group.id,
-                "ad_group_name": row.ad_group.name,
-                "geo_target_city": row.segments.geo_target_city,
-                "geo_target_province": row.segments.geo_target_province,
-                "date": row.segments.date,
-                "all_conversions": row.metrics.all_conversions,
-                "all_conversions_value": row.metrics.all_conversions_value,
-                "conversion_action_name": row.segments.conversion_action_name
-            })
-
-        
-        df=pd.DataFrame(conversion_data)
-        df["country_criterion_id"] = pd.to_numeric(df["country_criterion_id"], errors="coerce").astype("Int64")
-        #Pull only integer value from like this geoTargetConstants/1000010
-        df["get_target_city"] = df["geo_target_city"].astype(str).str.extract(r'(\d+)').astype("Int64")    
-        
-        
-        df["country_code"] = df["country_criterion_id"].map(id_to_country_code)
-        df["geo_target_city"] = df["get_target_city"].map(id_to_city_code)
+    df = frame_from_stream(stream, {
+        "resource_name": lambda row: row.user_location_view.resource_name,
+        "country_criterion_id": lambda row: row.user_location_view.country_criterion_id,
+        "targeting_location": lambda row: row.user_location_view.targeting_location,
+        "campaign_id": lambda row: row.campaign.id,
+        "campaign_name": lambda row: row.campaign.name,
+        "advertising_channel_type": lambda row: row.campaign.advertising_channel_type,
+        "ad_group_id": lambda row: row.ad_group.id,
+        "ad_group_name": lambda row: row.ad_group.name,
+        "geo_target_city": lambda row: row.segments.geo_target_city,
+        "geo_target_province": lambda row: row.segments.geo_target_province,
+        "date": lambda row: row.segments.date,
+        "all_conversions": lambda row: row.metrics.all_conversions,
+        "all_conversions_value": lambda row: row.metrics.all_conversions_value,
+        "conversion_action_name": lambda row: row.segments.conversion_action_name,
+    })
+    enrich_locations(df, id_to_country_code, id_to_city_code)
+
+    if LEGACY_DEBUG_CSV:
         # # Print schema of the DataFrame
         print(df.dtypes)  
         print(df.head(20))
         # Save this DataFrame as a CSV file
         df.to_csv("location_conversion_data.csv", index=False)  
 
+    return df
+
+
+GEO_TARGET_PREFIX = "geoTargetConstants/"
+
+
+def parse_geo_target_ids(values):
+    # geoTargetConstants/1000010 -> 1000010; unset segments ("") become NA
+    values = values.astype(str)
+    digits = values.where(values.str.startswith(GEO_TARGET_PREFIX)).str.slice(len(GEO_TARGET_PREFIX))
+    return pd.to_numeric(digits, errors="coerce").astype("Int64")
 
+
+def enrich_locations(df, id_to_country_code, id_to_city_code):
+    # Runs once on the finished frame, after the whole stream has been read
+    df["country_criterion_id"] = pd.to_numeric(df["country_criterion_id"], errors="coerce").astype("Int64")
+    df["get_target_city"] = parse_geo_target_ids(df["geo_target_city"])
+    df["country_code"] = df["country_criterion_id"].map(id_to_country_code)
+    df["geo_target_city"] = df["get_target_city"].map(id_to_city_code)
     return df
 
-# Preload geo mapping
-location_df = pd.read_csv("geotargets-2025-04-01.csv")
-location_df.columns = location_df.columns.str.strip().str.lower().str.replace(" ", "_")
-location_df["parent_id"] = pd.to_numeric(location_df["parent_id"], errors="coerce").astype("Int64")
-location_df["criteria_id"] = pd.to_numeric(location_df["criteria_id"], errors="coerce").astype("Int64")
-id_to_country_code = dict(zip(location_df["parent_id"], location_df["country_code"]))
-id_to_city_code = dict(zip(location_df["criteria_id"], location_df["name"]))
+def load_geo_mappings(csv_path=GEOTARGETS_CSV_PATH):
+    """
+      Returns ({criteria_id: country_code}, {criteria_id: name}) as Series.
 
+      country_criterion_id is the id of the country itself, so its code is
+      that row's own country_code. Keying on parent_id instead gave each
+      parent the code of whichever child came last, and missed countries
+      with no children in the CSV.
+    """
+    location_df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    location_df.columns = location_df.columns.str.strip().str.lower().str.replace(" ", "_")
+    location_df["criteria_id"] = pd.to_numeric(location_df["criteria_id"], errors="coerce").astype("Int64")
+    location_df = location_df.dropna(subset=["criteria_id"]).drop_duplicates("criteria_id", keep="last")
+    location_df = location_df.set_index("criteria_id")
+    id_to_country_code = location_df["country_code"].replace("", None)
+    id_to_city_code = location_df["name"]
+    return id_to_country_code, id_to_city_code
 
-def main():
-    accounts=fetch_enabled_accounts()
-    final_dataframes=[]
 
-    for acc in accounts:
-        acc_id=acc["customer_id"]
-        acc_name=acc["name"]
-        print(f"Processing account: {acc_name} ({acc_id})")
-
-        try:
-            client =GoogleAdsClient.load_from_dict({
-                'client_customer_id': acc_id,
-                'developer_token': DEVELOPER_TOKEN,
-                'login_customer_id': GOOGLE_ADS_LOGIN_CUSTOMER_ID,
-                'json_key_file_path': JSON_KEY_FILE_PATH,
-                'impersonated_email': GOOGLE_ADS_IMPERSONATED_EMAIL,
-                'use_proto_plus': True
-            })
+def process_account(ga_service, acc, id_to_country_code, id_to_city_code):
+    acc_id=acc["customer_id"]
+    acc_name=acc["name"]
+    print(f"Processing account: {acc_name} ({acc_id})")
+
+    df_location = get_location_data(ga_service, acc_id, id_to_country_code, id_to_city_code)
+    df_conversion = get_location_conversions(ga_service, acc_id, id_to_country_code, id_to_city_code)
+
+    print(f" Conversion rows for account {acc_name} ({acc_id}): {len(df_conversion)}")
+
+    if df_location.empty and df_conversion.empty:
+        print(f"No location data found for account {acc_name} ({acc_id}).")
+        return None
+
+    #Convert Date fields
+    df_location["date"] = pd.to_datetime(df_location["date"])
+    df_conversion["date"] = pd.to_datetime(df_conversion["date"])
+
+    #Add fixed values
+    df_location["conversion_action_name"]="Unknown"
+    df_location["cost"]=df_location["cost_micros"].fillna(0)/1_000_000
+    df_location =df_location.drop(columns=["cost_micros"], errors='ignore')
 
-            df_location = pd.DataFrame(get_location_data(client, acc_id, id_to_country_code, id_to_city_code))
-            df_conversion = pd.DataFrame(get_location_conversions(client, acc_id, id_to_country_code, id_to_city_code))
+    df_conversion["clicks"]= None
+    df_conversion["impressions"]= None
+    df_conversion["cost"]=None 
 
-            print(f" Conversion rows for account {acc_name} ({acc_id}): {len(df_conversion)}")
+    #Add Account metadata
+    df_location["account_id"] = int(acc_id)
+    df_location["account_name"] = acc_name
+    df_conversion["account_id"] = int(acc_id)
+    df_conversion["account_name"] = acc_name
+    df_conversion["conversion_action_name"] = df_conversion["conversion_action_name"].fillna("No Conversion Recorded")
+
+
+    #Align To schema
+
+    column_order= [
+        "account_id", "account_name", "resource_name", "country_criterion_id", 
+        "targeting_location", "campaign_id", "campaign_name", "advertising_channel_type",
+        "ad_group_id", "ad_group_name", "country_code", "geo_target_city", "geo_target_province","date",
+        "all_conversions", "all_conversions_value", "conversion_action_name", "clicks",
+        "impressions", "cost"
+    ]
+
+    df_location=df_location.reindex(columns=column_order)
+    df_conversion=df_conversion.reindex(columns=column_order)
+
+    #Final concatenation
+    df_final = pd.concat([df_location, df_conversion], ignore_index=True)
+    print("Final DataFrame shape:", df_final.shape)
+    return df_final
+
+
+def main():
+    # One client and one gRPC channel shared by every account
+    client = GoogleAdsClient.load_from_dict(CLIENT_CONFIG)
+    ga_service = client.get_service("GoogleAdsService")
+
+    accounts = fetch_enabled_accounts(ga_service)
+    # Preload geo mapping
+    id_to_country_code, id_to_city_code = load_geo_mappings()
+    final_dataframes=[]
 
-            if df_location.empty and df_conversion.empty:
-                print(f"No location data found for account {acc_name} ({acc_id}).")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {pool.submit(process_account, ga_service, acc, id_to_country_code, id_to_city_code): acc
+                   for acc in accounts}
+        for future in as_completed(futures):
+            acc = futures[future]
+            acc_id, acc_name = acc["customer_id"], acc["name"]
+            try:
+                df_final = future.result()
+            except Exception as e:
+                print(f"Error processing account {acc_name} ({acc_id}): {e}")
                 continue
+            if df_final is not None:
+                final_dataframes.append(df_final)
 
-            #Convert Date fields
-            df_location["date"] = pd.to_datetime(df_location["date"])
-            df_conversion["date"] = pd.to_datetime(df_conversion["date"])
-
-            #Add fixed values
-            df_location["conversion_action_name"]="Unknown"
-            df_location["cost"]=df_location["cost_micros"].fillna(0)/1_000_000
-            df_location =df_location.drop(columns=["cost_micros"], errors='ignore')
-            
-            df_conversion["clicks"]= None
-            df_conversion["impressions"]= None
-            df_conversion["cost"]=None 
-            
-            #Add Account metadata
-            df_location["account_id"] = int(acc_id)
-            df_location["account_name"] = acc_name
-            df_conversion["account_id"] = int(acc_id)
-            df_conversion["account_name"] = acc_name
-            df_conversion["conversion_action_name"] = df_conversion["conversion_action_name"].fillna("No Conversion Recorded")
-
-
-            #Align To schema
-
-            column_order= [
-                "account_id", "account_name", "resource_name", "country_criterion_id", 
-                "targeting_location", "campaign_id", "campaign_name", "advertising_channel_type",
-                "ad_group_id", "ad_group_name", "country_code", "geo_target_city", "geo_target_province","date",
-                "all_conversions", "all_conversions_value", "conversion_action_name", "clicks",
-                "impressions", "cost"
-            ]
-
-            df_location=df_location.reindex(columns=column_order)
-            df_conversion=df_conversion.reindex(columns=column_order)
-
-            #Final concatenation
-            df_final = pd.concat([df_location, df_conversion], ignore_index=True)
-            print("Final DataFrame shape:", df_final.shape)
-            final_dataframes.append(df_final)
-        except Exception as e:
-            print(f"Error processing account {acc_name} ({acc_id}): {e}")
 
     if not final_dataframes:
         print("No data fetched from any account.")
@@ -2,12 +2,15 @@
 #    CONFIGURATION SECTION   #
 # ========================== #
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 from dotenv import load_dotenv
 from google.ads.googleads.client import GoogleAdsClient
 from google.oauth2 import service_account
 from pandas_gbq import to_gbq
 from google.cloud import bigquery
+
+from stream_frames import frame_from_stream
 # ✅ Set Google Cloud credentials
 # os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "googleads-bigquery.json"
 
@@ -20,6 +23,15 @@ JSON_KEY_FILE_PATH = os.getenv('GOOGLE_ADS_JSON_KEY_FILE_PATH')
 GOOGLE_ADS_IMPERSONATED_EMAIL = os.getenv('GOOGLE_ADS_IMPERSONATED_EMAIL')
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
 TABLE_ID = f"{GCP_PROJECT_ID}.{os.getenv('BIGQUERY_DATASET_ALL_MAIN')}.{os.getenv('BIGQUERY_TABLE_ALL_MAIN')}"
+MAX_WORKERS = int(os.getenv("BRONZE_MAX_WORKERS", "8"))
+
+CLIENT_CONFIG = {
+    "developer_token": DEVELOPER_TOKEN,
+    "login_customer_id": GOOGLE_ADS_LOGIN_CUSTOMER_ID,
+    "json_key_file_path": JSON_KEY_FILE_PATH,
+    "impersonated_email": GOOGLE_ADS_IMPERSONATED_EMAIL,
+    "use_proto_plus": True
+}
 
 DEVICE_MAPPING = {
     0: "Unknown", 1: "Mobile", 2: "Tablet", 3: "Desktop", 4: "Connected TV", 5: "Other"
@@ -28,17 +40,7 @@ DEVICE_MAPPING = {
 # ========================== #
 #     FETCH ENABLED ACCOUNTS #
 # ========================== #
-def fetch_enabled_accounts():
-    config = {
-        "developer_token": DEVELOPER_TOKEN,
-        "login_customer_id": GOOGLE_ADS_LOGIN_CUSTOMER_ID,
-        "json_key_file_path": JSON_KEY_FILE_PATH,
-        "impersonated_email": GOOGLE_ADS_IMPERSONATED_EMAIL,
-        "use_proto_plus": True
-    }
-    client = GoogleAdsClient.load_from_dict(config)
-    service = client.get_service("GoogleAdsService")
-
+def fetch_enabled_accounts(ga_service):
     query = """
         SELECT customer_client.client_customer,
                customer_client.descriptive_name,
@@ -49,7 +51,7 @@ def fetch_enabled_accounts():
         AND customer_client.status = 'ENABLED'
     """
 
-    response = service.search(customer_id=GOOGLE_ADS_LOGIN_CUSTOMER_ID, query=query)
+    response = ga_service.search(customer_id=GOOGLE_ADS_LOGIN_CUSTOMER_ID, query=query)
     accounts = []
     for row in response:
         if not row.customer_client.manager:
@@ -64,8 +66,7 @@ def fetch_enabled_accounts():
 # ========================== #
 #     DEVICE DATA FUNCTION   #
 # ========================== #
-def get_device_data(client, customer_id):
-    ga_service = client.get_service("GoogleAdsService")
+def get_device_data(ga_service, customer_id):
     query = """
         SELECT campaign.id, campaign.name, campaign.advertising_channel_type,
                segments.device, segments.date,
@@ -77,28 +78,23 @@ def get_device_data(client, customer_id):
         
     """
     stream = ga_service.search_stream(customer_id=customer_id, query=query)
-    device_data = []
-    for batch in stream:
-        for row in batch.results:
-            device_data.append({
-                'Campaign ID': row.campaign.id,
-                'Campaign Name': row.campaign.name,
-                'Campaign Type': row.campaign.advertising_channel_type.name if row.campaign.advertising_channel_type else 'Unknown',
-                'Device': DEVICE_MAPPING.get(row.segments.device, "Unknown"),
-                'Date': row.segments.date,
-                'Impressions': row.metrics.impressions,
-                'Clicks': row.metrics.clicks,
-                'Cost Micros': row.metrics.cost_micros,
-                'All Conversions': row.metrics.all_conversions,
-                'All Conversions Value': row.metrics.all_conversions_value
-            })
-    return device_data
+    return frame_from_stream(stream, {
+        'Campaign ID': lambda row: row.campaign.id,
+        'Campaign Name': lambda row: row.campaign.name,
+        'Campaign Type': lambda row: row.campaign.advertising_channel_type.name if row.campaign.advertising_channel_type else 'Unknown',
+        'Device': lambda row: DEVICE_MAPPING.get(row.segments.device, "Unknown"),
+        'Date': lambda row: row.segments.date,
+        'Impressions': lambda row: row.metrics.impressions,
+        'Clicks': lambda row: row.metrics.clicks,
+        'Cost Micros': lambda row: row.metrics.cost_micros,
+        'All Conversions': lambda row: row.metrics.all_conversions,
+        'All Conversions Value': lambda row: row.metrics.all_conversions_value,
+    })
 
 # ========================== #
 #   CONVERSION DATA FUNCTION #
 # ========================== #
-def get_conversion_data(client, customer_id):
-    ga_service = client.get_service("GoogleAdsService")
+def get_conversion_data(ga_service, customer_id):
     query = """
         SELECT campaign.name, campaign.id,
                segments.device, segments.date,
@@ -110,71 +106,74 @@ def get_conversion_data(client, customer_id):
         AND segments.conversion_action_name IS NOT NULL
     """
     stream = ga_service.search_stream(customer_id=customer_id, query=query)
-    conversion_data = []
-    for batch in stream:
-        for row in batch.results:
-            conversion_data.append({
-                'Campaign Name': row.campaign.name,
-                'Campaign ID': row.campaign.id,
-                'Device': DEVICE_MAPPING.get(row.segments.device, "Unknown"),
-                'Date': row.segments.date,
-                'Conversion Name': row.segments.conversion_action_name,
-                'All Conversions': row.metrics.all_conversions,
-                'All Conversions Value': row.metrics.all_conversions_value
-            })
-    return conversion_data
+    return frame_from_stream(stream, {
+        'Campaign Name': lambda row: row.campaign.name,
+        'Campaign ID': lambda row: row.campaign.id,
+        'Device': lambda row: DEVICE_MAPPING.get(row.segments.device, "Unknown"),
+        'Date': lambda row: row.segments.date,
+        'Conversion Name': lambda row: row.segments.conversion_action_name,
+        'All Conversions': lambda row: row.metrics.all_conversions,
+        'All Conversions Value': lambda row: row.metrics.all_conversions_value,
+    })
 
 # ========================== #
 #         MAIN SCRIPT        #
 # ========================== #
-def main():
-    accounts = fetch_enabled_accounts()
-    final_dataframes = []
 
-    for acc in accounts:
-        acc_id, acc_name = acc["customer_id"], acc["name"]
-        print(f"\n▶️ Processing account: {acc_id} - {acc_name}")
-
-        try:
-            client = GoogleAdsClient.load_from_dict({
-                'client_customer_id': acc_id,
-                'login_customer_id': GOOGLE_ADS_LOGIN_CUSTOMER_ID,
-                'developer_token': DEVELOPER_TOKEN,
-                'json_key_file_path': JSON_KEY_FILE_PATH,
-                'impersonated_email': GOOGLE_ADS_IMPERSONATED_EMAIL,
-                'use_proto_plus': True
-            })
+def process_account(ga_service, acc):
+    acc_id, acc_name = acc["customer_id"], acc["name"]
+    print(f"\n▶️ Processing account: {acc_id} - {acc_name}")
 
-            df_device = pd.DataFrame(get_device_data(client, acc_id))
-            df_conversion = pd.DataFrame(get_conversion_data(client, acc_id))
+    df_device = get_device_data(ga_service, acc_id)
+    df_conversion = get_conversion_data(ga_service, acc_id)
 
-            if df_device.empty and df_conversion.empty:
-                print(f"⚠️ No data for account {acc_id}, skipping.")
-                continue
+    if df_device.empty and df_conversion.empty:
+        print(f"⚠️ No data for account {acc_id}, skipping.")
+        return None
 
-            if not df_device.empty:
-                df_device["Date"] = pd.to_datetime(df_device["Date"]).dt.date
-            if not df_conversion.empty:
-                df_conversion["Date"] = pd.to_datetime(df_conversion["Date"]).dt.date
+    if not df_device.empty:
+        df_device["Date"] = pd.to_datetime(df_device["Date"]).dt.date
+    if not df_conversion.empty:
+        df_conversion["Date"] = pd.to_datetime(df_conversion["Date"]).dt.date
 
-            df_device["Conversion Name"] = "Unknown"
-            df_device["All Conversions"] = None
-            df_device["All Conversions Value"]=None
+    df_device["Conversion Name"] = "Unknown"
+    df_device["All Conversions"] = None
+    df_device["All Conversions Value"]=None
 
-            df_conversion["Impressions"] = None
-            df_conversion["Clicks"] = None
-            df_conversion["Cost Micros"] = None
-            
-            
-            df_final=pd.concat([df_device,df_conversion],ignore_index=True)
+    df_conversion["Impressions"] = None
+    df_conversion["Clicks"] = None
+    df_conversion["Cost Micros"] = None
 
-            df_final["Account ID"] = acc_id
-            df_final["Account Name"] = acc_name
 
-            final_dataframes.append(df_final)
+    df_final=pd.concat([df_device,df_conversion],ignore_index=True)
+
+    df_final["Account ID"] = acc_id
+    df_final["Account Name"] = acc_name
+
+    return df_final
+
+
+def main():
+    # One client and one gRPC channel shared by every account
+    client = GoogleAdsClient.load_from_dict(CLIENT_CONFIG)
+    ga_service = client.get_service("GoogleAdsService")
+
+    accounts = fetch_enabled_accounts(ga_service)
+    final_dataframes = []
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {pool.submit(process_account, ga_service, acc): acc for acc in accounts}
+        for future in as_completed(futures):
+            acc = futures[future]
+            acc_id, acc_name = acc["customer_id"], acc["name"]
+            try:
+                df_final = future.result()
+            except Exception as e:
+                print(f"❌ Error in account {acc_id}: {e}")
+                continue
+            if df_final is not None:
+                final_dataframes.append(df_final)
 
-        except Exception as e:
-            print(f"❌ Error in account {acc_id}: {e}")
 
     if not final_dataframes: 
         print("❌ No valid data collected. Exiting.")
@@ -2,22 +2,16 @@
 #    CONFIGURATION SECTION   #
 # ========================== #
 import os
-import pandas as pd
 from dotenv import load_dotenv
-from google.ads.googleads.client import GoogleAdsClient
 
-from utils.bigquery_loader import load_to_bigquery
-from utils.google_ads_client import fetch_enabled_accounts
+from utils.extraction_runner import add_account_columns, extract_and_load
+from utils.google_ads_client import fetch_enabled_accounts, get_ads_service
 from utils.logger import setup_logger
+from utils.query_planner import ReportQuery, run_query
+from utils.row_decoder import Field, decode_stream
 # ✅ Set Google Cloud credentials
 logger=setup_logger(__name__)
 load_dotenv()
-DEVELOPER_TOKEN = os.getenv('GOOGLE_ADS_DEVELOPER_TOKEN')
-GOOGLE_ADS_LOGIN_CUSTOMER_ID = os.getenv('GOOGLE_ADS_LOGIN_CUSTOMER_ID')
-JSON_KEY_FILE_PATH = os.getenv('GOOGLE_ADS_JSON_KEY_FILE_PATH')
-
-GOOGLE_ADS_IMPERSONATED_EMAIL = os.getenv('GOOGLE_ADS_IMPERSONATED_EMAIL')
-
 
 
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
@@ -36,100 +30,68 @@ AGE_RANGE_MAPPING = {
 
 
 
-def get_age_range_data(client, customer_id):
-    ga_service = client.get_service("GoogleAdsService")
-    query = """
-        SELECT 
-            age_range_view.resource_name,
-            campaign.id,
-            campaign.name,
-            campaign.advertising_channel_type,
-            ad_group.id,
-            ad_group.name,
-            ad_group_criterion.age_range.type,
-            segments.date,
-            metrics.impressions, 
-            metrics.clicks, 
-            metrics.cost_micros,
-            metrics.all_conversions,
-            metrics.all_conversions_value
-        FROM age_range_view
-        WHERE segments.date DURING LAST_30_DAYS
-    """
-
-    stream = ga_service.search_stream(customer_id=customer_id, query=query)
-    age_data = []
-    for batch in stream:
-        for row in batch.results:
-            age_id = row.ad_group_criterion.age_range.type
-            age_range_label = AGE_RANGE_MAPPING.get(age_id, "Unknown")
-
-            age_data.append({
-                'resource_name': row.age_range_view.resource_name,
-                'campaign_id': row.campaign.id,
-                'campaign_name': row.campaign.name,
-                'campaign_type': row.campaign.advertising_channel_type.name if row.campaign.advertising_channel_type else 'Unknown',
-                'ad_group_id': row.ad_group.id,
-                'ad_group_name': row.ad_group.name,
-                'age_range': age_range_label, 
-                'impressions': row.metrics.impressions,
-                'clicks': row.metrics.clicks,
-                'cost_micros': row.metrics.cost_micros,
-                'all_conversions': float(row.metrics.all_conversions),
-                'all_conversions_value': float(row.metrics.all_conversions_value),
-                'date': row.segments.date
-            })
-    return age_data
+AGE_FIELDS = [
+    Field('resource_name', 'age_range_view.resource_name'),
+    Field('campaign_id', 'campaign.id', 'int64'),
+    Field('ad_group_id', 'ad_group.id', 'int64'),
+    Field('age_range', 'ad_group_criterion.age_range.type_', 'category', transform=lambda age_id: AGE_RANGE_MAPPING.get(age_id, "Unknown")),
+    Field('impressions', 'metrics.impressions', 'int64'),
+    Field('clicks', 'metrics.clicks', 'int64'),
+    Field('cost_micros', 'metrics.cost_micros', 'int64'),
+    Field('all_conversions', 'metrics.all_conversions', 'float64'),
+    Field('all_conversions_value', 'metrics.all_conversions_value', 'float64'),
+    Field('date', 'segments.date', 'date'),
+]
 
 
+AGE_QUERY = ReportQuery(
+    report="age_metrics",
+    resource="age_range_view",
+    attributes=(
+        "age_range_view.resource_name",
+        "campaign.id",
+        "ad_group.id",
+        "ad_group_criterion.age_range.type",
+    ),
+    segments=(
+        "segments.date",
+    ),
+    metrics=(
+        "metrics.impressions",
+        "metrics.clicks",
+        "metrics.cost_micros",
+        "metrics.all_conversions",
+        "metrics.all_conversions_value",
+    ),
+)
 
-def main():
-    accounts = fetch_enabled_accounts()
-    final_dataframes = []
 
-    for acc in accounts:
-        acc_id = acc["customer_id"]
-        acc_name = acc["name"]
-        logger.info(f"\n▶️ Processing account: {acc_id} - {acc_name}")
+def get_age_range_data(ga_service, customer_id, window=None):
+    stream = run_query(ga_service, customer_id, AGE_QUERY, window)
+    return decode_stream(stream, AGE_FIELDS)
 
-        try:
-            client = GoogleAdsClient.load_from_dict({
-                'client_customer_id': acc_id,
-                'login_customer_id': GOOGLE_ADS_LOGIN_CUSTOMER_ID,
-                'developer_token': DEVELOPER_TOKEN,
-                'json_key_file_path': JSON_KEY_FILE_PATH,
-                'impersonated_email': GOOGLE_ADS_IMPERSONATED_EMAIL,
-                'use_proto_plus': True,
-            })
 
-            df_age = pd.DataFrame(get_age_range_data(client, acc_id))
-            
 
-            if df_age.empty:
-                logger.warning(f"⚠️ No data for account {acc_id}, skipping.")
-                continue
+def extract_account(acc, window=None):
+    acc_id = acc["customer_id"]
+    acc_name = acc["name"]
+    logger.info("▶️ Processing account: %s - %s", acc_id, acc_name)
 
-            
+    ga_service = get_ads_service()
+    df_age = get_age_range_data(ga_service, acc_id, window)
 
-            # Concatenate safely
-            df_final = pd.concat([df_age], ignore_index=True)
-            df_final["account_id"] = acc_id                                                      
-            df_final["account_name"] = acc_name  
-            final_dataframes.append(df_final)
+    if df_age.empty:
+        logger.warning("⚠️ No data for account %s, skipping.", acc_id)
+        return df_age
 
-        except Exception as e:
-            logger.error(f"❌ Error in account {acc_id}: {e}")
+    add_account_columns(df_age, acc_id, acc_name)
+    return df_age
 
-    if not final_dataframes:
-        logger.error(f"❌ No valid data collected. Exiting.")
-        return
 
-    # ✅ Combine all accounts
-    df_all = pd.concat(final_dataframes, ignore_index=True)
+def main():
+    accounts = fetch_enabled_accounts()
+    extract_and_load(accounts, extract_account, TABLE_ID)
 
-   
-    # Upload to BigQuery
-    load_to_bigquery(df_all,TABLE_ID)
 
 if __name__ == "__main__":                                                                   
     main()   
@@ -0,0 +1,208 @@
+# ========================== #
+#      HISTORICAL BACKFILL   #
+# ========================== #
+"""
+  Loads an arbitrary date range for a set of accounts, one (report, shard)
+  at a time.
+
+  The range is split into day / week / month shards. Each (report, shard) is
+  a unit of work: every selected account is extracted for the shard, staged,
+  and committed with the shard as the load window, so the shard's dates are
+  replaced in the table (or its partitions, with BRONZE_LOAD_MODE=partition)
+  and re-running a shard never duplicates rows. Units run in parallel on a
+  bounded pool; commits to the same table are serialized.
+
+  Finished units are recorded in a checkpoint file, so after a crash the
+  same command resumes with the shards that did not commit. A unit with a
+  failing account is not committed and is retried on the next run.
+
+  With --accounts (e.g. backfilling a newly added client) each commit
+  replaces only those accounts' rows in the shard, and the checkpoint keys
+  carry the account set, so a later backfill of other accounts over the
+  same range still runs its shards.
+
+  Usage:
+      python backfill.py --start-date 2024-01-01 --end-date 2024-12-31
+      python backfill.py --start-date 2024-01-01 --end-date 2024-03-31 \\
+          --reports main_metrics main_conversions --accounts 1234567890 --shard day
+"""
+import argparse
+import contextvars
+import json
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from run_bronze import REPORTS
+from utils.bigquery_loader import StreamingLoad
+from utils.date_window import SHARD_SIZES, DateWindow, parse_date, split_window
+from utils.dimensions import load_dimensions
+from utils.extraction_runner import BRONZE_MAX_WORKERS
+from utils.google_ads_client import fetch_enabled_accounts
+from utils.instrumentation import export_run_metrics, reset_spans, span
+from utils.logger import log_context, new_run_id, setup_logger
+from utils.response_cache import log_cache_stats
+from utils.retry import call_with_retries, log_retry_stats
+
+logger=setup_logger(__name__)
+
+BRONZE_BACKFILL_CHECKPOINT = os.getenv("BRONZE_BACKFILL_CHECKPOINT", "backfill_checkpoint.json")
+
+
+
+
+# ========================== #
+#        CHECKPOINTS         #
+# ========================== #
+class BackfillCheckpoint:
+    """Set of committed (table, shard, account set) units, persisted as a JSON list."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._done = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self._done = set(json.load(f))
+
+    @staticmethod
+    def key(table_id, shard, account_ids=None):
+        # No account part for all enabled accounts, as in earlier checkpoints;
+        # an empty selection is a selection, not all accounts
+        if account_ids is None:
+            return f"{table_id}|{shard}"
+        return f"{table_id}|{shard}|{','.join(sorted(account_ids))}"
+
+    def is_done(self, table_id, shard, account_ids=None):
+        with self._lock:
+            return self.key(table_id, shard, account_ids) in self._done
+
+    def mark_done(self, table_id, shard, account_ids=None):
+        with self._lock:
+            self._done.add(self.key(table_id, shard, account_ids))
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(sorted(self._done), f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+
+
+# ========================== #
+#         SHARD UNITS        #
+# ========================== #
+_commit_locks = defaultdict(threading.Lock)
+
+
+def load_shard(module, accounts, shard, scope=None):
+    """
+      Extracts every account for one shard and replaces the shard in the
+      report's table, only for the customer ids in scope when given.
+      Transient API errors are retried per account; any account that still
+      fails aborts the unit before commit.
+    """
+    load = StreamingLoad(module.TABLE_ID, window=shard, accounts=scope)
+    try:
+        for acc in accounts:
+            label = f"{module.__name__} {acc['customer_id']} {shard}"
+            with log_context(report=module.__name__, account=acc["customer_id"]), \
+                    span("extract", report=module.__name__, account=acc["customer_id"]) as s:
+                df = call_with_retries(module.extract_account, acc, window=shard, label=label)
+                s.rows = 0 if df is None else len(df)
+            load.add(df)
+    except BaseException:
+        load.discard()
+        raise
+
+    # Concurrent transactions on one table abort each other
+    with _commit_locks[module.TABLE_ID], span("load", report=module.__name__) as s:
+        s.rows = load.commit()
+        return s.rows
+
+
+def backfill(window, report_names=None, account_ids=None, shard="week",
+             max_workers=None, checkpoint_path=None, refresh_accounts=False):
+    """Runs every pending (report, shard) unit; returns the units that failed."""
+    reports = {name: REPORTS[name] for name in (report_names or REPORTS)}
+    checkpoint = BackfillCheckpoint(checkpoint_path or BRONZE_BACKFILL_CHECKPOINT)
+    run_id = new_run_id()
+    reset_spans()
+
+    missing = []
+    accounts = fetch_enabled_accounts(account_ids, refresh=refresh_accounts, missing=missing)
+    # A backfill of some accounts must not replace the other accounts' rows
+    scope = [acc["customer_id"] for acc in accounts] if account_ids is not None else None
+    if scope == []:
+        logger.error("❌ None of the selected accounts is enabled, nothing to backfill.")
+        failed = [("account", customer_id) for customer_id in missing] or [("accounts", "none selected")]
+        export_run_metrics(run_id=run_id, failed=[f"{name} {s}" for name, s in failed])
+        return failed
+
+    shards = split_window(window, shard)
+    units = [
+        (name, module, s)
+        for s in shards
+        for name, module in reports.items()
+        if not checkpoint.is_done(module.TABLE_ID, s, scope)
+    ]
+    logger.info(
+        f"🚀 Backfilling {window} for {len(accounts)} accounts: "
+        f"{len(units)} of {len(shards) * len(reports)} (report, {shard}) units pending"
+    )
+
+    # Names are not part of the shards; one current snapshot per account
+    failed = [("account", customer_id) for customer_id in missing]
+    failed += [(name, "dimensions") for name in load_dimensions(accounts, max_workers)]
+    with ThreadPoolExecutor(max_workers=max_workers or BRONZE_MAX_WORKERS, thread_name_prefix="backfill") as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, load_shard, module, accounts, s, scope): (name, module, s)
+            for name, module, s in units
+        }
+        for future in as_completed(futures):
+            name, module, s = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                logger.error(f"❌ {name} {s} failed, will retry on next run: {e}")
+                failed.append((name, s))
+                continue
+            if not rows:
+                # commit() left the shard untouched; nothing to checkpoint
+                logger.error(f"❌ {name} {s}: no rows staged, will retry on next run")
+                failed.append((name, s))
+                continue
+
+            checkpoint.mark_done(module.TABLE_ID, s, scope)
+            logger.info(f"✅ {name} {s}: {rows} rows")
+
+    log_retry_stats()
+    log_cache_stats()
+    export_run_metrics(run_id=run_id, failed=[f"{name} {s}" for name, s in failed])
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill bronze reports over a date range.")
+    parser.add_argument("--start-date", required=True, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end-date", required=True, help="Last date (YYYY-MM-DD)")
+    parser.add_argument("--reports", nargs="+", choices=list(REPORTS), help="Subset of reports")
+    parser.add_argument("--accounts", nargs="+", help="Customer IDs to backfill (default: all enabled)")
+    parser.add_argument("--shard", choices=SHARD_SIZES, default="week", help="Shard size (default week)")
+    parser.add_argument("--max-workers", type=int, help="Concurrent units (default BRONZE_MAX_WORKERS)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default BRONZE_BACKFILL_CHECKPOINT)")
+    parser.add_argument("--refresh-accounts", action="store_true", help="Re-query the account list, ignoring the registry")
+    args = parser.parse_args()
+
+    window = DateWindow(parse_date(args.start_date), parse_date(args.end_date))
+    if window.start > window.end:
+        parser.error("--start-date is after --end-date")
+
+    failed = backfill(window, args.reports, args.accounts, args.shard, args.max_workers, args.checkpoint,
+                      args.refresh_accounts)
+    if failed:
+        raise SystemExit(f"Backfill incomplete, {len(failed)} units failed; re-run the same command to resume.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+  Counts GoogleAdsClient / GoogleAdsService constructions for a full bronze
+  run against the fake API, so per-account client churn shows up as a number.
+
+  Usage (from the bronze directory):
+      python -m benchmarks.bench_clients --accounts 400
+"""
+import argparse
+import importlib
+import time
+from unittest import mock
+
+from benchmarks.fakes import FakeGoogleAdsClient, FakeGoogleAdsService
+from utils import dimensions, extraction_runner, google_ads_client
+
+REPORTS = [
+    "main_metrics", "main_conversions",
+    "age_metrics", "age_conversions",
+    "gender_metrics", "gender_conversions",
+]
+
+
+def run(report, accounts, rows_per_account):
+    service = FakeGoogleAdsService(accounts=accounts, rows_per_account=rows_per_account)
+    module = importlib.import_module(report)
+    google_ads_client.reset_client()
+
+    with mock.patch.object(google_ads_client.GoogleAdsClient, "load_from_dict",
+                           return_value=FakeGoogleAdsClient(service)), \
+         mock.patch.object(google_ads_client, "BRONZE_ACCOUNT_CACHE", ""), \
+         mock.patch.object(extraction_runner, "load_to_bigquery"), \
+         mock.patch.object(extraction_runner, "load_chunks_to_bigquery"), \
+         mock.patch.object(extraction_runner, "save_watermark"), \
+         mock.patch.object(dimensions, "replace_accounts"):
+        before = google_ads_client.client_stats()
+        started = time.perf_counter()
+        module.main()
+        elapsed = time.perf_counter() - started
+        after = google_ads_client.client_stats()
+
+    return {
+        "report": report,
+        "accounts": accounts,
+        "client_constructions": after["client_constructions"] - before["client_constructions"],
+        "service_constructions": after["service_constructions"] - before["service_constructions"],
+        "seconds": round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--rows-per-account", type=int, default=100)
+    args = parser.parse_args()
+
+    for report in REPORTS:
+        print(run(report, args.accounts, args.rows_per_account))
+
+
+if __name__ == "__main__":
+    main()
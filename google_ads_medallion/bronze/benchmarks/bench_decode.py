@@ -0,0 +1,120 @@
+"""
+  Compares the old dict-per-row decoding against utils.row_decoder, through
+  proto-plus ("columnar") and straight from protobuf ("raw"), on a synthetic
+  GoogleAdsRow stream (age_metrics field set). Each mode runs in its own
+  subprocess so peak RSS is measured independently; --check first asserts
+  that all modes produce identical DataFrames.
+
+  Usage (from the bronze directory):
+      python -m benchmarks.bench_decode --rows 200000
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from age_metrics import AGE_FIELDS, AGE_RANGE_MAPPING
+from benchmarks.fakes import make_stream
+from utils.row_decoder import decode_stream
+
+MODES = ["dicts", "columnar", "raw"]
+
+
+def decode_dicts(stream):
+    """
+      The pre-columnar age_metrics loop, kept as the baseline, over the
+      current AGE_FIELDS (names and channel types live in the dimensions).
+    """
+    age_data = []
+    for batch in stream:
+        for row in batch.results:
+            age_data.append({
+                'resource_name': row.age_range_view.resource_name,
+                'campaign_id': row.campaign.id,
+                'ad_group_id': row.ad_group.id,
+                'age_range': AGE_RANGE_MAPPING.get(row.ad_group_criterion.age_range.type, "Unknown"),
+                'impressions': row.metrics.impressions,
+                'clicks': row.metrics.clicks,
+                'cost_micros': row.metrics.cost_micros,
+                'all_conversions': float(row.metrics.all_conversions),
+                'all_conversions_value': float(row.metrics.all_conversions_value),
+                'date': row.segments.date
+            })
+    return pd.DataFrame(age_data)
+
+
+def decode_columnar(stream):
+    return decode_stream(stream, AGE_FIELDS, raw=False)
+
+
+def decode_raw(stream):
+    return decode_stream(stream, AGE_FIELDS, raw=True)
+
+
+DECODERS = {"dicts": decode_dicts, "columnar": decode_columnar, "raw": decode_raw}
+
+
+def check_parity(rows=5_000, batch_size=1_000):
+    stream = make_stream(rows, batch_size)
+    expected = decode_dicts(stream)
+    for mode in ("columnar", "raw"):
+        actual = DECODERS[mode](stream)
+        # Same values; the decoder's compact dtypes (category, date32) are its own
+        pd.testing.assert_frame_equal(expected.astype(actual.dtypes.to_dict()), actual)
+    print(f"✅ Parity: dicts == columnar == raw on {rows} rows")
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode, rows, batch_size):
+    stream = make_stream(rows, batch_size)
+    baseline_mb = peak_rss_mb()
+
+    decode = DECODERS[mode]
+    started = time.perf_counter()
+    df = decode(stream)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "rows": len(df),
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(len(df) / elapsed),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "decode_rss_mb": round(peak_rss_mb() - baseline_mb, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--mode", choices=MODES, help="Run a single mode in-process")
+    parser.add_argument("--check", action="store_true", help="Assert identical output before timing")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.rows, args.batch_size)))
+        return
+
+    if args.check:
+        check_parity()
+
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_decode", "--mode", mode,
+             "--rows", str(args.rows), "--batch-size", str(args.batch_size)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        print(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+  Memory of the bronze frames per report with the compact dtypes
+  ("compact": categorical labels, date32 dates, categorical account columns,
+  kept through concat_frames) against the same Fields decoded as plain
+  object columns and joined with pd.concat ("object"). Each report decodes
+  one synthetic stream per account and concatenates the accounts, as the
+  loaders do. Location frames are measured before geotarget enrichment.
+
+  Usage (from the bronze directory):
+      python -m benchmarks.bench_dtypes --accounts 20 --rows 50000
+"""
+import argparse
+import json
+import time
+
+import pandas as pd
+
+from benchmarks.fakes import make_stream
+from run_bronze import REPORTS
+from utils.extraction_runner import add_account_columns
+from utils.row_decoder import Field, concat_frames, decode_stream
+
+MODES = ["object", "compact"]
+
+
+def report_fields(module):
+    """The module's list of Fields (e.g. AGE_FIELDS)."""
+    return next(
+        value for value in vars(module).values()
+        if isinstance(value, list) and value and all(isinstance(field, Field) for field in value)
+    )
+
+
+def as_object(fields):
+    return [field._replace(kind="object") if field.kind in ("category", "date") else field for field in fields]
+
+
+def build_frame(mode, fields, stream, accounts):
+    if mode == "object":
+        fields = as_object(fields)
+    frames = []
+    for n in range(accounts):
+        df = decode_stream(stream, fields, raw=True)
+        if mode == "object":
+            df["account_id"] = str(1_000_000_000 + n)
+            df["account_name"] = f"Account {n}"
+        else:
+            add_account_columns(df, str(1_000_000_000 + n), f"Account {n}")
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True) if mode == "object" else concat_frames(frames)
+
+
+def run_report(name, module, rows, accounts):
+    criterion = "gender" if name.startswith("gender") else "age_range"
+    stream = make_stream(rows, criterion=criterion)
+    fields = report_fields(module)
+    results = {}
+    for mode in MODES:
+        started = time.perf_counter()
+        df = build_frame(mode, fields, stream, accounts)
+        results[mode] = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "mb": round(df.memory_usage(deep=True).sum() / 2**20, 1),
+        }
+    return {
+        "report": name,
+        "rows": rows * accounts,
+        **{f"{mode}_{key}": value for mode, stats in results.items() for key, value in stats.items()},
+        "saved": f"{1 - results['compact']['mb'] / results['object']['mb']:.0%}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=50_000, help="Rows per account")
+    parser.add_argument("--reports", nargs="+", choices=list(REPORTS), default=list(REPORTS))
+    args = parser.parse_args()
+
+    for name in args.reports:
+        print(json.dumps(run_report(name, REPORTS[name], args.rows, args.accounts)))
+
+
+if __name__ == "__main__":
+    main()
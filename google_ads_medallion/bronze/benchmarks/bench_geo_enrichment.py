@@ -0,0 +1,133 @@
+"""
+  Location enrichment throughput: the old regex extract + dict .map()
+  ("regex_dicts") against utils.geo_enrichment.enrich_locations
+  ("vectorized") on synthetic location frames. Each (mode, size) runs in its
+  own subprocess; only the enrichment step is timed. --check first asserts
+  both modes produce the same city ids and names.
+
+  Usage (from the bronze directory):
+      python -m benchmarks.bench_geo_enrichment --rows 1000000 10000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_geotargets import write_synthetic_csv
+from utils.geo_enrichment import GEO_TARGET_PREFIX, enrich_locations
+from utils.geotargets import load_index
+
+MODES = ["regex_dicts", "vectorized"]
+
+
+def make_frame(index, rows, seed=42):
+    """Location rows over the index's ids; ~5% have no city segment."""
+    rng = np.random.default_rng(seed)
+    ids = np.asarray(index.ids)
+    city = pd.Series(rng.choice(ids, rows)).astype(str)
+    city = GEO_TARGET_PREFIX + city
+    city[rng.random(rows) < 0.05] = ""
+    return pd.DataFrame({
+        "country_criterion_id": rng.choice(ids[:200], rows),
+        "geo_target_city": city,
+        "geo_target_province": "",
+    })
+
+
+def enrich_regex_dicts(df, csv_path):
+    # The pre-index location code: parse the CSV into dicts, regex the ids out
+    location_df = pd.read_csv(csv_path)
+    location_df.columns = location_df.columns.str.strip().str.lower().str.replace(" ", "_")
+    location_df["parent_id"] = pd.to_numeric(location_df["parent_id"], errors="coerce").astype("Int64")
+    location_df["criteria_id"] = pd.to_numeric(location_df["criteria_id"], errors="coerce").astype("Int64")
+    id_to_country_code = dict(zip(location_df["parent_id"], location_df["country_code"]))
+    id_to_city_code = dict(zip(location_df["criteria_id"], location_df["name"]))
+
+    started = time.perf_counter()
+    df["country_criterion_id"] = pd.to_numeric(df["country_criterion_id"], errors="coerce").astype("Int64")
+    df["get_target_city"] = df["geo_target_city"].astype(str).str.extract(r'(\d+)').astype("Int64")
+    df["country_code"] = df["country_criterion_id"].map(id_to_country_code)
+    df["geo_target_city"] = df["get_target_city"].map(id_to_city_code)
+    return time.perf_counter() - started
+
+
+def enrich_vectorized(df, index):
+    started = time.perf_counter()
+    enrich_locations(df, index)
+    return time.perf_counter() - started
+
+
+def check_parity(index, csv_path, rows=50_000):
+    expected = make_frame(index, rows)
+    enrich_regex_dicts(expected, csv_path)
+    got = make_frame(index, rows)
+    enrich_vectorized(got, index)
+    for column in ("get_target_city", "geo_target_city"):
+        pd.testing.assert_series_equal(expected[column], got[column], check_dtype=False)
+    print(f"✅ Parity: regex_dicts == vectorized on {rows} rows")
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode, rows, csv_path, cache_dir):
+    index = load_index(csv_path, cache_dir)
+    df = make_frame(index, rows)
+    baseline_mb = peak_rss_mb()
+    if mode == "regex_dicts":
+        elapsed = enrich_regex_dicts(df, csv_path)
+    else:
+        elapsed = enrich_vectorized(df, index)
+
+    return {
+        "mode": mode,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed),
+        "enrich_rss_mb": round(peak_rss_mb() - baseline_mb, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--geo-rows", type=int, default=100_000, help="Size of the synthetic geotargets CSV")
+    parser.add_argument("--mode", choices=MODES, help="Run a single mode in-process")
+    parser.add_argument("--check", action="store_true", help="Assert identical output before timing")
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.rows[0], args.csv, args.cache_dir)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "geotargets.csv")
+        cache_dir = os.path.join(tmp, "cache")
+        write_synthetic_csv(csv_path, args.geo_rows)
+
+        if args.check:
+            check_parity(load_index(csv_path, cache_dir), csv_path)
+
+        for rows in args.rows:
+            for mode in MODES:
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_geo_enrichment", "--mode", mode,
+                     "--rows", str(rows), "--csv", csv_path, "--cache-dir", cache_dir],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                print(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
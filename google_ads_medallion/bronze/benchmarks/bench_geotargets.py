@@ -0,0 +1,130 @@
+"""
+  Startup cost of the geotarget lookups used by the location reports: the
+  old per-process CSV parse into two dicts ("csv_dicts") against the compiled
+  GeoTargetIndex, both on first compile ("index_cold") and when the cached
+  arrays are only memory-mapped ("index_warm"). Each mode runs in its own
+  subprocess and resolves the same batch of ids, so time and RSS include a
+  first lookup.
+
+  Without --csv a synthetic geotargets file of --rows rows is generated.
+
+  Usage (from the bronze directory):
+      python -m benchmarks.bench_geotargets --rows 100000
+      python -m benchmarks.bench_geotargets --csv geotargets-2025-04-01.csv
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+MODES = ["csv_dicts", "index_cold", "index_warm"]
+
+
+def write_synthetic_csv(path, rows, seed=42):
+    """Country → state → city rows shaped like Google's geotargets export."""
+    rng = random.Random(seed)
+    countries = [(2000 + i, f"C{i:03d}"[-2:] if i else "NA") for i in range(200)]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Criteria ID", "Name", "Canonical Name", "Parent ID", "Country Code", "Target Type", "Status"])
+        for cid, code in countries:
+            writer.writerow([cid, f"Country {cid}", f"Country {cid}", "", code, "Country", "Active"])
+        states = []
+        for i in range(max(rows // 20, 1)):
+            cid, code = rng.choice(countries)
+            sid = 20000 + i
+            states.append((sid, cid, code))
+            writer.writerow([sid, f"State {sid}", f"State {sid},Country {cid}", cid, code, "State", "Active"])
+        for i in range(rows - len(countries) - len(states)):
+            sid, cid, code = rng.choice(states)
+            city = 1_000_000 + i
+            writer.writerow([city, f"City {city}", f"City {city},State {sid},Country {cid}", sid, code, "City", "Active"])
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def sample_ids(csv_path, n=100_000, seed=7):
+    ids = pd.read_csv(csv_path, usecols=["Criteria ID"])["Criteria ID"].to_numpy()
+    return np.random.default_rng(seed).choice(ids, n)
+
+
+def run_csv_dicts(csv_path, ids):
+    # The per-process parse the location reports used to do
+    location_df = pd.read_csv(csv_path)
+    location_df.columns = location_df.columns.str.strip().str.lower().str.replace(" ", "_")
+    location_df["parent_id"] = pd.to_numeric(location_df["parent_id"], errors="coerce").astype("Int64")
+    location_df["criteria_id"] = pd.to_numeric(location_df["criteria_id"], errors="coerce").astype("Int64")
+    id_to_country_code = dict(zip(location_df["parent_id"], location_df["country_code"]))
+    id_to_city_code = dict(zip(location_df["criteria_id"], location_df["name"]))
+    del location_df
+    series = pd.Series(ids)
+    return series.map(id_to_city_code), series.map(id_to_country_code)
+
+
+def run_index(csv_path, ids, cache_dir):
+    from utils.geotargets import load_index
+    index = load_index(csv_path, cache_dir)
+    return index.names(ids), index.country_codes(ids)
+
+
+def run_mode(mode, csv_path, cache_dir):
+    ids = sample_ids(csv_path)
+    baseline_mb = peak_rss_mb()
+    started = time.perf_counter()
+    if mode == "csv_dicts":
+        run_csv_dicts(csv_path, ids)
+    else:
+        run_index(csv_path, ids, cache_dir)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "startup_rss_mb": round(peak_rss_mb() - baseline_mb, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv", help="Real geotargets CSV (default: synthetic)")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--mode", choices=MODES, help="Run a single mode in-process")
+    parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.csv, args.cache_dir)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = args.csv
+        if not csv_path:
+            csv_path = os.path.join(tmp, "geotargets.csv")
+            write_synthetic_csv(csv_path, args.rows)
+        cache_dir = os.path.join(tmp, "cache")
+
+        # index_cold compiles into cache_dir, index_warm then reuses it
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_geotargets", "--mode", mode,
+                 "--csv", csv_path, "--cache-dir", cache_dir],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            print(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+  Regression benchmark for the legacy root scripts (all_*.py) on
+  multi-batch synthetic streams.
+
+  "rebuild_per_batch" is the old location conversion loop, which rebuilt
+  the DataFrame, re-ran the id regex / lookups and rewrote the debug CSV
+  after every batch (O(batches²)). "incremental" is every legacy get_*
+  function as it is now, on stream_frames.StreamFrameBuilder. Each stream
+  size is timed per function; per-row cost must stay flat as the batch
+  count grows, otherwise the run exits non-zero.
+
+  Usage (from the bronze directory):
+      python -m benchmarks.bench_legacy_streams --batches 5 10 20 40
+      python -m benchmarks.bench_legacy_streams --check
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.fakes import COUNTRY_IDS, GEO_TARGET_IDS, FakeGoogleAdsService
+
+# The legacy scripts live at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+import all_age  # noqa: E402
+import all_gender  # noqa: E402
+import all_location  # noqa: E402
+import all_wr_main  # noqa: E402
+
+ID_TO_COUNTRY_CODE = {country_id: f"C{n}" for n, country_id in enumerate(COUNTRY_IDS)}
+ID_TO_CITY_CODE = {city_id: f"City {city_id}" for city_id in GEO_TARGET_IDS}
+
+FUNCTIONS = {
+    "all_wr_main.get_device_data": all_wr_main.get_device_data,
+    "all_wr_main.get_conversion_data": all_wr_main.get_conversion_data,
+    "all_age.get_age_range_data": all_age.get_age_range_data,
+    "all_age.get_conversion_data": all_age.get_conversion_data,
+    "all_gender.get_gender_data": all_gender.get_gender_data,
+    "all_gender.get_gender_conversion_data": all_gender.get_gender_conversion_data,
+    "all_location.get_location_data":
+        lambda svc, acc_id: all_location.get_location_data(svc, acc_id, ID_TO_COUNTRY_CODE, ID_TO_CITY_CODE),
+    "all_location.get_location_conversions":
+        lambda svc, acc_id: all_location.get_location_conversions(svc, acc_id, ID_TO_COUNTRY_CODE, ID_TO_CITY_CODE),
+}
+
+
+def rebuild_per_batch(ga_service, customer_id, csv_path):
+    # The pre-builder get_location_conversions body, DataFrame work inside the batch loop
+    stream = ga_service.search_stream(customer_id=customer_id, query="user_location_view")
+    conversion_data = []
+    for batch in stream:
+        for row in batch.results:
+            conversion_data.append({
+                "resource_name": row.user_location_view.resource_name,
+                "country_criterion_id": row.user_location_view.country_criterion_id,
+                "targeting_location": row.user_location_view.targeting_location,
+                "campaign_id": row.campaign.id,
+                "campaign_name": row.campaign.name,
+                "advertising_channel_type": row.campaign.advertising_channel_type,
+                "ad_group_id": row.ad_group.id,
+                "ad_group_name": row.ad_group.name,
+                "geo_target_city": row.segments.geo_target_city,
+                "geo_target_province": row.segments.geo_target_province,
+                "date": row.segments.date,
+                "all_conversions": row.metrics.all_conversions,
+                "all_conversions_value": row.metrics.all_conversions_value,
+                "conversion_action_name": row.segments.conversion_action_name
+            })
+        df = pd.DataFrame(conversion_data)
+        df["country_criterion_id"] = pd.to_numeric(df["country_criterion_id"], errors="coerce").astype("Int64")
+        df["get_target_city"] = df["geo_target_city"].astype(str).str.extract(r'(\d+)').astype("Int64")
+        df["country_code"] = df["country_criterion_id"].map(ID_TO_COUNTRY_CODE)
+        df["geo_target_city"] = df["get_target_city"].map(ID_TO_CITY_CODE)
+        df.to_csv(csv_path, index=False)
+    return df
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    df = fn(*args)
+    return df, time.perf_counter() - started
+
+
+def check_parity(batch_size):
+    svc = FakeGoogleAdsService(accounts=1, rows_per_account=batch_size * 5, batch_size=batch_size)
+    with tempfile.TemporaryDirectory() as tmp:
+        expected = rebuild_per_batch(svc, "1", os.path.join(tmp, "out.csv"))
+    got = FUNCTIONS["all_location.get_location_conversions"](svc, "1")
+    pd.testing.assert_frame_equal(expected, got, check_dtype=False)
+    print(f"✅ Parity: rebuild_per_batch == incremental on {len(got)} rows in 5 batches")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batches", type=int, nargs="+", default=[5, 10, 20, 40])
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    parser.add_argument("--max-growth", type=float, default=2.0,
+                        help="Fail when per-row time at the most batches exceeds this multiple of the fewest")
+    parser.add_argument("--check", action="store_true", help="Assert identical location output first")
+    args = parser.parse_args()
+
+    if args.check:
+        check_parity(args.batch_size)
+
+    per_row = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for batches in sorted(args.batches):
+            rows = batches * args.batch_size
+            svc = FakeGoogleAdsService(accounts=1, rows_per_account=rows, batch_size=args.batch_size)
+            runs = {"rebuild_per_batch": lambda: rebuild_per_batch(svc, "1", os.path.join(tmp, "out.csv"))}
+            runs.update({name: (lambda fn=fn: fn(svc, "1")) for name, fn in FUNCTIONS.items()})
+            for name, run in runs.items():
+                df, elapsed = timed(run)
+                per_row.setdefault(name, []).append(elapsed / rows)
+                print(json.dumps({"function": name, "batches": batches, "rows": len(df),
+                                  "seconds": round(elapsed, 3)}))
+
+    regressions = []
+    for name, costs in per_row.items():
+        growth = costs[-1] / costs[0]
+        print(f"{name}: per-row time ×{growth:.1f} from {min(args.batches)} to {max(args.batches)} batches")
+        if name != "rebuild_per_batch" and growth > args.max_growth:
+            regressions.append(name)
+
+    if regressions:
+        raise SystemExit(f"Per-row cost grows with batch count (quadratic loop?): {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+  Compares the client-side cost of the two bronze load backends on a
+  synthetic age_metrics frame: what pandas_gbq.to_gbq serializes before its
+  load job ("pandas_gbq") against utils.bigquery_loader's explicit-schema
+  Parquet file ("parquet"). The BigQuery client is real but never reaches
+  the network: load_table_from_file is patched to measure and drop the
+  payload, so the numbers are serialization time and bytes uploaded.
+
+  Usage (from the bronze directory):
+      python -m benchmarks.bench_load --rows 500000
+"""
+import argparse
+import time
+from unittest import mock
+
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import bigquery
+from pandas_gbq import load as gbq_load
+from pandas_gbq import gbq
+
+from age_metrics import AGE_FIELDS
+from benchmarks.fakes import make_stream
+from utils.bigquery_loader import write_frame
+from utils.row_decoder import decode_stream
+
+TABLE_ID = "bench.bronze.age_metrics"
+
+
+def make_frame(rows):
+    df = decode_stream(make_stream(rows), AGE_FIELDS, raw=True)
+    df["account_id"] = "1234567890"
+    df["account_name"] = "Bench account"
+    return df
+
+
+def upload_recorder():
+    """Patched load_table_from_file: drains the payload and counts its bytes."""
+    uploads = []
+
+    def load_table_from_file(file_obj, destination, *args, **kwargs):
+        uploads.append(len(file_obj.read()))
+        return mock.Mock()
+
+    return uploads, load_table_from_file
+
+
+def load_pandas_gbq(client, df):
+    # The same steps to_gbq takes after resolving credentials
+    table_schema = gbq._generate_bq_schema(df)
+    gbq_load.load_parquet(
+        client, df, bigquery.TableReference.from_string(TABLE_ID),
+        write_disposition="WRITE_APPEND", location=None, schema=table_schema,
+    )
+
+
+def load_parquet(client, df):
+    write_frame(client, df, TABLE_ID, if_exists="append", backend="parquet")
+
+
+BACKENDS = {"pandas_gbq": load_pandas_gbq, "parquet": load_parquet}
+
+
+def run_backend(backend, df, repeats):
+    client = bigquery.Client(project="bench", credentials=AnonymousCredentials())
+    uploads, recorder = upload_recorder()
+    with mock.patch.object(client, "load_table_from_file", side_effect=recorder):
+        started = time.perf_counter()
+        for _ in range(repeats):
+            BACKENDS[backend](client, df)
+        elapsed = (time.perf_counter() - started) / repeats
+
+    return {
+        "backend": backend,
+        "rows": len(df),
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(len(df) / elapsed),
+        "bytes_uploaded": uploads[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    for backend in BACKENDS:
+        print(run_backend(backend, df, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+  Offline regression suite for every extraction path, on the synthetic
+  Google Ads stream from benchmarks.fakes (no API, no BigQuery):
+
+    <report>.extract     each bronze report's extract_account (its get_*
+                         functions, decoding, enrichment) over every account
+    <report>.main        the report module's main(): account listing, the
+                         worker pool and extract_and_load, loader mocked
+    all_*.get_*          each legacy script's get_* function
+    all_*.main           each legacy script's main(), BigQuery mocked
+
+  Every case runs in its own subprocess so peak RSS is its own, and reports
+  rows, rows/sec, peak RSS and, for bronze cases, self seconds per stage
+  from utils.instrumentation (api, decode, enrich, extract, ...). Streams
+  are built before timing starts.
+
+  --replay DIR swaps the synthetic stream for responses recorded with
+  GOOGLE_ADS_TRANSPORT=record (utils.ads_fixtures), for the bronze cases
+  only: the legacy scripts issue their own queries, which are not
+  recorded. Record and replay with the same date window.
+
+  --save-baseline writes the results; --baseline compares a run against
+  them and exits non-zero when a case's rows/sec drops, or its peak RSS
+  grows, by more than --max-regression. Compare baselines taken on the
+  same machine with the same sizes.
+
+  Usage (from the bronze directory):
+      python -m benchmarks.bench_suite --save-baseline bench_baseline.json
+      python -m benchmarks.bench_suite --baseline bench_baseline.json --max-regression 0.2
+      python -m benchmarks.bench_suite --cases "age_*" "all_age.*" --rows 50000 --campaigns 500
+      python -m benchmarks.bench_suite --replay .google_ads_fixtures --cases "*.extract"
+"""
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from benchmarks.bench_geotargets import peak_rss_mb, write_synthetic_csv
+from benchmarks.bench_legacy_streams import FUNCTIONS as LEGACY_FUNCTIONS
+from benchmarks.bench_legacy_streams import ID_TO_CITY_CODE, ID_TO_COUNTRY_CODE
+from benchmarks.bench_legacy_streams import all_age, all_gender, all_location, all_wr_main
+from benchmarks.fakes import FakeGoogleAdsClient, FakeGoogleAdsService
+from run_bronze import REPORTS
+from utils import dimensions, extraction_runner, geotargets, google_ads_client
+from utils.ads_fixtures import ReplayService
+from utils.instrumentation import reset_spans, run_summary
+
+LEGACY_SCRIPTS = {
+    "all_wr_main": all_wr_main,
+    "all_age": all_age,
+    "all_gender": all_gender,
+    "all_location": all_location,
+}
+
+CASES = (
+    [f"{name}.extract" for name in REPORTS]
+    + [f"{name}.main" for name in REPORTS]
+    + list(LEGACY_FUNCTIONS)
+    + [f"{name}.main" for name in LEGACY_SCRIPTS]
+)
+
+
+def use_synthetic_geotargets(tmp):
+    # Big enough that the fake stream's city ids (1000010, 1023191, ...) resolve
+    csv_path = os.path.join(tmp, "geotargets.csv")
+    write_synthetic_csv(csv_path, 50_000)
+    geotargets._index = geotargets.load_index(csv_path, os.path.join(tmp, "cache"))
+
+
+def accounts_of(service):
+    if isinstance(service, ReplayService):
+        return [{"customer_id": customer_id, "name": customer_id} for customer_id in service.customer_ids()]
+    return [{"customer_id": str(1_000_000_000 + n), "name": f"Account {n}"} for n in range(service.accounts)]
+
+
+def run_bronze_extract(name, service):
+    module = REPORTS[name]
+    with mock.patch.object(module, "get_ads_service", return_value=service):
+        return sum(len(module.extract_account(acc)) for acc in accounts_of(service))
+
+
+def run_bronze_main(name, service):
+    loaded = []
+    google_ads_client.reset_client()
+    with mock.patch.object(google_ads_client.GoogleAdsClient, "load_from_dict",
+                           return_value=FakeGoogleAdsClient(service)), \
+         mock.patch.object(google_ads_client, "BRONZE_ACCOUNT_CACHE", ""), \
+         mock.patch.object(extraction_runner, "load_to_bigquery",
+                           side_effect=lambda df, *args, **kwargs: loaded.append(len(df))), \
+         mock.patch.object(extraction_runner, "load_chunks_to_bigquery",
+                           side_effect=lambda chunks, *args, **kwargs: loaded.append(sum(map(len, chunks)))), \
+         mock.patch.object(extraction_runner, "save_watermark"), \
+         mock.patch.object(dimensions, "replace_accounts"):
+        REPORTS[name].main()
+    return sum(loaded)
+
+
+def run_legacy_function(name, service):
+    fn = LEGACY_FUNCTIONS[name]
+    return sum(len(fn(service, acc["customer_id"])) for acc in accounts_of(service))
+
+
+def run_legacy_main(name, service):
+    module = LEGACY_SCRIPTS[name]
+    loaded = []
+    patches = [
+        mock.patch.object(module.GoogleAdsClient, "load_from_dict", return_value=FakeGoogleAdsClient(service)),
+        mock.patch.object(module.service_account.Credentials, "from_service_account_file"),
+        mock.patch.object(module.bigquery, "Client"),
+        mock.patch.object(module, "to_gbq", side_effect=lambda df, *args, **kwargs: loaded.append(len(df))),
+    ]
+    if module is all_location:
+        patches.append(mock.patch.object(module, "load_geo_mappings",
+                                         return_value=(ID_TO_COUNTRY_CODE, ID_TO_CITY_CODE)))
+    with contextlib.ExitStack() as stack, contextlib.redirect_stdout(io.StringIO()):
+        for patch in patches:
+            stack.enter_context(patch)
+        module.main()
+    return sum(loaded)
+
+
+def run_case(case, args):
+    """Runs one case in this process and returns its result row."""
+    report, _, kind = case.rpartition(".")
+    if report in REPORTS:
+        runner = run_bronze_extract if kind == "extract" else run_bronze_main
+        target = report
+    elif case in LEGACY_FUNCTIONS:
+        runner, target = run_legacy_function, case
+    else:
+        runner, target = run_legacy_main, report
+
+    if args.replay:
+        service = ReplayService(args.replay)
+    else:
+        service = FakeGoogleAdsService(
+            accounts=args.accounts,
+            rows_per_account=args.rows,
+            batch_size=args.batch_size,
+            campaigns=args.campaigns,
+            ad_groups_per_campaign=args.ad_groups_per_campaign,
+            conversion_actions=args.conversion_actions,
+        )
+    with tempfile.TemporaryDirectory() as tmp:
+        use_synthetic_geotargets(tmp)
+        baseline_mb = peak_rss_mb()
+
+        best = None
+        for _ in range(args.repeat):
+            reset_spans()
+            started = time.perf_counter()
+            rows = runner(target, service)
+            elapsed = time.perf_counter() - started
+            if best is None or elapsed < best[1]:
+                best = (rows, elapsed, run_summary()["stages"])
+
+    rows, elapsed, stages = best
+    return {
+        "case": case,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed) if elapsed else 0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "case_rss_mb": round(peak_rss_mb() - baseline_mb, 1),
+        "stages": {stage: round(values["self_seconds"], 3) for stage, values in sorted(stages.items())},
+    }
+
+
+def compare(results, baseline, max_regression):
+    """Cases slower or bigger than the baseline by more than max_regression."""
+    regressions = []
+    for result in results:
+        before = baseline.get(result["case"])
+        if before is None:
+            continue
+        if result["rows_per_sec"] < before["rows_per_sec"] * (1 - max_regression):
+            regressions.append(f"{result['case']}: {before['rows_per_sec']} -> {result['rows_per_sec']} rows/s")
+        if result["case_rss_mb"] > max(before["case_rss_mb"], 1.0) * (1 + max_regression):
+            regressions.append(f"{result['case']}: {before['case_rss_mb']} -> {result['case_rss_mb']} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="+", default=["*"], help="Case names or globs (default: all)")
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=20_000, help="Rows per account and query")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--campaigns", type=int, default=20)
+    parser.add_argument("--ad-groups-per-campaign", type=int, default=5)
+    parser.add_argument("--conversion-actions", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case, the fastest is kept")
+    parser.add_argument("--replay", help="Fixtures directory to replay instead of the synthetic stream")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed rows/sec drop and peak RSS growth vs the baseline (fraction)")
+    parser.add_argument("--save-baseline", help="Write this run's results JSON here")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args)))
+        return
+
+    cases = [case for case in CASES if case.rpartition(".")[0] in REPORTS] if args.replay else CASES
+    selected = [case for case in cases if any(fnmatch.fnmatch(case, pattern) for pattern in args.cases)]
+    passthrough = [
+        f"--accounts={args.accounts}", f"--rows={args.rows}", f"--batch-size={args.batch_size}",
+        f"--campaigns={args.campaigns}", f"--ad-groups-per-campaign={args.ad_groups_per_campaign}",
+        f"--conversion-actions={args.conversion_actions}", f"--repeat={args.repeat}",
+    ] + ([f"--replay={args.replay}"] if args.replay else [])
+
+    results = []
+    for case in selected:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_suite", "--case", case, *passthrough],
+            capture_output=True, text=True,
+        )
+        if out.returncode:
+            raise SystemExit(f"{case} failed:\n{out.stderr[-2000:]}")
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(json.dumps(result))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({result["case"]: result for result in results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            raise SystemExit("Regressions beyond the threshold:\n  " + "\n  ".join(regressions))
+        print(f"✅ {len(results)} cases within {args.max_regression:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+  End-to-end check of the retry path (utils.retry) on the fake API: runs
+  run_bronze.run() for every report once against FakeGoogleAdsService and
+  once against FlakyGoogleAdsService, which fails every --fail-every-th
+  search_stream with RESOURCE_EXHAUSTED (--mid-stream: after its first
+  batch), with BigQuery mocked out.
+
+  Exits non-zero unless
+    - both runs load exactly the same rows into every table,
+    - no report failed and no call gave up,
+    - retries == the failures the fake injected, all RESOURCE_EXHAUSTED.
+
+  Usage (from the bronze directory):
+      python -m benchmarks.check_retries
+      python -m benchmarks.check_retries --fail-every 3 --mid-stream --accounts 20
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# Fast backoff, no rate limit, and enough attempts that a job landing on
+# several failing calls in a row still gets through; read by utils.retry
+# at import time
+os.environ.setdefault("BRONZE_RETRY_ATTEMPTS", "10")
+os.environ.setdefault("BRONZE_RETRY_BASE_SECONDS", "0.01")
+os.environ.setdefault("BRONZE_API_QPS", "0")
+
+import run_bronze
+from benchmarks.bench_suite import use_synthetic_geotargets
+from benchmarks.fakes import FakeGoogleAdsClient, FakeGoogleAdsService, FlakyGoogleAdsService, google_ads_exception
+from utils import dimensions, google_ads_client
+from utils.retry import retry_stats
+
+
+def run_against(service):
+    """Runs every report against service; returns (failed, {table: sorted frame}, retry_stats)."""
+    loaded = {}
+    google_ads_client.reset_client()
+    with contextlib.ExitStack() as stack:
+        # Tables named after their reports, whatever BIGQUERY_BRONZE_* says
+        for name, module in run_bronze.REPORTS.items():
+            stack.enter_context(mock.patch.object(module, "TABLE_ID", name))
+        failed = _run(service, loaded)
+    frames = {
+        table: df.astype(str).sort_values(list(df.columns)).reset_index(drop=True)
+        for table, df in loaded.items()
+    }
+    return failed, frames, retry_stats()
+
+
+def _run(service, loaded):
+    with mock.patch.object(google_ads_client.GoogleAdsClient, "load_from_dict",
+                           return_value=FakeGoogleAdsClient(service)), \
+         mock.patch.object(google_ads_client, "BRONZE_ACCOUNT_CACHE", ""), \
+         mock.patch.object(run_bronze, "load_to_bigquery",
+                           side_effect=lambda df, table, **kwargs: loaded.__setitem__(table, df)), \
+         mock.patch.object(run_bronze, "save_watermark"), \
+         mock.patch.object(run_bronze, "account_spill", return_value=None), \
+         mock.patch.object(dimensions, "replace_accounts"):
+        return run_bronze.run(streaming=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=6)
+    parser.add_argument("--rows", type=int, default=2_000, help="Rows per account and query")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--fail-every", type=int, default=3, help="Fail every n-th search_stream call")
+    parser.add_argument("--mid-stream", action="store_true", help="Fail after the first batch of a stream")
+    args = parser.parse_args()
+
+    sizes = dict(accounts=args.accounts, rows_per_account=args.rows, batch_size=args.batch_size)
+    with tempfile.TemporaryDirectory() as tmp:
+        use_synthetic_geotargets(tmp)
+        clean_failed, expected, _ = run_against(FakeGoogleAdsService(**sizes))
+        flaky = FlakyGoogleAdsService(
+            fail_every=args.fail_every, mid_stream=args.mid_stream,
+            error=google_ads_exception(retry_delay=0.01), **sizes,
+        )
+        failed, actual, stats = run_against(flaky)
+
+    problems = []
+    if clean_failed or failed:
+        problems.append(f"failed reports: clean run {clean_failed}, flaky run {failed}")
+    if sorted(actual) != sorted(expected):
+        problems.append(f"tables differ: {sorted(set(actual) ^ set(expected))}")
+    for table, df in expected.items():
+        if table in actual and not df.equals(actual[table]):
+            problems.append(f"{table}: {len(actual[table])} rows loaded, {len(df)} expected")
+    if stats["gave_up"]:
+        problems.append(f"{int(stats['gave_up'])} calls gave up")
+    if stats["retries"] != flaky.failures or stats["retries_by_code"] != {"RESOURCE_EXHAUSTED": flaky.failures}:
+        problems.append(f"{int(stats['retries'])} retries {stats['retries_by_code']} "
+                        f"for {flaky.failures} injected failures")
+    if not flaky.failures:
+        problems.append("no failures were injected")
+
+    rows = sum(len(df) for df in actual.values())
+    print(f"{flaky.search_stream_calls} search_stream calls, {flaky.failures} injected failures, "
+          f"{int(stats['retries'])} retries, {rows} rows in {len(actual)} tables")
+    if problems:
+        raise SystemExit("❌ Retry check failed:\n  " + "\n  ".join(problems))
+    print("✅ Every row loaded and every injected failure was retried once")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
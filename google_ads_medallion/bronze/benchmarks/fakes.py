@@ -0,0 +1,186 @@
+import random
+import threading
+from datetime import timedelta
+
+import grpc
+from google.ads.googleads.client import GoogleAdsClient
+from google.ads.googleads.errors import GoogleAdsException
+
+
+# ========================== #
+#   SYNTHETIC ADS RESPONSES  #
+# ========================== #
+# A credential-less client is only used to reach the generated proto types
+# and enums; it never opens a channel.
+_types_client = GoogleAdsClient(credentials=None, use_proto_plus=True)
+GoogleAdsRow = type(_types_client.get_type("GoogleAdsRow"))
+SearchGoogleAdsStreamResponse = type(_types_client.get_type("SearchGoogleAdsStreamResponse"))
+GoogleAdsFailure = type(_types_client.get_type("GoogleAdsFailure"))
+enums = _types_client.enums
+
+AGE_RANGES = [503001, 503002, 503003, 503004, 503005, 503006, 503999]
+GENDERS = [10, 11, 20]
+DEVICES = [enums.DeviceEnum.MOBILE, enums.DeviceEnum.DESKTOP, enums.DeviceEnum.TABLET]
+CHANNEL_TYPES = [enums.AdvertisingChannelTypeEnum.SEARCH, enums.AdvertisingChannelTypeEnum.DISPLAY,
+                 enums.AdvertisingChannelTypeEnum.VIDEO]
+GEO_TARGET_IDS = [1000010, 1000011, 1023191, 9061285, 1014044]
+COUNTRY_IDS = [2840, 2124, 2826]
+
+
+def make_row(i, rng, criterion="age_range", campaigns=20, ad_groups_per_campaign=5, conversion_actions=4):
+    """
+      Builds one GoogleAdsRow that fills every field any bronze report reads,
+      so the same synthetic stream can feed all eight extractors.
+
+      age_range and gender share the ad_group_criterion oneof, so only the
+      one named by `criterion` is set.
+    """
+    campaign_id = 1_000_000 + i % campaigns
+    ad_group_id = campaign_id * 100 + (i // campaigns) % ad_groups_per_campaign
+
+    row = GoogleAdsRow()
+    row.customer.currency_code = "USD"
+    row.campaign.id = campaign_id
+    row.campaign.name = f"Campaign {campaign_id}"
+    row.campaign.advertising_channel_type = CHANNEL_TYPES[campaign_id % len(CHANNEL_TYPES)]
+    row.ad_group.id = ad_group_id
+    row.ad_group.name = f"Ad group {ad_group_id}"
+    if criterion == "gender":
+        row.ad_group_criterion.gender.type_ = GENDERS[i % len(GENDERS)]
+    else:
+        row.ad_group_criterion.age_range.type_ = AGE_RANGES[i % len(AGE_RANGES)]
+    row.age_range_view.resource_name = f"customers/1/ageRangeViews/{ad_group_id}~{AGE_RANGES[i % len(AGE_RANGES)]}"
+    row.gender_view.resource_name = f"customers/1/genderViews/{ad_group_id}~{GENDERS[i % len(GENDERS)]}"
+    row.user_location_view.resource_name = f"customers/1/userLocationViews/{COUNTRY_IDS[i % len(COUNTRY_IDS)]}~true"
+    row.user_location_view.country_criterion_id = COUNTRY_IDS[i % len(COUNTRY_IDS)]
+    row.user_location_view.targeting_location = bool(i % 2)
+    row.segments.date = f"2025-04-{1 + i % 28:02d}"
+    row.segments.device = DEVICES[i % len(DEVICES)]
+    row.segments.conversion_action_name = f"Conversion {i % conversion_actions}"
+    row.segments.geo_target_city = f"geoTargetConstants/{GEO_TARGET_IDS[i % len(GEO_TARGET_IDS)]}"
+    row.segments.geo_target_province = f"geoTargetConstants/{21100 + i % 50}"
+    row.metrics.impressions = rng.randint(0, 10_000)
+    row.metrics.clicks = rng.randint(0, 500)
+    row.metrics.cost_micros = rng.randint(0, 50_000_000)
+    row.metrics.all_conversions = rng.random() * 10
+    row.metrics.all_conversions_value = rng.random() * 1000
+    return row
+
+
+def make_stream(rows, batch_size=10_000, seed=42, **row_options):
+    """Returns a list of SearchGoogleAdsStreamResponse batches holding `rows` rows."""
+    rng = random.Random(seed)
+    batches = []
+    for start in range(0, rows, batch_size):
+        batch = SearchGoogleAdsStreamResponse()
+        batch.results.extend(make_row(i, rng, **row_options) for i in range(start, min(start + batch_size, rows)))
+        batches.append(batch)
+    return batches
+
+
+# ========================== #
+#     FAKE GOOGLE ADS API    #
+# ========================== #
+class FakeGoogleAdsService:
+    """
+      Stand-in for the GoogleAdsService stub.
+
+      search() answers the customer_client account query, search_stream()
+      replays the same pre-built batches for every account and query
+      (gender_view queries get rows carrying a gender criterion).
+      row_options (campaigns, ad_groups_per_campaign, conversion_actions)
+      set the cardinality of the synthetic rows, see make_row.
+    """
+
+    def __init__(self, accounts=10, rows_per_account=1_000, batch_size=10_000, **row_options):
+        self.accounts = accounts
+        self.batches = make_stream(rows_per_account, batch_size, **row_options)
+        self.gender_batches = make_stream(rows_per_account, batch_size, criterion="gender", **row_options)
+        self.search_calls = 0
+        self.search_stream_calls = 0
+
+    def search(self, customer_id, query):
+        self.search_calls += 1
+        rows = []
+        for n in range(self.accounts):
+            row = GoogleAdsRow()
+            row.customer_client.client_customer = f"customers/{1_000_000_000 + n}"
+            row.customer_client.descriptive_name = f"Account {n}"
+            row.customer_client.currency_code = "USD"
+            row.customer_client.time_zone = "America/New_York"
+            row.customer_client.manager = False
+            rows.append(row)
+        return rows
+
+    def search_stream(self, customer_id, query):
+        self.search_stream_calls += 1
+        return iter(self.gender_batches if "gender_view" in query else self.batches)
+
+
+class FakeGoogleAdsClient:
+    def __init__(self, service):
+        self.service = service
+
+    def get_service(self, name, *args, **kwargs):
+        return self.service
+
+
+
+# ========================== #
+#     INJECTED API FAILURES  #
+# ========================== #
+class FakeRpcError(grpc.RpcError):
+    def __init__(self, code, details=""):
+        self._code = code
+        self._details = details
+
+    def code(self):
+        return self._code
+
+    def details(self):
+        return self._details
+
+
+def google_ads_exception(code=grpc.StatusCode.RESOURCE_EXHAUSTED, retry_delay=None):
+    """A GoogleAdsException as the client raises it, optionally with a quota retry_delay (seconds)."""
+    failure = GoogleAdsFailure()
+    error = GoogleAdsFailure.pb(failure).errors.add()
+    error.message = code.name
+    if code == grpc.StatusCode.RESOURCE_EXHAUSTED:
+        error.error_code.quota_error = 2  # RESOURCE_EXHAUSTED
+    if retry_delay is not None:
+        error.details.quota_error_details.retry_delay.FromTimedelta(timedelta(seconds=retry_delay))
+    rpc_error = FakeRpcError(code, code.name)
+    return GoogleAdsException(rpc_error, rpc_error, failure, "fake-request-id")
+
+
+class FlakyGoogleAdsService(FakeGoogleAdsService):
+    """
+      FakeGoogleAdsService whose search_stream fails every `fail_every`-th
+      call with `error` (default: RESOURCE_EXHAUSTED with a 1 s retry_delay).
+      mid_stream=True yields the first batch before raising, like a stream
+      cut off half way.
+    """
+
+    def __init__(self, fail_every=3, error=None, mid_stream=False, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_every = fail_every
+        self.error = error or google_ads_exception(retry_delay=1)
+        self.mid_stream = mid_stream
+        self.failures = 0
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def search_stream(self, customer_id, query):
+        batches = super().search_stream(customer_id, query)
+        # Own counter: the base class's += is not atomic across workers
+        with self._lock:
+            self._calls += 1
+            fail = self._calls % self.fail_every == 0
+            self.failures += fail
+        return self._failing(batches) if fail else batches
+
+    def _failing(self, batches):
+        if self.mid_stream:
+            yield next(batches)
+        raise self.error
@@ -1,12 +1,14 @@
 import os 
-import pandas as pd
 from dotenv import load_dotenv
 
-from google.ads.googleads.client import GoogleAdsClient
 
-from utils.bigquery_loader import load_to_bigquery
-from utils.google_ads_client import fetch_enabled_accounts
+from utils.extraction_runner import add_account_columns, extract_and_load
+from utils.geo_enrichment import enrich_locations
+from utils.geotargets import get_geotarget_index
+from utils.google_ads_client import fetch_enabled_accounts, get_ads_service
 from utils.logger import setup_logger
+from utils.query_planner import ReportQuery, run_query
+from utils.row_decoder import Field, decode_stream
 
 logger=setup_logger(__name__)
 
@@ -14,146 +16,88 @@ logger=setup_logger(__name__)
 
 load_dotenv()
 
-DEVELOPER_TOKEN =os.getenv("GOOGLE_ADS_DEVELOPER_TOKEN")
-GOOGLE_ADS_LOGIN_CUSTOMER_ID = os.getenv("GOOGLE_ADS_LOGIN_CUSTOMER_ID")
-JSON_KEY_FILE_PATH = os.getenv("GOOGLE_ADS_JSON_KEY_FILE_PATH")
-GOOGLE_ADS_IMPERSONATED_EMAIL = os.getenv("GOOGLE_ADS_IMPERSONATED_EMAIL")
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
 TABLE_ID = f"{GCP_PROJECT_ID}.{os.getenv('BIGQUERY_BRONZE_DATASET')}.{os.getenv('BIGQUERY_BRONZE_MAIN_CAMPAIGN_LOCATION_METRICS')}"
 
 
 
 
-def get_location_data(client, customer_id, id_to_country_code, id_to_city_code):
-    ga_service =client.get_service("GoogleAdsService")
-    query = """
-        SELECT user_location_view.country_criterion_id,
-               user_location_view.resource_name,
-               user_location_view.targeting_location,
-               ad_group.id, 
-               ad_group.name,
-               campaign.id,
-               campaign.name,
-               campaign.advertising_channel_type,
-               metrics.all_conversions,
-               metrics.all_conversions_value,
-               metrics.clicks,
-               metrics.cost_micros, 
-               metrics.impressions, 
-               segments.geo_target_city, 
-               segments.geo_target_province, 
-               segments.date 
-        FROM user_location_view
-        WHERE segments.date DURING LAST_30_DAYS 
-        
-
-    """
-
-    stream = ga_service.search_stream(
-        customer_id=customer_id, query=query
-    )
-
-    location_data=[]
-    for batch in stream:
-        for row in batch.results:
-            location_data.append({
-                "resource_name": row.user_location_view.resource_name,
-                "country_criterion_id": row.user_location_view.country_criterion_id,
-                "targeting_location": row.user_location_view.targeting_location,
-                "campaign_id": row.campaign.id,
-                "campaign_name": row.campaign.name,
-                "advertising_channel_type": row.campaign.advertising_channel_type,
-                "ad_group_id": row.ad_group.id,
-                "ad_group_name": row.ad_group.name,
-                "geo_target_city": row.segments.geo_target_city,
-                "geo_target_province": row.segments.geo_target_province,
-                "date": row.segments.date,
-                "all_conversions": row.metrics.all_conversions,
-                "all_conversions_value": row.metrics.all_conversions_value,
-                "clicks": row.metrics.clicks,
-                "cost_micros": row.metrics.cost_micros,
-                "impressions": row.metrics.impressions
-            })
-        
-        
-    df=pd.DataFrame(location_data)
-    df["country_criterion_id"] = pd.to_numeric(df["country_criterion_id"], errors="coerce").astype("Int64")
-    #Pull only integer value from like this geoTargetConstants/1000010
-    df["get_target_city"] = df["geo_target_city"].astype(str).str.extract(r'(\d+)').astype("Int64")
-
-
-        
-
-
-    df["country_code"] = df["country_criterion_id"].map(id_to_country_code)
-    df["geo_target_city"] = df["get_target_city"].map(id_to_city_code)
+LOCATION_FIELDS = [
+    Field("resource_name", "user_location_view.resource_name"),
+    Field("country_criterion_id", "user_location_view.country_criterion_id", "int64"),
+    Field("targeting_location", "user_location_view.targeting_location"),
+    Field("campaign_id", "campaign.id", "int64"),
+    Field("ad_group_id", "ad_group.id", "int64"),
+    Field("geo_target_city", "segments.geo_target_city"),
+    Field("geo_target_province", "segments.geo_target_province"),
+    Field("date", "segments.date", "date"),
+    Field("all_conversions", "metrics.all_conversions", "float64"),
+    Field("all_conversions_value", "metrics.all_conversions_value", "float64"),
+    Field("clicks", "metrics.clicks", "int64"),
+    Field("cost_micros", "metrics.cost_micros", "int64"),
+    Field("impressions", "metrics.impressions", "int64"),
+]
+
+
+LOCATION_QUERY = ReportQuery(
+    report="location_metrics",
+    resource="user_location_view",
+    attributes=(
+        "user_location_view.country_criterion_id",
+        "user_location_view.resource_name",
+        "user_location_view.targeting_location",
+        "ad_group.id",
+        "campaign.id",
+    ),
+    segments=(
+        "segments.geo_target_city",
+        "segments.geo_target_province",
+        "segments.date",
+    ),
+    metrics=(
+        "metrics.all_conversions",
+        "metrics.all_conversions_value",
+        "metrics.clicks",
+        "metrics.cost_micros",
+        "metrics.impressions",
+    ),
+)
+
+
+def get_location_data(ga_service, customer_id, geo_index, window=None):
+    stream = run_query(ga_service, customer_id, LOCATION_QUERY, window)
+
+    df=decode_stream(stream, LOCATION_FIELDS)
+    enrich_locations(df, geo_index)
   
    
 
     return df   
     
 
-# Preload geo mapping
-location_df = pd.read_csv("geotargets-2025-04-01.csv")
-location_df.columns = location_df.columns.str.strip().str.lower().str.replace(" ", "_")
-location_df["parent_id"] = pd.to_numeric(location_df["parent_id"], errors="coerce").astype("Int64")
-location_df["criteria_id"] = pd.to_numeric(location_df["criteria_id"], errors="coerce").astype("Int64")
-id_to_country_code = dict(zip(location_df["parent_id"], location_df["country_code"]))
-id_to_city_code = dict(zip(location_df["criteria_id"], location_df["name"]))
+def extract_account(acc, window=None):
+    acc_id=acc["customer_id"]
+    acc_name=acc["name"]
+    logger.info("Processing account: %s (%s)", acc_name, acc_id)
 
+    ga_service = get_ads_service()
+    geo_index = get_geotarget_index()
+    df_location = get_location_data(ga_service, acc_id, geo_index, window)
 
-def main():
-    accounts=fetch_enabled_accounts()
-    final_dataframes=[]
-
-    for acc in accounts:
-        acc_id=acc["customer_id"]
-        acc_name=acc["name"]
-        logger.info(f"Processing account: {acc_name} ({acc_id})")
-
-        try:
-            client =GoogleAdsClient.load_from_dict({
-                'client_customer_id': acc_id,
-                'developer_token': DEVELOPER_TOKEN,
-                'login_customer_id': GOOGLE_ADS_LOGIN_CUSTOMER_ID,
-                'json_key_file_path': JSON_KEY_FILE_PATH,
-                'impersonated_email': GOOGLE_ADS_IMPERSONATED_EMAIL,
-                'use_proto_plus': True
-            })
-
-            df_location = pd.DataFrame(get_location_data(client, acc_id, id_to_country_code, id_to_city_code))
-            
-
-         
-
-            if df_location.empty:
-                logger.warning(f"No location data found for account {acc_name} ({acc_id}).")
-                continue
-
+    if df_location.empty:
+        logger.warning("No location data found for account %s (%s).", acc_name, acc_id)
+        return df_location
 
+    add_account_columns(df_location, acc_id, acc_name)
+    logger.info("Final DataFrame shape: %s", df_location.shape)
+    return df_location
 
 
-                       
-            
-            df_location["account_id"] = acc_id
-            df_location["account_name"] = acc_name 
-            logger.info(f"Final DataFrame shape: {df_location.shape}")
-            final_dataframes.append(df_location)
-        except Exception as e:
-            logger.error(f"Error processing account {acc_name} ({acc_id}): {e}")
-
-    if not final_dataframes:
-        logger.warning(f"No data fetched from any account.")
-
-    #After concatenation all Data frames
-    df_all = pd.concat(final_dataframes, ignore_index=True)
-
-
-
-    load_to_bigquery(df_all,TABLE_ID)
+def main():
+    accounts = fetch_enabled_accounts()
+    extract_and_load(accounts, extract_account, TABLE_ID)
 
 
-    
 if __name__ == "__main__":                                                                   
     main()   
 
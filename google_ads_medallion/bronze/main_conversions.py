@@ -2,22 +2,16 @@
 #    CONFIGURATION SECTION   #
 # ========================== #
 import os
-import pandas as pd
 from dotenv import load_dotenv
-from google.ads.googleads.client import GoogleAdsClient
 
-from utils.bigquery_loader import load_to_bigquery
-from utils.google_ads_client import fetch_enabled_accounts
+from utils.extraction_runner import add_account_columns, extract_and_load
+from utils.google_ads_client import fetch_enabled_accounts, get_ads_service
 from utils.logger import setup_logger
+from utils.query_planner import ReportQuery, run_query
+from utils.row_decoder import Field, decode_stream, enum_name
 # ✅ Set Google Cloud credentials
 # os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "googleads-bigquery.json"
 load_dotenv()
-DEVELOPER_TOKEN = os.getenv('GOOGLE_ADS_DEVELOPER_TOKEN')
-GOOGLE_ADS_LOGIN_CUSTOMER_ID = os.getenv('GOOGLE_ADS_LOGIN_CUSTOMER_ID')
-JSON_KEY_FILE_PATH = os.getenv('GOOGLE_ADS_JSON_KEY_FILE_PATH')
-
-GOOGLE_ADS_IMPERSONATED_EMAIL = os.getenv('GOOGLE_ADS_IMPERSONATED_EMAIL')
-
 
 
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
@@ -30,33 +24,42 @@ logger=setup_logger(__name__)
 # ========================== #
 #   CONVERSION DATA FUNCTION #
 # ========================== #
-def get_conversion_data(client, customer_id):
-    ga_service = client.get_service("GoogleAdsService")
-    query = """
-        SELECT campaign.id, campaign.name, campaign.advertising_channel_type,
-               segments.device, segments.date,
-               segments.conversion_action_name,
-               metrics.all_conversions, metrics.all_conversions_value,customer.currency_code
-        FROM campaign
-        WHERE segments.date DURING LAST_30_DAYS
-        AND segments.conversion_action_name IS NOT NULL
-    """
-    stream = ga_service.search_stream(customer_id=customer_id, query=query)
-    conversion_data = []
-    for batch in stream:
-        for row in batch.results:
-            conversion_data.append({
-                'campaign_id': row.campaign.id,
-                'campaign_name': row.campaign.name,
-                'campaign_type': row.campaign.advertising_channel_type.name,
-                'device': row.segments.device.name if row.segments.device else 'Unknown',
-                'date': row.segments.date,
-                'conversion_name': row.segments.conversion_action_name,
-                'all_conversions': float(row.metrics.all_conversions),
-                'all_conversions_value': float(row.metrics.all_conversions_value),
-                'currency_code': row.customer.currency_code
-            })
-    return conversion_data
+CONVERSION_FIELDS = [
+    Field('campaign_id', 'campaign.id', 'int64'),
+    Field('device', 'segments.device', 'category', transform=enum_name),
+    Field('date', 'segments.date', 'date'),
+    Field('conversion_name', 'segments.conversion_action_name', 'category'),
+    Field('all_conversions', 'metrics.all_conversions', 'float64'),
+    Field('all_conversions_value', 'metrics.all_conversions_value', 'float64'),
+    Field('currency_code', 'customer.currency_code', 'category'),
+]
+
+
+CONVERSION_QUERY = ReportQuery(
+    report="main_conversions",
+    resource="campaign",
+    attributes=(
+        "campaign.id",
+        "customer.currency_code",
+    ),
+    segments=(
+        "segments.device",
+        "segments.date",
+        "segments.conversion_action_name",
+    ),
+    metrics=(
+        "metrics.all_conversions",
+        "metrics.all_conversions_value",
+    ),
+    conditions=(
+        "segments.conversion_action_name IS NOT NULL",
+    ),
+)
+
+
+def get_conversion_data(ga_service, customer_id, window=None):
+    stream = run_query(ga_service, customer_id, CONVERSION_QUERY, window)
+    return decode_stream(stream, CONVERSION_FIELDS)
 
 
 
@@ -64,50 +67,27 @@ def get_conversion_data(client, customer_id):
 #         MAIN SCRIPT        #
 # ========================== #
 
-def main():
-    accounts = fetch_enabled_accounts()
-    final_dataframes = []
-
-    for acc in accounts:
-        acc_id, acc_name = acc["customer_id"], acc["name"]
-        logger.info(f"\n▶️ Processing account: {acc_id} - {acc_name}")
-
-        try:
-            client = GoogleAdsClient.load_from_dict({
-                'client_customer_id': acc_id,
-                'login_customer_id': GOOGLE_ADS_LOGIN_CUSTOMER_ID,
-                'developer_token': DEVELOPER_TOKEN,
-                'json_key_file_path': JSON_KEY_FILE_PATH,
-                'impersonated_email': GOOGLE_ADS_IMPERSONATED_EMAIL,
-                'use_proto_plus': True
-            })
+def extract_account(acc, window=None):
+    acc_id, acc_name = acc["customer_id"], acc["name"]
+    logger.info("▶️ Processing account: %s - %s", acc_id, acc_name)
 
-            
-            df_conversion = pd.DataFrame(get_conversion_data(client, acc_id))
+    ga_service = get_ads_service()
+    df_conversion = get_conversion_data(ga_service, acc_id, window)
 
-            logger.info(f"🔍 Conversion rows: {len(df_conversion)}")
+    logger.info("🔍 Conversion rows: %s", len(df_conversion))
 
-            if df_conversion.empty:
-                logger.warning(f"⚠️ No data for account {acc_id}, skipping.")
-                continue
+    if df_conversion.empty:
+        logger.warning("⚠️ No data for account %s, skipping.", acc_id)
+        return df_conversion
 
-            # Add Account ID and Name
-           
-            df_conversion["account_id"] = acc_id
-            df_conversion["account_name"] = acc_name
+    # Add Account ID and Name
+    add_account_columns(df_conversion, acc_id, acc_name)
+    return df_conversion
 
-            final_dataframes.append(df_conversion)
 
-        except Exception as e:
-            logger.error(f"❌ Error in account {acc_id}: {e}")
-
-    if not final_dataframes:
-        logger.error(f"❌ No valid data collected. Exiting.")
-        return
-
-    df_all = pd.concat(final_dataframes, ignore_index=True)
-
-    load_to_bigquery(df_all, TABLE_ID)
+def main():
+    accounts = fetch_enabled_accounts()
+    extract_and_load(accounts, extract_account, TABLE_ID)
 
 
 if __name__ == "__main__":                                                                   
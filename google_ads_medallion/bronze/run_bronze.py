@@ -0,0 +1,282 @@
+# ========================== #
+#    UNIFIED BRONZE RUNNER   #
+# ========================== #
+"""
+  Runs all bronze reports in one process: accounts are enumerated once,
+  every (report, account) extraction shares one client, one gRPC channel,
+  one geotarget mapping and one thread pool, and each report is then loaded
+  to its own table.
+
+  Reports are extracted one after another over the shared pool. Each one
+  is loaded as soon as its accounts are done, or with
+  BRONZE_STREAMING_LOAD=true each finished account is staged straight into
+  its report's table. A report that collects no rows fails the run.
+
+  Reports carry campaign / ad group ids only; each account's names and
+  channel types are fetched once per run into the campaigns and ad_groups
+  tables (see utils.dimensions) and joined back in dbt silver.
+
+  Each report extracts and replaces one date window (see
+  utils.date_window.resolve_window): the last 30 days by default, the days
+  since the table's watermark when BRONZE_WATERMARK_FILE is set, or an
+  explicit --lookback-days / --start-date / --end-date, which win over the
+  watermark. A report with failed accounts still loads the others but keeps
+  its watermark, so the next run pulls the window again.
+
+  The account list comes from the BRONZE_ACCOUNT_CACHE registry while it
+  is fresh (see utils.google_ads_client.fetch_enabled_accounts); --accounts
+  narrows a run to given customer ids, and its loads then replace only
+  those accounts' rows in the window.
+
+  Every stage (API wait, decoding, enrichment, extraction, BigQuery writes
+  and loads) is timed per report and account; the run ends with a
+  breakdown in the log, plus a JSON summary / Prometheus textfile when
+  BRONZE_RUN_SUMMARY_FILE / BRONZE_METRICS_FILE are set (see
+  utils.instrumentation).
+
+  With BRONZE_SPILL_DIR set every extracted account is spilled to Parquet
+  right away (see utils.spill), so a rerun after a crash only queries the
+  accounts that had not finished and loads the rest from disk.
+
+  Usage:
+      python run_bronze.py                                # all eight reports
+      python run_bronze.py --reports age_metrics gender_metrics
+      python run_bronze.py --lookback-days 3
+      python run_bronze.py --start-date 2025-03-01 --end-date 2025-03-31
+      python run_bronze.py --accounts 1234567890 2345678901
+      python run_bronze.py --refresh-accounts             # ignore the account registry
+      python run_bronze.py --plan                         # show the query plan only
+"""
+import argparse
+from collections import Counter, defaultdict
+from functools import partial
+
+import age_conversions
+import age_metrics
+import gender_conversions
+import gender_metrics
+import location_conversions
+import location_metrics
+import main_conversions
+import main_metrics
+from utils.bigquery_loader import StreamingLoad, load_to_bigquery
+from utils.date_window import resolve_window, save_watermark
+from utils.dimensions import DIMENSIONS, load_dimensions
+from utils.extraction_runner import BRONZE_STREAMING_LOAD, iter_job_results
+from utils.google_ads_client import fetch_enabled_accounts
+from utils.instrumentation import export_run_metrics, reset_spans, span
+from utils.logger import new_run_id, setup_logger
+from utils.query_planner import ReportQuery, describe_plan, query_stats, reset_query_stats
+from utils.response_cache import cache_stats, log_cache_stats, reset_cache_stats
+from utils.retry import log_retry_stats, reset_retry_stats, retry_stats
+from utils.row_decoder import concat_frames
+from utils.spill import account_spill
+
+logger=setup_logger(__name__)
+
+REPORTS = {
+    "main_metrics": main_metrics,
+    "main_conversions": main_conversions,
+    "age_metrics": age_metrics,
+    "age_conversions": age_conversions,
+    "gender_metrics": gender_metrics,
+    "gender_conversions": gender_conversions,
+    "location_metrics": location_metrics,
+    "location_conversions": location_conversions,
+}
+
+
+def run(report_names=None, max_workers=None, streaming=None,
+        start_date=None, end_date=None, lookback_days=None,
+        account_ids=None, refresh_accounts=False):
+    streaming = BRONZE_STREAMING_LOAD if streaming is None else streaming
+    run_id = new_run_id()
+    reports = {name: REPORTS[name] for name in (report_names or REPORTS)}
+    windows = {
+        name: resolve_window(module.TABLE_ID, start_date, end_date, lookback_days)
+        for name, module in reports.items()
+    }
+    for name, window in windows.items():
+        logger.info(f"📅 {name}: {window} ({window.days()} days)")
+
+    missing = []
+    accounts = fetch_enabled_accounts(account_ids, refresh=refresh_accounts, missing=missing)
+    account_failures = [f"account {customer_id}" for customer_id in missing]
+    if account_ids is not None and not accounts:
+        logger.error("❌ None of the selected accounts is enabled, nothing to run.")
+        export_run_metrics(run_id=run_id, failed=account_failures)
+        return account_failures
+    logger.info(f"🧭 Query plan: {describe_plan(run_plan(report_names), len(accounts))}")
+    reset_query_stats()
+    reset_retry_stats()
+    reset_cache_stats()
+    reset_spans()
+    dimension_failures = load_dimensions(accounts, max_workers)
+    spills = {name: account_spill(module.TABLE_ID, windows[name]) for name, module in reports.items()}
+    extract_fns = {
+        name: partial(module.extract_account, window=windows[name])
+        for name, module in reports.items()
+    }
+    # Report by report: each report's jobs finish together, so the batch
+    # path can load and drop it before the next one piles up
+    jobs = [
+        (name, acc, spills[name].wrap(extract_fn) if spills[name] else extract_fn)
+        for name, extract_fn in extract_fns.items()
+        for acc in accounts
+    ]
+    logger.info(f"🚀 Scheduling {len(jobs)} extractions ({len(reports)} reports × {len(accounts)} accounts)")
+
+    # A run over --accounts replaces only those accounts' rows in the window
+    scope = [acc["customer_id"] for acc in accounts] if account_ids is not None else None
+    load = _run_streaming if streaming else _run_batch
+    failed = account_failures + dimension_failures + load(reports, windows, spills, jobs, max_workers, scope)
+    export_run_metrics(run_id=run_id, failed=failed, query_stats=query_stats(), retry_stats=retry_stats(),
+                       cache_stats=cache_stats())
+    return failed
+
+
+def report_queries(report_names=None):
+    """The ReportQuery of every selected report, in REPORTS order."""
+    return [
+        value
+        for report, module in REPORTS.items() if report in (report_names or REPORTS)
+        for value in vars(module).values() if isinstance(value, ReportQuery)
+    ]
+
+
+def run_plan(report_names=None):
+    """The streams of a run: the selected reports plus the dimension queries."""
+    dimension_queries = [query for query, _, _ in DIMENSIONS.values()]
+    return report_queries(report_names) + dimension_queries
+
+
+def log_query_stats():
+    for report, stats in sorted(query_stats().items()):
+        logger.info(
+            f"📊 {report}: {stats['api_calls']} API calls, {stats['rows']} rows, "
+            f"{stats['cells']} fields transferred"
+        )
+    log_retry_stats()
+    log_cache_stats()
+
+
+def _run_batch(reports, windows, spills, jobs, max_workers, scope=None):
+    # A report is loaded, and its frames released, as soon as its last job
+    # is done, so only the reports still extracting are held in memory
+    remaining = Counter(name for name, _, _ in jobs)
+    frames = defaultdict(list)
+    failed_jobs = []
+    failed = []
+    for name, acc, df in iter_job_results(jobs, max_workers, yield_empty=True, failed=failed_jobs):
+        if df is not None:
+            frames[name].append(df)
+        remaining[name] -= 1
+        if not remaining[name]:
+            failed_accounts = [acc for key, acc in failed_jobs if key == name]
+            failed += _load_batch(name, reports[name], frames.pop(name, []), windows[name], spills[name],
+                                  failed_accounts, scope)
+    log_query_stats()
+    return failed
+
+
+def _load_batch(name, module, frames, window, spill, failed_accounts, scope=None):
+    if not frames:
+        logger.error(f"❌ No valid data collected for {name}.")
+        return [name]
+
+    df_all = concat_frames(frames)
+    frames.clear()
+    try:
+        with span("load", report=name) as s:
+            s.rows = len(df_all)
+            load_to_bigquery(df_all, module.TABLE_ID, window=window, accounts=scope)
+        if spill:
+            spill.clear()
+    except Exception as e:
+        logger.error(f"❌ Load failed for {name}: {e}")
+        return [name]
+    return _advance_watermark(name, module.TABLE_ID, window, failed_accounts, scope)
+
+
+def _advance_watermark(name, table_id, window, failed_accounts, scope=None):
+    """
+      Moves table_id's watermark to the window's end unless accounts failed:
+      their rows in the window were replaced as well, so the next run has to
+      pull the window again. The report then counts as failed.
+
+      A run scoped to some accounts never moves it: the watermark stands for
+      the whole table, and the other accounts were not loaded.
+    """
+    if failed_accounts:
+        ids = ", ".join(acc["customer_id"] for acc in failed_accounts)
+        logger.error(f"❌ {name}: {len(failed_accounts)} accounts failed ({ids}), watermark not moved.")
+        return [name]
+    if scope is not None:
+        logger.info(f"🔖 {name}: loaded {len(scope)} accounts only, watermark not moved.")
+        return []
+    save_watermark(table_id, window)
+    return []
+
+
+def _run_streaming(reports, windows, spills, jobs, max_workers, scope=None):
+    loads = {
+        name: StreamingLoad(module.TABLE_ID, window=windows[name], accounts=scope)
+        for name, module in reports.items()
+    }
+    failed_jobs = []
+    try:
+        for name, acc, df in iter_job_results(jobs, max_workers, failed=failed_jobs):
+            with span("load", report=name) as s:
+                s.rows = len(df)
+                loads[name].add(df)
+    except BaseException:
+        for load in loads.values():
+            load.discard()
+        raise
+    log_query_stats()
+
+    failed = []
+    for name, load in loads.items():
+        try:
+            with span("load", report=name):
+                committed = load.commit()
+            if not committed:
+                logger.error(f"❌ No valid data collected for {name}.")
+                failed.append(name)
+                continue
+            if spills[name]:
+                spills[name].clear()
+            failed += _advance_watermark(name, load.table_name, load.window,
+                                         [acc for key, acc in failed_jobs if key == name], scope)
+        except Exception as e:
+            logger.error(f"❌ Load failed for {name}: {e}")
+            failed.append(name)
+
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run bronze Google Ads extractions in one pass.")
+    parser.add_argument("--reports", nargs="+", choices=list(REPORTS), help="Subset of reports to run")
+    parser.add_argument("--max-workers", type=int, help="Override BRONZE_MAX_WORKERS")
+    parser.add_argument("--start-date", help="First date to extract (YYYY-MM-DD)")
+    parser.add_argument("--end-date", help="Last date to extract (YYYY-MM-DD, default yesterday)")
+    parser.add_argument("--lookback-days", type=int, help="Override BRONZE_LOOKBACK_DAYS")
+    parser.add_argument("--accounts", nargs="+", help="Customer IDs to run (default: all enabled)")
+    parser.add_argument("--refresh-accounts", action="store_true", help="Re-query the account list, ignoring the registry")
+    parser.add_argument("--plan", action="store_true", help="Print the query plan and exit")
+    args = parser.parse_args()
+
+    if args.plan:
+        print(describe_plan(run_plan(args.reports)))
+        return
+
+    failed = run(args.reports, args.max_workers,
+                 start_date=args.start_date, end_date=args.end_date, lookback_days=args.lookback_days,
+                 account_ids=args.accounts, refresh_accounts=args.refresh_accounts)
+    if failed:
+        raise SystemExit(f"Bronze load failed for: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import gzip
+import hashlib
+import os
+import re
+import struct
+import time
+import uuid
+
+from dotenv import load_dotenv
+from google.ads.googleads.client import GoogleAdsClient
+from utils.logger import setup_logger
+
+logger=setup_logger(__name__)
+
+# ✅ Load environment variables
+load_dotenv()
+
+# Where recorded responses live, one directory per customer id
+GOOGLE_ADS_FIXTURES_DIR = os.getenv("GOOGLE_ADS_FIXTURES_DIR", ".google_ads_fixtures")
+# Simulated server time before each replayed batch / page (0 = full speed)
+GOOGLE_ADS_REPLAY_LATENCY_MS = float(os.getenv("GOOGLE_ADS_REPLAY_LATENCY_MS", "0"))
+
+_FRAME_HEADER = struct.Struct(">I")
+
+
+
+
+# ========================== #
+#      FIXTURE FILE LAYOUT   #
+# ========================== #
+# <fixtures_dir>/<customer_id>/<method>-<query hash>.pb.gz holds one call's
+# response: a gzip stream of length-prefixed serialized messages (stream
+# batches for search_stream, rows for search). A .gaql file next to it keeps
+# the query text for humans. The query is hashed after collapsing
+# whitespace, so it includes the date window: replay with the same
+# BRONZE_START_DATE / BRONZE_END_DATE the recording used.
+def normalize_query(query):
+    return re.sub(r"\s+", " ", query).strip()
+
+
+def fixture_path(fixtures_dir, customer_id, method, query):
+    digest = hashlib.sha1(normalize_query(query).encode()).hexdigest()[:16]
+    return os.path.join(fixtures_dir, str(customer_id), f"{method}-{digest}.pb.gz")
+
+
+def _serialize(message):
+    # proto-plus wrappers or raw protobuf, depending on use_proto_plus
+    if hasattr(message, "SerializeToString"):
+        return message.SerializeToString()
+    return type(message).serialize(message)
+
+
+def read_frames(path):
+    with gzip.open(path, "rb") as f:
+        while True:
+            header = f.read(_FRAME_HEADER.size)
+            if not header:
+                return
+            (size,) = _FRAME_HEADER.unpack(header)
+            yield f.read(size)
+
+
+
+
+# ========================== #
+#          RECORDING         #
+# ========================== #
+class RecordingService:
+    """
+      Wraps a live GoogleAdsService and writes every search / search_stream
+      response to the fixtures directory while passing it through unchanged.
+
+      A response is written to a temporary file and only renamed into place
+      once the call has been read to the end, so a stream cut off half way
+      (and retried) never leaves a truncated fixture behind.
+    """
+
+    def __init__(self, service, fixtures_dir=None):
+        self.service = service
+        self.fixtures_dir = fixtures_dir or GOOGLE_ADS_FIXTURES_DIR
+
+    def search_stream(self, customer_id, query, **kwargs):
+        stream = self.service.search_stream(customer_id=customer_id, query=query, **kwargs)
+        return self._record(stream, customer_id, "search_stream", query)
+
+    def search(self, customer_id, query, **kwargs):
+        rows = self.service.search(customer_id=customer_id, query=query, **kwargs)
+        return self._record(rows, customer_id, "search", query)
+
+    def _record(self, messages, customer_id, method, query):
+        path = fixture_path(self.fixtures_dir, customer_id, method, query)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        complete = False
+        try:
+            with gzip.open(tmp_path, "wb") as f:
+                for message in messages:
+                    payload = _serialize(message)
+                    f.write(_FRAME_HEADER.pack(len(payload)))
+                    f.write(payload)
+                    yield message
+            with open(path[:-len(".pb.gz")] + ".gaql", "w") as f:
+                f.write(normalize_query(query) + "\n")
+            os.replace(tmp_path, path)
+            complete = True
+        finally:
+            if not complete and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+
+
+# ========================== #
+#           REPLAY           #
+# ========================== #
+class ReplayService:
+    """
+      Offline stand-in for GoogleAdsService that answers search /
+      search_stream from recorded fixtures, sleeping latency_ms before each
+      batch or row page to mimic the server. Messages come back as proto-plus
+      or raw protobuf to match use_proto_plus, like the live client.
+
+      A call that was never recorded raises FileNotFoundError naming the
+      customer and query.
+    """
+
+    def __init__(self, fixtures_dir=None, latency_ms=None, use_proto_plus=True):
+        self.fixtures_dir = fixtures_dir or GOOGLE_ADS_FIXTURES_DIR
+        self.latency = (GOOGLE_ADS_REPLAY_LATENCY_MS if latency_ms is None else latency_ms) / 1000
+        self.use_proto_plus = use_proto_plus
+        # A credential-less client only provides the generated message types
+        types = GoogleAdsClient(credentials=None, use_proto_plus=True)
+        self.batch_type = type(types.get_type("SearchGoogleAdsStreamResponse"))
+        self.row_type = type(types.get_type("GoogleAdsRow"))
+
+    def customer_ids(self):
+        """Customer ids with recorded report streams (not just the MCC's account list)."""
+        if not os.path.isdir(self.fixtures_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.fixtures_dir)
+            if os.path.isdir(os.path.join(self.fixtures_dir, name))
+            and any(f.startswith("search_stream-") for f in os.listdir(os.path.join(self.fixtures_dir, name)))
+        )
+
+    def search_stream(self, customer_id, query, **kwargs):
+        return self._replay(customer_id, "search_stream", query, self.batch_type)
+
+    def search(self, customer_id, query, **kwargs):
+        return self._replay(customer_id, "search", query, self.row_type)
+
+    def _replay(self, customer_id, method, query, message_type):
+        path = fixture_path(self.fixtures_dir, customer_id, method, query)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"No recorded {method} for customer {customer_id}: {normalize_query(query)[:200]}"
+            )
+        return self._messages(path, message_type)
+
+    def _messages(self, path, message_type):
+        for payload in read_frames(path):
+            if self.latency:
+                time.sleep(self.latency)
+            message = message_type.deserialize(payload)
+            yield message if self.use_proto_plus else type(message).pb(message)
+
+
+class ReplayClient:
+    """Drop-in for GoogleAdsClient where only get_service("GoogleAdsService") is used."""
+
+    def __init__(self, fixtures_dir=None, latency_ms=None, use_proto_plus=True):
+        self.service = ReplayService(fixtures_dir, latency_ms, use_proto_plus)
+
+    def get_service(self, name, *args, **kwargs):
+        if name != "GoogleAdsService":
+            raise ValueError(f"Replay only covers GoogleAdsService, not {name}")
+        return self.service
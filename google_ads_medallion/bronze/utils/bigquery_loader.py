@@ -2,10 +2,19 @@
 #    CONFIGURATION SECTION   #
 # ========================== #
 import os
+import tempfile
+import uuid
 from dotenv import load_dotenv
+from google.api_core.exceptions import NotFound
 from google.cloud import bigquery
 from pandas_gbq import to_gbq
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.date_window import resolve_window
+from utils.instrumentation import span
 from utils.logger import setup_logger
+from utils.row_decoder import concat_frames
 
 logger=setup_logger(__name__)
 # ✅ Set Google Cloud credentials
@@ -16,33 +25,378 @@ load_dotenv()
 
 
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
+# Rows buffered in memory before a streaming load flushes them to staging
+BRONZE_CHUNK_ROWS = int(os.getenv("BRONZE_CHUNK_ROWS", "250000"))
+# "pandas_gbq" (default) or "parquet"; per-table overrides as
+# BRONZE_LOAD_BACKEND_OVERRIDES="location_metrics=parquet,age_metrics=pandas_gbq"
+BRONZE_LOAD_BACKEND = os.getenv("BRONZE_LOAD_BACKEND", "pandas_gbq")
+BRONZE_LOAD_BACKEND_OVERRIDES = dict(
+    item.split("=", 1) for item in os.getenv("BRONZE_LOAD_BACKEND_OVERRIDES", "").split(",") if "=" in item
+)
+# Codec for the parquet backend's upload file; BigQuery reads snappy, gzip, lz4 and zstd
+BRONZE_PARQUET_COMPRESSION = os.getenv("BRONZE_PARQUET_COMPRESSION", "zstd")
 
+LOAD_BACKENDS = ("pandas_gbq", "parquet")
 
+# "delete_append" (default): DELETE the window, then append.
+# "partition": stage, then MERGE into a date-partitioned table, replacing
+# only the partitions inside the window in one atomic statement.
+BRONZE_LOAD_MODE = os.getenv("BRONZE_LOAD_MODE", "delete_append")
+LOAD_MODES = ("delete_append", "partition")
+
+
+
+
+# ========================== #
+#       LOAD BACKENDS        #
+# ========================== #
+def load_backend_for(table_name):
+    """Backend for a table, matched on its short name (last dotted part)."""
+    backend = BRONZE_LOAD_BACKEND_OVERRIDES.get(table_name.split(".")[-1], BRONZE_LOAD_BACKEND)
+    if backend not in LOAD_BACKENDS:
+        raise ValueError(f"Unknown load backend '{backend}' for {table_name}")
+    return backend
+
+
+# pandas dtype kind -> (BigQuery type, Arrow type)
+_TYPE_MAP = {
+    "i": ("INT64", pa.int64()),
+    "u": ("INT64", pa.int64()),
+    "f": ("FLOAT64", pa.float64()),
+    "b": ("BOOL", pa.bool_()),
+    "M": ("TIMESTAMP", pa.timestamp("us")),
+}
+
+
+def frame_schema(df):
+    """
+      Explicit (BigQuery schema, Arrow schema) for a bronze frame, so the
+      load job never has to infer types. date32 columns are DATE; anything
+      else non-numeric (object, categorical) is a STRING.
+    """
+    bq_fields, arrow_fields = [], []
+    for column, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.ArrowDtype) and pa.types.is_date32(dtype.pyarrow_dtype):
+            bq_type, arrow_type = "DATE", pa.date32()
+        else:
+            bq_type, arrow_type = _TYPE_MAP.get(dtype.kind, ("STRING", pa.string()))
+        bq_fields.append(bigquery.SchemaField(column, bq_type))
+        arrow_fields.append(pa.field(column, arrow_type))
+    return bq_fields, pa.schema(arrow_fields)
+
+
+def write_parquet(df, path, arrow_schema):
+    table = pa.Table.from_pandas(df, schema=arrow_schema, preserve_index=False)
+    pq.write_table(table, path, compression=BRONZE_PARQUET_COMPRESSION)
+
+
+def _load_parquet(bq_client, df, table_name, write_disposition):
+    bq_schema, arrow_schema = frame_schema(df)
+    job_config = bigquery.LoadJobConfig(
+        source_format=bigquery.SourceFormat.PARQUET,
+        schema=bq_schema,
+        write_disposition=write_disposition,
+    )
+    with tempfile.NamedTemporaryFile(suffix=".parquet") as tmp:
+        write_parquet(df, tmp.name, arrow_schema)
+        with open(tmp.name, "rb") as source:
+            bq_client.load_table_from_file(source, table_name, job_config=job_config).result()
+
+
+def write_frame(bq_client, df, table_name, if_exists="append", backend=None):
+    """Writes one frame to table_name with the table's configured backend."""
+    backend = backend or load_backend_for(table_name)
+    with span("bq_write") as s:
+        s.rows, s.bytes = len(df), int(df.memory_usage(index=False).sum())
+        if backend == "parquet":
+            write_disposition = (bigquery.WriteDisposition.WRITE_TRUNCATE if if_exists == "replace"
+                                 else bigquery.WriteDisposition.WRITE_APPEND)
+            _load_parquet(bq_client, df, table_name, write_disposition)
+        else:
+            to_gbq(
+                df,
+                destination_table=table_name,
+                project_id=GCP_PROJECT_ID,
+                if_exists=if_exists,
+                table_schema=[field.to_api_repr() for field in frame_schema(df)[0]]
+            )
+
+
+
+
+def add_missing_columns(bq_client, table_name, df):
+    """
+      Appends df's columns that table_name does not have yet (NULLABLE), so a
+      report that gains a column keeps loading into its existing table.
+      Returns the table's {column: type} afterwards ({} when the table does
+      not exist yet).
+    """
+    try:
+        table = bq_client.get_table(table_name)
+    except NotFound:
+        return {}
+    existing = {field.name for field in table.schema}
+    new_fields = [field for field in frame_schema(df)[0] if field.name not in existing]
+    if new_fields:
+        table.schema = list(table.schema) + new_fields
+        bq_client.update_table(table, ["schema"])
+        logger.info(f"➕ Added columns to {table_name}: {', '.join(f.name for f in new_fields)}")
+    return {field.name: field.field_type for field in table.schema}
+
+
+def string_columns(df, table_types):
+    """
+      df's typed columns that the existing table stores as STRING, e.g. date
+      in tables created before the decoder produced date32.
+    """
+    return [
+        field.name for field in frame_schema(df)[0]
+        if table_types.get(field.name) == "STRING" and field.field_type != "STRING"
+    ]
+
+
+
+
+def replaced_rows_sql(window, accounts=None, prefix=""):
+    """
+      Condition on the target rows a load replaces: the window's dates, and
+      only the given customer ids when the load covers a subset of accounts
+      (None: every account), so the other accounts' rows are kept.
+    """
+    condition = window.sql(f"{prefix}date")
+    if accounts is not None:
+        ids = [str(account) for account in accounts]
+        if not all(account.isdigit() for account in ids):
+            raise ValueError(f"Customer ids must be digits only: {ids}")
+        condition += f" AND {prefix}account_id IN ({', '.join(repr(account) for account in ids) or 'NULL'})"
+    return condition
+
+
+def load_to_bigquery(df, table_name, backend=None, mode=None, window=None, accounts=None):
+
+    mode = mode or BRONZE_LOAD_MODE
+    window = window or resolve_window()
+    if mode == "partition":
+        load_chunks_to_bigquery([df], table_name, backend=backend, mode=mode, window=window, accounts=accounts)
+        return
 
-def load_to_bigquery(df, table_name):
-    
     bq_client = bigquery.Client( project=GCP_PROJECT_ID)
+    query = f"""
+        DELETE FROM `{table_name}`
+        WHERE {replaced_rows_sql(window, accounts)}
+    """
     try:
-        query = f"""
-            DELETE FROM `{table_name}`
-            WHERE date >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY)
-        """
         bq_client.query(query).result()
-        logger.info("🧹 Deleted last 30 days from BigQuery before uploading new data.")
+        scope = "" if accounts is None else f" for {len(accounts)} accounts"
+        logger.info(f"🧹 Deleted {window}{scope} from BigQuery before uploading new data.")
     except Exception as e:
-        logger.warning(f"⚠️ Delete skipped (table may be new): {e}")   
-    
-    
-    to_gbq(
-        df,
-        destination_table=table_name,
-        project_id=GCP_PROJECT_ID,
-        if_exists="append"  # Change to 'append' if you want to keep historical data
-    )
+        logger.warning(f"⚠️ Delete skipped (table may be new): {e}")
+
+    table_types = add_missing_columns(bq_client, table_name, df)
+    legacy = string_columns(df, table_types)
+    if legacy:
+        df = df.assign(**{column: df[column].astype(str) for column in legacy})
+    write_frame(bq_client, df, table_name, if_exists="append", backend=backend)
 
     logger.info(f"✅ Data uploaded to BigQuery: {table_name}")
 
 
 
 
+# ========================== #
+#      STREAMING LOADS       #
+# ========================== #
+class StreamingLoad:
+    """
+      Loads a table chunk by chunk so memory is bounded by BRONZE_CHUNK_ROWS
+      instead of the whole MCC.
+
+      Chunks are appended to a private staging table as they arrive; the
+      target only changes in commit(), where the delete of the date window
+      (default: resolve_window(), i.e. the last 30 days) and the insert from
+      staging run in one transaction. If the run dies before
+      commit() the target still holds yesterday's data.
+
+      With mode="partition" the target is a table partitioned on date and
+      commit() is a single MERGE that deletes the window's partitions and
+      inserts the staged rows, so only those partitions are scanned and
+      rewritten. A staged STRING date is cast to DATE on the way in.
+
+      accounts (customer ids) limits the replace to those accounts' rows,
+      for loads of a subset such as run_bronze.py --accounts; by default
+      the window is replaced for every account.
+
+      Usage:
+          load = StreamingLoad(TABLE_ID)
+          for df in chunks:
+              load.add(df)
+          load.commit()
+    """
+
+    def __init__(self, table_name, chunk_rows=None, backend=None, mode=None, window=None, accounts=None):
+        self.table_name = table_name
+        self.window = window or resolve_window()
+        self.accounts = accounts
+        self.chunk_rows = chunk_rows or BRONZE_CHUNK_ROWS
+        self.backend = backend or load_backend_for(table_name)
+        self.mode = mode or BRONZE_LOAD_MODE
+        if self.mode not in LOAD_MODES:
+            raise ValueError(f"Unknown load mode '{self.mode}' for {table_name}")
+        self.staging_table = f"{table_name}__staging_{uuid.uuid4().hex[:8]}"
+        self.bq_client = bigquery.Client(project=GCP_PROJECT_ID)
+        self.buffer = []
+        self.buffered_rows = 0
+        self.staged_rows = 0
+        self.columns_frame = None
+
+    def add(self, df):
+        if df is None or df.empty:
+            return
+        self.buffer.append(df)
+        self.buffered_rows += len(df)
+        if self.buffered_rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        chunk = concat_frames(self.buffer)
+        self.buffer, self.buffered_rows = [], 0
+        if self.columns_frame is None:
+            self.columns_frame = chunk.head(0)
+
+        write_frame(
+            self.bq_client,
+            chunk,
+            self.staging_table,
+            if_exists="append" if self.staged_rows else "replace",
+            backend=self.backend
+        )
+        self.staged_rows += len(chunk)
+        logger.info("📦 Staged %s rows (%s total) for %s", len(chunk), self.staged_rows, self.table_name)
+
+    def commit(self):
+        self.flush()
+        if not self.staged_rows:
+            logger.warning(f"⚠️ Nothing staged for {self.table_name}, target left untouched.")
+            return 0
+
+        try:
+            table_types = add_missing_columns(self.bq_client, self.table_name, self.columns_frame)
+            if self.mode == "partition":
+                self._check_partitioned()
+                self.bq_client.query(self._partition_merge_sql()).result()
+            else:
+                legacy = string_columns(self.columns_frame, table_types)
+                self.bq_client.query(self._delete_append_sql(legacy)).result()
+        finally:
+            self.discard()
+
+        logger.info(f"✅ Data uploaded to BigQuery: {self.table_name} ({self.staged_rows} rows)")
+        return self.staged_rows
+
+    def _column_list(self, prefix="", as_string=()):
+        return ", ".join(
+            f"CAST({prefix}`{column}` AS STRING)" if column in as_string else f"{prefix}`{column}`"
+            for column in self.columns_frame.columns
+        )
+
+    def _delete_append_sql(self, as_string=()):
+        # Explicit column lists: the target may carry columns this run lacks.
+        # as_string: typed staged columns the target still stores as STRING.
+        return f"""
+            CREATE TABLE IF NOT EXISTS `{self.table_name}` AS
+            SELECT * FROM `{self.staging_table}` WHERE FALSE;
 
+            BEGIN TRANSACTION;
+            DELETE FROM `{self.table_name}`
+            WHERE {replaced_rows_sql(self.window, self.accounts)};
+            INSERT INTO `{self.table_name}` ({self._column_list()})
+            SELECT {self._column_list(as_string=as_string)} FROM `{self.staging_table}`;
+            COMMIT TRANSACTION;
+        """
+
+    def _partition_merge_sql(self):
+        # ON FALSE: every target row in the window is "not matched by source"
+        # and deleted, every staged row is "not matched" and inserted. The
+        # constant date filter prunes the MERGE to the window's partitions.
+        return f"""
+            CREATE TABLE IF NOT EXISTS `{self.table_name}`
+            PARTITION BY date AS
+            SELECT * REPLACE (CAST(date AS DATE) AS date)
+            FROM `{self.staging_table}` WHERE FALSE;
+
+            MERGE `{self.table_name}` T
+            USING (
+                SELECT * REPLACE (CAST(date AS DATE) AS date)
+                FROM `{self.staging_table}`
+            ) S
+            ON FALSE
+            WHEN NOT MATCHED BY SOURCE
+                AND {replaced_rows_sql(self.window, self.accounts, "T.")} THEN DELETE
+            WHEN NOT MATCHED THEN
+                INSERT ({self._column_list()}) VALUES ({self._column_list("S.")});
+        """
+
+    def _check_partitioned(self):
+        try:
+            table = self.bq_client.get_table(self.table_name)
+        except NotFound:
+            return
+        partitioning = table.time_partitioning
+        if partitioning is None or partitioning.field != "date":
+            raise ValueError(
+                f"{self.table_name} is not partitioned on date; "
+                f"partition mode needs a date-partitioned table (load into a new table or migrate it first)"
+            )
+
+    def discard(self):
+        self.buffer, self.buffered_rows = [], 0
+        self.bq_client.delete_table(self.staging_table, not_found_ok=True)
+
+
+def replace_accounts(df, table_name, backend=None):
+    """
+      Loads a per-account snapshot (e.g. the campaign dimension): every row
+      of the accounts present in df is replaced, other accounts are kept.
+      The staged delete and insert run in one transaction.
+    """
+    if df is None or df.empty:
+        logger.warning(f"⚠️ Nothing to load for {table_name}, target left untouched.")
+        return 0
+
+    bq_client = bigquery.Client(project=GCP_PROJECT_ID)
+    staging_table = f"{table_name}__staging_{uuid.uuid4().hex[:8]}"
+    columns = ", ".join(f"`{column}`" for column in df.columns)
+    write_frame(bq_client, df, staging_table, if_exists="replace", backend=backend or load_backend_for(table_name))
+    try:
+        add_missing_columns(bq_client, table_name, df)
+        bq_client.query(f"""
+            CREATE TABLE IF NOT EXISTS `{table_name}` AS
+            SELECT * FROM `{staging_table}` WHERE FALSE;
+
+            BEGIN TRANSACTION;
+            DELETE FROM `{table_name}`
+            WHERE account_id IN (SELECT DISTINCT account_id FROM `{staging_table}`);
+            INSERT INTO `{table_name}` ({columns})
+            SELECT {columns} FROM `{staging_table}`;
+            COMMIT TRANSACTION;
+        """).result()
+    finally:
+        bq_client.delete_table(staging_table, not_found_ok=True)
+
+    logger.info(f"✅ Data uploaded to BigQuery: {table_name} ({len(df)} rows)")
+    return len(df)
+
+
+def load_chunks_to_bigquery(chunks, table_name, chunk_rows=None, backend=None, mode=None, window=None,
+                            accounts=None):
+    """Streams an iterable of DataFrames into table_name through StreamingLoad."""
+    load = StreamingLoad(table_name, chunk_rows, backend=backend, mode=mode, window=window, accounts=accounts)
+    try:
+        for df in chunks:
+            load.add(df)
+    except BaseException:
+        load.discard()
+        raise
+    return load.commit()
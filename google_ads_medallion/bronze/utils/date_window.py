@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+from collections import namedtuple
+from datetime import date, timedelta
+
+from dotenv import load_dotenv
+from utils.logger import setup_logger
+
+logger=setup_logger(__name__)
+
+# ✅ Load environment variables
+load_dotenv()
+
+# Explicit window (YYYY-MM-DD, inclusive); either side falls back to the lookback
+BRONZE_START_DATE = os.getenv("BRONZE_START_DATE")
+BRONZE_END_DATE = os.getenv("BRONZE_END_DATE")
+# Days before today pulled when no explicit start applies (30 == LAST_30_DAYS)
+BRONZE_LOOKBACK_DAYS = int(os.getenv("BRONZE_LOOKBACK_DAYS", "30"))
+# JSON file of {table_id: last loaded end date}; unset disables watermarks
+BRONZE_WATERMARK_FILE = os.getenv("BRONZE_WATERMARK_FILE")
+# Days before the watermark re-pulled each run, for late conversions
+BRONZE_WATERMARK_OVERLAP_DAYS = int(os.getenv("BRONZE_WATERMARK_OVERLAP_DAYS", "3"))
+
+
+
+
+# ========================== #
+#        DATE WINDOWS        #
+# ========================== #
+class DateWindow(namedtuple("DateWindow", ["start", "end"])):
+    """Inclusive [start, end] range of report dates, shared by query and load."""
+
+    def gaql(self):
+        """WHERE clause condition for a GAQL query."""
+        return f"segments.date BETWEEN '{self.start.isoformat()}' AND '{self.end.isoformat()}'"
+
+    def sql(self, column="date"):
+        """
+          BigQuery condition on the bronze date column. ISO literals compare
+          correctly against both STRING and DATE columns.
+        """
+        return f"{column} BETWEEN '{self.start.isoformat()}' AND '{self.end.isoformat()}'"
+
+    def days(self):
+        return (self.end - self.start).days + 1
+
+    def __str__(self):
+        return f"{self.start.isoformat()}..{self.end.isoformat()}"
+
+
+def parse_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def resolve_window(table_id=None, start=None, end=None, lookback_days=None, today=None):
+    """
+      Works out the extraction window.
+
+      end:   explicit end, else BRONZE_END_DATE, else yesterday.
+      start: explicit start, else BRONZE_START_DATE, else end of an
+             explicit lookback_days, else (when table_id is given and
+             watermarks are enabled) the table's watermark minus
+             BRONZE_WATERMARK_OVERLAP_DAYS, else end of BRONZE_LOOKBACK_DAYS.
+
+      With no arguments and no env overrides this is LAST_30_DAYS.
+    """
+    today = today or date.today()
+    end = parse_date(end or BRONZE_END_DATE) or today - timedelta(days=1)
+    start = parse_date(start or BRONZE_START_DATE)
+
+    if start is None and lookback_days is not None:
+        start = today - timedelta(days=lookback_days)
+
+    if start is None and table_id is not None:
+        watermark = read_watermark(table_id)
+        if watermark is not None:
+            start = watermark - timedelta(days=BRONZE_WATERMARK_OVERLAP_DAYS)
+
+    if start is None:
+        start = today - timedelta(days=BRONZE_LOOKBACK_DAYS)
+
+    if start > end:
+        raise ValueError(f"Empty date window: start {start} is after end {end}")
+    return DateWindow(start, end)
+
+
+SHARD_SIZES = ("day", "week", "month")
+
+
+def split_window(window, shard="week"):
+    """Splits a window into consecutive day / 7-day / calendar-month shards."""
+    if shard not in SHARD_SIZES:
+        raise ValueError(f"Unknown shard size '{shard}', expected one of {SHARD_SIZES}")
+
+    shards = []
+    start = window.start
+    while start <= window.end:
+        if shard == "day":
+            end = start
+        elif shard == "week":
+            end = start + timedelta(days=6)
+        else:
+            next_month = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+            end = next_month - timedelta(days=1)
+        end = min(end, window.end)
+        shards.append(DateWindow(start, end))
+        start = end + timedelta(days=1)
+    return shards
+
+
+
+
+# ========================== #
+#         WATERMARKS         #
+# ========================== #
+_watermark_lock = threading.Lock()
+
+
+def _read_watermarks():
+    if not BRONZE_WATERMARK_FILE or not os.path.exists(BRONZE_WATERMARK_FILE):
+        return {}
+    with open(BRONZE_WATERMARK_FILE) as f:
+        return json.load(f)
+
+
+def read_watermark(table_id):
+    """Last end date loaded into table_id, or None."""
+    with _watermark_lock:
+        value = _read_watermarks().get(table_id)
+    return parse_date(value)
+
+
+def save_watermark(table_id, window):
+    """
+      Records window.end as table_id's watermark once its load has committed.
+      Never moves a watermark backwards, so a backfill of old dates leaves the
+      nightly incremental position alone. No-op when watermarks are disabled.
+    """
+    if not BRONZE_WATERMARK_FILE:
+        return
+    with _watermark_lock:
+        watermarks = _read_watermarks()
+        current = parse_date(watermarks.get(table_id))
+        if current is not None and current >= window.end:
+            return
+        watermarks[table_id] = window.end.isoformat()
+
+        tmp_path = f"{BRONZE_WATERMARK_FILE}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(watermarks, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, BRONZE_WATERMARK_FILE)
+    logger.info(f"🔖 Watermark for {table_id} moved to {window.end}")
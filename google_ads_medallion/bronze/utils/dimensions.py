@@ -0,0 +1,146 @@
+import os
+import threading
+from collections import defaultdict
+from functools import partial
+
+from dotenv import load_dotenv
+
+from utils.bigquery_loader import replace_accounts
+from utils.extraction_runner import add_account_columns, iter_job_results
+from utils.google_ads_client import get_ads_service
+from utils.logger import setup_logger
+from utils.query_planner import ReportQuery, run_query
+from utils.row_decoder import Field, concat_frames, decode_stream, enum_name
+
+logger=setup_logger(__name__)
+
+# ✅ Load environment variables
+load_dotenv()
+
+GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
+CAMPAIGNS_TABLE_ID = f"{GCP_PROJECT_ID}.{os.getenv('BIGQUERY_BRONZE_DATASET')}.{os.getenv('BIGQUERY_BRONZE_CAMPAIGNS', 'campaigns')}"
+AD_GROUPS_TABLE_ID = f"{GCP_PROJECT_ID}.{os.getenv('BIGQUERY_BRONZE_DATASET')}.{os.getenv('BIGQUERY_BRONZE_AD_GROUPS', 'ad_groups')}"
+
+
+
+
+# ========================== #
+#   CAMPAIGN / AD GROUP DIMS #
+# ========================== #
+# The fact reports carry only campaign_id / ad_group_id; names and channel
+# type are fetched here once per account and joined back in dbt silver.
+CAMPAIGN_FIELDS = [
+    Field('campaign_id', 'campaign.id', 'int64'),
+    Field('campaign_name', 'campaign.name'),
+    Field('campaign_type', 'campaign.advertising_channel_type', 'category', transform=enum_name),
+]
+
+
+CAMPAIGN_QUERY = ReportQuery(
+    report="campaigns",
+    resource="campaign",
+    attributes=(
+        "campaign.id",
+        "campaign.name",
+        "campaign.advertising_channel_type",
+    ),
+    segments=(),
+    metrics=(),
+    windowed=False,
+)
+
+
+AD_GROUP_FIELDS = [
+    Field('ad_group_id', 'ad_group.id', 'int64'),
+    Field('ad_group_name', 'ad_group.name'),
+    Field('campaign_id', 'campaign.id', 'int64'),
+]
+
+
+AD_GROUP_QUERY = ReportQuery(
+    report="ad_groups",
+    resource="ad_group",
+    attributes=(
+        "ad_group.id",
+        "ad_group.name",
+        "campaign.id",
+    ),
+    segments=(),
+    metrics=(),
+    windowed=False,
+)
+
+
+DIMENSIONS = {
+    "campaigns": (CAMPAIGN_QUERY, CAMPAIGN_FIELDS, CAMPAIGNS_TABLE_ID),
+    "ad_groups": (AD_GROUP_QUERY, AD_GROUP_FIELDS, AD_GROUPS_TABLE_ID),
+}
+
+
+
+
+# ========================== #
+#      PER-RUN ACCOUNT CACHE #
+# ========================== #
+_cache = {}
+_account_locks = defaultdict(threading.Lock)
+
+
+def account_dimensions(acc):
+    """
+      {dimension: DataFrame} for one account, fetched on first use and then
+      served from memory for the rest of the process, however many reports
+      or backfill shards ask for it. Concurrent callers for the same account
+      wait for the one fetch in flight.
+    """
+    acc_id = acc["customer_id"]
+    with _account_locks[acc_id]:
+        if acc_id not in _cache:
+            ga_service = get_ads_service()
+            frames = {}
+            for name, (query, fields, _) in DIMENSIONS.items():
+                df = decode_stream(run_query(ga_service, acc_id, query), fields)
+                add_account_columns(df, acc_id)
+                frames[name] = df
+            logger.info(
+                f"🏷️ Dimensions for {acc_id}: "
+                + ", ".join(f"{len(df)} {name}" for name, df in frames.items())
+            )
+            _cache[acc_id] = frames
+        return _cache[acc_id]
+
+
+def reset_dimension_cache():
+    _cache.clear()
+
+
+def load_dimensions(accounts, max_workers=None):
+    """
+      Fetches (or reuses) every account's dimensions and replaces those
+      accounts' rows in the campaign and ad group tables. Returns what
+      failed: "<name> <customer_id>" for every account whose fetch gave up,
+      and the name of every table that collected no rows or failed to load.
+    """
+    jobs = ((name, acc, partial(_account_dimension, name)) for acc in accounts for name in DIMENSIONS)
+    frames = defaultdict(list)
+    failed_jobs = []
+    for name, _, df in iter_job_results(jobs, max_workers, failed=failed_jobs):
+        frames[name].append(df)
+
+    failed = [f"{name} {acc['customer_id']}" for name, acc in failed_jobs]
+    for name, (_, _, table_id) in DIMENSIONS.items():
+        if not frames[name]:
+            logger.error(f"❌ No dimension rows collected for {name}.")
+            failed.append(name)
+            continue
+        try:
+            replace_accounts(concat_frames(frames[name]), table_id)
+        except Exception as e:
+            logger.error(f"❌ Load failed for {name}: {e}")
+            failed.append(name)
+    return failed
+
+
+def _account_dimension(name, acc):
+    # Both dimensions of an account come from one cached fetch
+    return account_dimensions(acc)[name]
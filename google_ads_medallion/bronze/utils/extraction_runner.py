@@ -0,0 +1,199 @@
+import contextvars
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from utils.bigquery_loader import load_chunks_to_bigquery, load_to_bigquery
+from utils.date_window import resolve_window, save_watermark
+from utils.instrumentation import export_run_metrics, reset_spans, span
+from utils.logger import log_context, new_run_id, setup_logger
+from utils.response_cache import log_cache_stats
+from utils.retry import call_with_retries, log_retry_stats
+from utils.row_decoder import concat_frames
+from utils.spill import account_spill
+
+logger=setup_logger(__name__)
+
+# ✅ Load environment variables
+load_dotenv()
+
+BRONZE_MAX_WORKERS = int(os.getenv("BRONZE_MAX_WORKERS", "8"))
+# Stream per-account frames into the loader instead of concatenating the MCC
+BRONZE_STREAMING_LOAD = os.getenv("BRONZE_STREAMING_LOAD", "False").lower() == "true"
+
+
+
+
+def add_account_columns(df, acc_id, acc_name=None):
+    """Tags a per-account frame with account_id (and account_name) as single-value categoricals."""
+    df["account_id"] = pd.Categorical.from_codes(np.zeros(len(df), dtype="int8"), [acc_id])
+    if acc_name is not None:
+        df["account_name"] = pd.Categorical.from_codes(np.zeros(len(df), dtype="int8"), [acc_name])
+    return df
+
+
+
+
+# ========================== #
+#   CONCURRENT ACCOUNT RUNS  #
+# ========================== #
+def iter_job_results(jobs, max_workers=None, yield_empty=False, failed=None):
+    """
+      Runs every (key, acc, extract_fn) job on one bounded thread pool and
+      yields (key, acc, df) as soon as each job finishes.
+
+      At most 2 × max_workers jobs are in flight at once, so finished frames
+      that the consumer has not picked up yet cannot pile up without bound.
+
+      Every attempt runs in an "extract" span of (key, account), see
+      utils.instrumentation, and its log lines are tagged with the key and
+      account (utils.logger.log_context).
+
+      Each job is retried with backoff on quota / transient errors (see
+      utils.retry); a job that still fails is logged and skipped so one bad
+      account never stops the rest of the run; its (key, acc) is appended to
+      failed when a list is passed. Empty results are skipped as
+      well, unless yield_empty=True: then every job is yielded once, with
+      df=None when it failed or returned nothing, so the consumer can tell
+      when all of a key's jobs are done.
+
+      Set BRONZE_MAX_WORKERS env var to control concurrency (default 8).
+    """
+    max_workers = max_workers or BRONZE_MAX_WORKERS
+    jobs = iter(jobs)
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bronze") as pool:
+        def submit_next():
+            job = next(jobs, None)
+            if job is None:
+                return False
+            key, acc, extract_fn = job
+            label = f"{key} {acc['customer_id']}"
+            # Carries the caller's run_id (contextvars) into the pool thread
+            context = contextvars.copy_context()
+            future = pool.submit(context.run, call_with_retries, _run_job, key, acc, extract_fn, label=label)
+            pending[future] = (key, acc)
+            return True
+
+        while len(pending) < 2 * max_workers and submit_next():
+            pass
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, acc = pending.pop(future)
+                submit_next()
+                try:
+                    df = future.result()
+                except Exception as e:
+                    logger.error("❌ Error in %s for account %s - %s: %s", key, acc['customer_id'], acc['name'], e)
+                    if failed is not None:
+                        failed.append((key, acc))
+                    df = None
+
+                if df is None or df.empty:
+                    if yield_empty:
+                        yield key, acc, None
+                    continue
+
+                yield key, acc, df
+
+
+def _run_job(key, acc, extract_fn):
+    with log_context(report=key, account=acc["customer_id"]), \
+            span("extract", report=key, account=acc["customer_id"]) as s:
+        df = extract_fn(acc)
+        s.rows = 0 if df is None else len(df)
+    return df
+
+
+def report_key(extract_fn):
+    """Report name of a (possibly partial / wrapped) extract_account: its module."""
+    return getattr(getattr(extract_fn, "func", extract_fn), "__module__", "extract")
+
+
+def iter_account_results(accounts, extract_fn, max_workers=None, failed=None):
+    """Runs extract_fn(acc) for every account and yields (acc, df) as they finish."""
+    key = report_key(extract_fn)
+    jobs = ((key, acc, extract_fn) for acc in accounts)
+    for _, acc, df in iter_job_results(jobs, max_workers, failed=failed):
+        yield acc, df
+
+
+def run_accounts(accounts, extract_fn, max_workers=None, failed=None):
+    """Collects every non-empty per-account DataFrame from iter_account_results."""
+    return [df for _, df in iter_account_results(accounts, extract_fn, max_workers, failed)]
+
+
+def extract_and_load(accounts, extract_fn, table_name, streaming=None, window=None):
+    """
+      Extracts every account for one date window and loads the result to
+      table_name, replacing that window in the table.
+
+      extract_fn is called as extract_fn(acc, window=window). The window
+      defaults to resolve_window(table_name), so with BRONZE_WATERMARK_FILE
+      set only the days since the table's last load are pulled, and the
+      watermark moves forward once the load has committed. It stays put when
+      any account failed: the load replaced that account's rows in the
+      window too, so the next run has to pull the window again.
+
+      streaming=True (default: BRONZE_STREAMING_LOAD env var) hands each
+      account's frame to the loader as soon as it is ready, so peak memory is
+      bounded by the loader's chunk size rather than the whole MCC.
+
+      With BRONZE_SPILL_DIR set each account's frame is also spilled to
+      Parquet as it finishes, so rerunning after a crash re-extracts only
+      the accounts that had not completed (see utils.spill).
+
+      The facts carry ids only, so the accounts' campaign and ad group
+      dimensions are refreshed alongside (see utils.dimensions).
+    """
+    # Imported here: utils.dimensions runs its fetches through this module
+    from utils.dimensions import load_dimensions
+
+    streaming = BRONZE_STREAMING_LOAD if streaming is None else streaming
+    window = window or resolve_window(table_name)
+    report = report_key(extract_fn)
+    extract_fn = partial(extract_fn, window=window)
+    new_run_id()
+    reset_spans()
+    spill = account_spill(table_name, window)
+    if spill:
+        extract_fn = spill.wrap(extract_fn)
+    logger.info(f"📅 Extracting {window} ({window.days()} days) for {table_name}")
+
+    failed = []
+    if streaming:
+        chunks = (df for _, df in iter_account_results(accounts, extract_fn, failed=failed))
+        # Not one span: the loader pulls chunks while the workers extract
+        rows = load_chunks_to_bigquery(chunks, table_name, window=window)
+    else:
+        final_dataframes = run_accounts(accounts, extract_fn, failed=failed)
+        if not final_dataframes:
+            logger.error(f"❌ No valid data collected. Exiting.")
+            if spill:
+                spill.clear()
+            return 0
+
+        df_all = concat_frames(final_dataframes)
+        with span("load", report=report) as s:
+            load_to_bigquery(df_all, table_name, window=window)
+            rows = s.rows = len(df_all)
+
+    if failed:
+        logger.warning(f"⚠️ {len(failed)} accounts failed, watermark for {table_name} left at its last position.")
+    elif rows:
+        save_watermark(table_name, window)
+    if spill:
+        spill.clear()
+    dimension_failures = load_dimensions(accounts)
+    if dimension_failures:
+        logger.error(f"❌ Dimensions not refreshed: {', '.join(dimension_failures)}")
+    log_retry_stats()
+    log_cache_stats()
+    export_run_metrics(rows=rows)
+    return rows
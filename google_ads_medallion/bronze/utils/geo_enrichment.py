@@ -0,0 +1,65 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from utils.instrumentation import timed
+
+GEO_TARGET_PREFIX = "geoTargetConstants/"
+
+
+
+
+# ========================== #
+#   LOCATION ENRICHMENT      #
+# ========================== #
+def parse_geo_target_ids(values):
+    """
+      Criterion ids from geoTargetConstants/<id> resource names, as an Int64
+      Series aligned with values. Anything without the prefix (e.g. the empty
+      string the API sends when a segment is unset) becomes NA.
+
+      Slices the fixed prefix off in Arrow instead of running a regex per row.
+    """
+    index = values.index if isinstance(values, pd.Series) else None
+    names = pa.array(values, type=pa.string(), from_pandas=True)
+    digits = pc.if_else(
+        pc.starts_with(names, GEO_TARGET_PREFIX),
+        pc.utf8_slice_codeunits(names, len(GEO_TARGET_PREFIX)),
+        pa.scalar(None, pa.string()),
+    )
+    try:
+        ids = pc.cast(digits, pa.int64())
+    except pa.ArrowInvalid:
+        # Malformed suffix somewhere; fall back to a lenient per-value parse
+        return pd.to_numeric(pd.Series(digits.to_pandas(), index=index), errors="coerce").astype("Int64")
+    return pd.Series(ids.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get), index=index)
+
+
+@timed("enrich")
+def enrich_locations(df, geo_index):
+    """
+      Adds the geotarget columns the location reports load, in place:
+        country_criterion_id  → Int64
+        get_target_city       ← city id parsed from geo_target_city
+        country_code          ← country code of country_criterion_id
+        geo_target_city       ← city name (replaces the resource name)
+        country_name          ← country name of country_criterion_id
+        province_name         ← first-level region (state / province)
+
+      country_criterion_id is the view's own key, so it decides the country.
+      province_name is resolved from the most specific subnational criterion
+      on the row (city, else province) through the precomputed hierarchy.
+      Every lookup is one vectorized pass over the column against the
+      GeoTargetIndex arrays.
+    """
+    df["country_criterion_id"] = pd.to_numeric(df["country_criterion_id"], errors="coerce").astype("Int64")
+    city_ids = parse_geo_target_ids(df["geo_target_city"])
+    province_ids = parse_geo_target_ids(df["geo_target_province"])
+    country = geo_index.hierarchy(df["country_criterion_id"], levels=("country",))
+    region = geo_index.hierarchy(city_ids.fillna(province_ids), levels=("province",))
+
+    df["get_target_city"] = city_ids
+    df["country_code"] = country["country_code"]
+    df["geo_target_city"] = geo_index.names(city_ids)
+    df["country_name"] = country["country_name"]
+    df["province_name"] = region["province_name"]
+    return df
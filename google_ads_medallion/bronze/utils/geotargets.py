@@ -0,0 +1,259 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from dotenv import load_dotenv
+from utils.logger import setup_logger
+
+logger=setup_logger(__name__)
+
+# ✅ Load environment variables
+load_dotenv()
+
+GEOTARGETS_CSV_PATH = os.getenv("GEOTARGETS_CSV_PATH", "geotargets-2025-04-01.csv")
+# Compiled indexes live in <dir>/v<format>-<csv sha256>/, so a new CSV or a
+# new index layout never reuses a stale one
+GEOTARGETS_CACHE_DIR = os.getenv("GEOTARGETS_CACHE_DIR", ".geotargets_cache")
+
+
+
+
+# ========================== #
+#     GEO TARGET INDEX       #
+# ========================== #
+# Arrays written per compiled CSV. ids is sorted; every other per-row array
+# is aligned with it. Strings are stored as one UTF-8 blob plus offsets so
+# the whole index can be memory-mapped instead of held as Python objects.
+#
+# The *_pos arrays hold each row's resolved hierarchy as row positions (-1
+# when absent), precomputed from the parent chain at compile time:
+#   country   the root of the chain (the row itself for a country)
+#   province  the first-level region directly under the country
+#             (state, province, region; what GAQL calls geo_target_province)
+#   city      the nearest ancestor-or-self whose target type is City
+_INDEX_FORMAT = 2
+_ARRAYS = (
+    "ids", "parent_ids", "country_idx", "type_idx",
+    "country_pos", "province_pos", "city_pos",
+    "name_offsets", "name_blob", "country_offsets", "country_blob", "type_offsets", "type_blob",
+)
+_MAX_DEPTH = 16
+HIERARCHY_LEVELS = ("country", "province", "city")
+
+
+class GeoTargetIndex:
+    """
+      Read-only, memory-mapped lookup over the geotargets CSV.
+
+      All lookups are vectorized: they take an array-like of criterion ids
+      (NA allowed) and return an aligned object array, None where the id is
+      unknown.
+
+      Usage:
+          index = get_geotarget_index()
+          df["city"] = index.names(df["city_id"])
+          geo = index.hierarchy(df["city_id"])    # country/province/city columns
+    """
+
+    def __init__(self, arrays):
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+        self._names = _string_array(self.name_offsets, self.name_blob)
+        self._countries = _string_array(self.country_offsets, self.country_blob)
+        self._types = _string_array(self.type_offsets, self.type_blob)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def positions(self, ids):
+        """Row position of each id in the index, -1 when missing."""
+        ids = pd.Series(ids, copy=False).astype("Int64").fillna(-1).to_numpy(np.int64)
+        pos = np.searchsorted(self.ids, ids)
+        pos[pos == len(self.ids)] = 0
+        pos[self.ids[pos] != ids] = -1
+        return pos
+
+    def names(self, ids):
+        """Geotarget name (e.g. 'Toronto') for each id."""
+        return _take(self._names, self.positions(ids))
+
+    def country_codes(self, ids):
+        """Two-letter country code of each id."""
+        pos = self.positions(ids)
+        return _take(self._countries, np.where(pos >= 0, self.country_idx[pos], -1))
+
+    def target_types(self, ids):
+        """Target type (Country, State, City, ...) of each id."""
+        pos = self.positions(ids)
+        return _take(self._types, np.where(pos >= 0, self.type_idx[pos], -1))
+
+    def hierarchy(self, ids, levels=HIERARCHY_LEVELS):
+        """
+          Resolves each id to its geography in one pass: a DataFrame aligned
+          with ids holding <level>_id and <level>_name for each requested
+          level (country, province, city), plus country_code with country.
+          Levels above the id are filled from its ancestors; levels below it
+          stay NA.
+        """
+        pos = self.positions(ids)
+        columns = {}
+        for level in levels:
+            level_pos = np.where(pos >= 0, getattr(self, f"{level}_pos")[pos], -1)
+            columns[f"{level}_id"] = pd.array(np.where(level_pos >= 0, self.ids[level_pos], 0), dtype="Int64")
+            columns[f"{level}_id"][level_pos < 0] = pd.NA
+            columns[f"{level}_name"] = _take(self._names, level_pos)
+            if level == "country":
+                columns["country_code"] = _take(
+                    self._countries, np.where(level_pos >= 0, self.country_idx[level_pos], -1)
+                )
+        index = ids.index if isinstance(ids, pd.Series) else None
+        return pd.DataFrame(columns, index=index)
+
+
+def _string_array(offsets, blob):
+    # Zero-copy view over the (memory-mapped) offsets and UTF-8 blob
+    return pa.LargeStringArray.from_buffers(
+        len(offsets) - 1, pa.py_buffer(offsets), pa.py_buffer(blob)
+    )
+
+
+def _take(strings, positions):
+    """strings[positions] as an object array, None where positions is -1."""
+    indices = pa.array(positions, mask=positions < 0)
+    return strings.take(indices).to_numpy(zero_copy_only=False)
+
+
+def _encode_table(strings):
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def csv_digest(csv_path):
+    h = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+
+def _resolve_hierarchy(parent_pos, is_city):
+    """
+      Walks every row's parent chain at once, one level per iteration, and
+      returns (country_pos, province_pos, city_pos).
+    """
+    n = len(parent_pos)
+    country_pos = np.full(n, -1, dtype=np.int32)
+    province_pos = np.full(n, -1, dtype=np.int32)
+    city_pos = np.where(is_city, np.arange(n), -1).astype(np.int32)
+
+    prev = np.full(n, -1, dtype=np.int64)
+    cur = np.arange(n, dtype=np.int64)
+    for _ in range(_MAX_DEPTH):
+        live = cur >= 0
+        if not live.any():
+            break
+        safe = np.where(live, cur, 0)
+        parent = np.where(live, parent_pos[safe], -1)
+
+        found_city = live & (city_pos < 0) & is_city[safe]
+        city_pos[found_city] = cur[found_city]
+
+        # cur is the root of its chain: it is the country, prev sits under it
+        root = live & (parent < 0)
+        country_pos[root] = cur[root]
+        province_pos[root] = prev[root]
+
+        prev, cur = cur, parent
+    return country_pos, province_pos, city_pos
+
+
+def compile_geotargets(csv_path, out_dir):
+    """Parses the geotargets CSV into the .npy arrays of a GeoTargetIndex."""
+    location_df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    location_df.columns = location_df.columns.str.strip().str.lower().str.replace(" ", "_")
+    location_df["criteria_id"] = pd.to_numeric(location_df["criteria_id"], errors="coerce").astype("Int64")
+    location_df["parent_id"] = pd.to_numeric(location_df["parent_id"], errors="coerce").astype("Int64")
+    location_df = (location_df.dropna(subset=["criteria_id"])
+                   .drop_duplicates("criteria_id", keep="last")
+                   .sort_values("criteria_id"))
+
+    ids = location_df["criteria_id"].to_numpy(np.int64)
+    parent_ids = location_df["parent_id"].fillna(-1).to_numpy(np.int64)
+    parent_pos = np.searchsorted(ids, parent_ids)
+    parent_pos[parent_pos == len(ids)] = 0
+    parent_pos[ids[parent_pos] != parent_ids] = -1
+
+    countries = pd.Categorical(location_df["country_code"].replace("", None))
+    target_types = pd.Categorical(location_df["target_type"].replace("", None))
+    country_pos, province_pos, city_pos = _resolve_hierarchy(parent_pos, (target_types == "City"))
+    name_offsets, name_blob = _encode_table(location_df["name"])
+    country_offsets, country_blob = _encode_table(countries.categories)
+    type_offsets, type_blob = _encode_table(target_types.categories)
+
+    arrays = {
+        "ids": ids,
+        "parent_ids": parent_ids,
+        "country_idx": countries.codes.astype(np.int16),
+        "type_idx": target_types.codes.astype(np.int16),
+        "country_pos": country_pos,
+        "province_pos": province_pos,
+        "city_pos": city_pos,
+        "name_offsets": name_offsets,
+        "name_blob": name_blob,
+        "country_offsets": country_offsets,
+        "country_blob": country_blob,
+        "type_offsets": type_offsets,
+        "type_blob": type_blob,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+    return len(location_df)
+
+
+def load_index(csv_path=None, cache_dir=None):
+    """
+      Returns the GeoTargetIndex for csv_path, compiling it into cache_dir the
+      first time this CSV (by content hash) is seen.
+    """
+    csv_path = csv_path or GEOTARGETS_CSV_PATH
+    cache_dir = cache_dir or GEOTARGETS_CACHE_DIR
+    index_dir = os.path.join(cache_dir, f"v{_INDEX_FORMAT}-{csv_digest(csv_path)}")
+
+    if not os.path.isdir(index_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+        build_dir = tempfile.mkdtemp(dir=cache_dir)
+        try:
+            rows = compile_geotargets(csv_path, build_dir)
+            os.replace(build_dir, index_dir)
+            logger.info(f"🗺️ Compiled {rows} geo targets from {csv_path} into {index_dir}")
+        except OSError:
+            # Another process published the same index first
+            shutil.rmtree(build_dir, ignore_errors=True)
+            if not os.path.isdir(index_dir):
+                raise
+
+    arrays = {name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+    return GeoTargetIndex(arrays)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_geotarget_index():
+    """
+      Process-wide GeoTargetIndex, loaded on first use. Safe to call from
+      concurrent account workers.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = load_index()
+        return _index
@@ -1,7 +1,13 @@
 from dotenv import load_dotenv
+import json
 import os
+import threading
+from datetime import datetime, timedelta, timezone
 from google.ads.googleads.client import GoogleAdsClient
+from utils.ads_fixtures import RecordingService, ReplayClient
 from utils.logger import setup_logger
+from utils.response_cache import BRONZE_RESPONSE_CACHE_DIR, CachingService
+from utils.retry import call_with_retries, throttle
 
 logger=setup_logger(__name__)
 
@@ -13,27 +19,118 @@ GOOGLE_ADS_LOGIN_CUSTOMER_ID = os.getenv('GOOGLE_ADS_LOGIN_CUSTOMER_ID')
 JSON_KEY_FILE_PATH = os.getenv('GOOGLE_ADS_JSON_KEY_FILE_PATH')
 GOOGLE_ADS_IMPERSONATED_EMAIL = os.getenv('GOOGLE_ADS_IMPERSONATED_EMAIL')
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
-
-
+GOOGLE_ADS_USE_PROTO_PLUS = os.getenv("GOOGLE_ADS_USE_PROTO_PLUS", "True").lower() == "true"
+# "live" (default), "record" (live, and save every response under
+# GOOGLE_ADS_FIXTURES_DIR) or "replay" (answer from those files, no network)
+GOOGLE_ADS_TRANSPORT = os.getenv("GOOGLE_ADS_TRANSPORT", "live").lower()
+TRANSPORTS = ("live", "record", "replay")
+# JSON registry of the MCC's enabled client accounts; unset disables caching
+BRONZE_ACCOUNT_CACHE = os.getenv("BRONZE_ACCOUNT_CACHE", "account_registry.json")
+# Hours a cached account list is trusted before customer_client is re-queried
+BRONZE_ACCOUNT_CACHE_TTL_HOURS = float(os.getenv("BRONZE_ACCOUNT_CACHE_TTL_HOURS", "24"))
 
 
 # ========================== #
-#     FETCH ENABLED ACCOUNTS #
+#   SHARED CLIENT FACTORY    #
 # ========================== #
-def fetch_enabled_accounts():
-    config = {
+# One GoogleAdsClient (credentials + impersonation) and one GoogleAdsService
+# stub (gRPC channel) per process. The stub is thread-safe, so every worker
+# passes its own customer_id per call instead of building its own client.
+_client = None
+_ads_service = None
+_client_lock = threading.Lock()
+_client_stats = {"client_constructions": 0, "service_constructions": 0}
+
+
+def build_client_config():
+    return {
         "developer_token": DEVELOPER_TOKEN,
         "login_customer_id": GOOGLE_ADS_LOGIN_CUSTOMER_ID,
         "json_key_file_path": JSON_KEY_FILE_PATH,
         "impersonated_email": GOOGLE_ADS_IMPERSONATED_EMAIL,
-        "use_proto_plus": True
+        "use_proto_plus": GOOGLE_ADS_USE_PROTO_PLUS
     }
-    client = GoogleAdsClient.load_from_dict(config)
-    service = client.get_service("GoogleAdsService")
+
+
+def get_client():
+    """
+      Returns the process-wide GoogleAdsClient, building it on first use.
+
+      The client owns the service-account credentials; google-auth refreshes
+      the access token on demand for every call made through it, so token
+      refresh happens in one place for all accounts and threads.
+
+      With GOOGLE_ADS_TRANSPORT=replay it is a ReplayClient serving recorded
+      responses instead (see utils.ads_fixtures).
+    """
+    global _client
+    if GOOGLE_ADS_TRANSPORT not in TRANSPORTS:
+        raise ValueError(f"Unknown GOOGLE_ADS_TRANSPORT '{GOOGLE_ADS_TRANSPORT}', expected one of {TRANSPORTS}")
+    with _client_lock:
+        if _client is None:
+            if GOOGLE_ADS_TRANSPORT == "replay":
+                _client = ReplayClient(use_proto_plus=GOOGLE_ADS_USE_PROTO_PLUS)
+                logger.info("📼 Replaying recorded Google Ads responses, no network.")
+            else:
+                _client = GoogleAdsClient.load_from_dict(build_client_config())
+                logger.info("🔌 GoogleAdsClient created.")
+            _client_stats["client_constructions"] += 1
+        return _client
+
+
+def get_ads_service():
+    """
+      Returns the process-wide GoogleAdsService stub (one gRPC channel),
+      wrapped in a RecordingService when GOOGLE_ADS_TRANSPORT=record and in
+      a CachingService when BRONZE_RESPONSE_CACHE_DIR is set (not in replay,
+      which is already offline).
+    """
+    global _ads_service
+    client = get_client()
+    with _client_lock:
+        if _ads_service is None:
+            _ads_service = client.get_service("GoogleAdsService")
+            if GOOGLE_ADS_TRANSPORT == "record":
+                _ads_service = RecordingService(_ads_service)
+            if BRONZE_RESPONSE_CACHE_DIR and GOOGLE_ADS_TRANSPORT != "replay":
+                _ads_service = CachingService(_ads_service, use_proto_plus=GOOGLE_ADS_USE_PROTO_PLUS)
+                logger.info(f"🗄️ Caching search_stream responses in {BRONZE_RESPONSE_CACHE_DIR}")
+            _client_stats["service_constructions"] += 1
+        return _ads_service
+
+
+def reset_client():
+    """Drops the cached client and stub, e.g. after the key file was rotated."""
+    global _client, _ads_service
+    with _client_lock:
+        _client = None
+        _ads_service = None
+
+
+def client_stats():
+    """Returns how many clients/stubs this process has built so far."""
+    with _client_lock:
+        return dict(_client_stats)
+
+
+
+
+# ========================== #
+#     FETCH ENABLED ACCOUNTS #
+# ========================== #
+def query_enabled_accounts():
+    """
+      Queries customer_client under the MCC: every enabled, non-manager
+      client account as {customer_id, name, currency_code, time_zone},
+      sorted by customer_id so the list is stable from run to run.
+    """
+    service = get_ads_service()
 
     query = """
         SELECT customer_client.client_customer,
                customer_client.descriptive_name,
+               customer_client.currency_code,
+               customer_client.time_zone,
                customer_client.manager,
                customer_client.status
         FROM customer_client
@@ -41,18 +138,101 @@ def fetch_enabled_accounts():
         AND customer_client.status = 'ENABLED'
     """
 
-    response = service.search(customer_id=GOOGLE_ADS_LOGIN_CUSTOMER_ID, query=query)
-    accounts = []
-    for row in response:
-        if not row.customer_client.manager:
-            accounts.append({
+    def search_accounts():
+        throttle()
+        response = service.search(customer_id=GOOGLE_ADS_LOGIN_CUSTOMER_ID, query=query)
+        return [
+            {
                 "customer_id": row.customer_client.client_customer.replace("customers/", ""),
-                "name": row.customer_client.descriptive_name
-            })
+                "name": row.customer_client.descriptive_name,
+                "currency_code": row.customer_client.currency_code,
+                "time_zone": row.customer_client.time_zone,
+            }
+            for row in response
+            if not row.customer_client.manager
+        ]
 
-    logger.info(f"{len(accounts)} active client accounts found.")
-    return accounts
+    accounts = call_with_retries(search_accounts, label="fetch_enabled_accounts")
+    return sorted(accounts, key=lambda acc: acc["customer_id"])
+
+
+def read_account_cache(path=None, ttl_hours=None, now=None):
+    """
+      Accounts from the registry file, or None when it is missing, was
+      written for another login customer, or is older than the TTL.
+    """
+    path = path or BRONZE_ACCOUNT_CACHE
+    ttl_hours = BRONZE_ACCOUNT_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours
+    if not path or ttl_hours <= 0 or not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        registry = json.load(f)
+    if registry.get("login_customer_id") != GOOGLE_ADS_LOGIN_CUSTOMER_ID:
+        return None
+
+    age = (now or datetime.now(timezone.utc)) - datetime.fromisoformat(registry["fetched_at"])
+    if age > timedelta(hours=ttl_hours):
+        return None
+    logger.info(f"🗂️ Using account registry {path} ({age.total_seconds() / 3600:.1f}h old)")
+    return registry["accounts"]
 
 
+def save_account_cache(accounts, path=None):
+    path = path or BRONZE_ACCOUNT_CACHE
+    if not path:
+        return
+    registry = {
+        "login_customer_id": GOOGLE_ADS_LOGIN_CUSTOMER_ID,
+        "fetched_at": datetime.now(timezone.utc).isoformat(),
+        "accounts": accounts,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(registry, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def select_accounts(accounts, account_ids):
+    """(accounts in account_ids, sorted ids of account_ids that are not among accounts)."""
+    wanted = set(account_ids)
+    selected = [acc for acc in accounts if acc["customer_id"] in wanted]
+    missing = sorted(wanted - {acc["customer_id"] for acc in selected})
+    return selected, missing
+
+
+def fetch_enabled_accounts(account_ids=None, refresh=False, missing=None):
+    """
+      Enabled client accounts under the MCC, from the BRONZE_ACCOUNT_CACHE
+      registry while it is younger than BRONZE_ACCOUNT_CACHE_TTL_HOURS and
+      from customer_client otherwise (or when refresh=True), which rewrites
+      the registry.
+
+      account_ids restricts the result to those customer ids, in registry
+      order, so a run can be split across processes by id list. An id the
+      cached registry lacks (e.g. a client added since it was written)
+      triggers one customer_client refresh; ids still not enabled after it
+      are logged as errors and appended to missing when a list is passed.
+    """
+    accounts = None if refresh else read_account_cache()
+    from_cache = accounts is not None
+    if accounts is None:
+        accounts = query_enabled_accounts()
+        save_account_cache(accounts)
+
+    logger.info(f"{len(accounts)} active client accounts found.")
+    if account_ids is None:
+        return accounts
 
-   
\ No newline at end of file
+    selected, not_found = select_accounts(accounts, account_ids)
+    if not_found and from_cache:
+        logger.info(f"🔄 {len(not_found)} selected accounts not in the registry, re-querying customer_client.")
+        accounts = query_enabled_accounts()
+        save_account_cache(accounts)
+        selected, not_found = select_accounts(accounts, account_ids)
+    if not_found:
+        logger.error(f"❌ Not enabled under the MCC: {', '.join(not_found)}")
+        if missing is not None:
+            missing.extend(not_found)
+    logger.info(f"🎯 Running {len(selected)} selected accounts.")
+    return selected
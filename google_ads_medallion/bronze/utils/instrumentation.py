@@ -0,0 +1,248 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+from dotenv import load_dotenv
+from utils.logger import setup_logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger=setup_logger(__name__)
+
+# ✅ Load environment variables
+load_dotenv()
+
+# JSON run summary (per report / account / stage); unset disables it
+BRONZE_RUN_SUMMARY_FILE = os.getenv("BRONZE_RUN_SUMMARY_FILE")
+# Prometheus textfile-collector output (per report / stage); unset disables it
+BRONZE_METRICS_FILE = os.getenv("BRONZE_METRICS_FILE")
+
+_local = threading.local()
+_totals_lock = threading.Lock()
+_totals = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "self_seconds": 0.0,
+                               "rows": 0, "bytes": 0, "peak_rss_mb": 0.0})
+_run_started = [time.time()]
+
+
+
+
+# ========================== #
+#            SPANS           #
+# ========================== #
+class Span:
+    """
+      One timed stage. rows / bytes are filled in by the caller. Spans nest
+      per thread: a child inherits report and account from its parent, and
+      its time is subtracted from the parent's self_seconds, so the API wait
+      is not counted again in decode and extract. Seconds are summed over
+      worker threads: with 8 workers the stages of a run add up to as much
+      as 8 × its wall time.
+    """
+
+    def __init__(self, stage, report=None, account=None):
+        self.stage = stage
+        self.report = report
+        self.account = account
+        self.rows = 0
+        self.bytes = 0
+        self.child_seconds = 0.0
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def peak_rss_mb():
+    """Process high-water RSS so far (not per span: threads share the heap)."""
+    if resource is None:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def record(stage, seconds, rows=0, nbytes=0, report=None, account=None):
+    """
+      Adds a measurement taken by hand (e.g. the API wait spread over a
+      stream's batches) under the current span's report and account.
+    """
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    if parent is not None:
+        parent.child_seconds += seconds
+        report = report or parent.report
+        account = account or parent.account
+    _add((report, account, stage), seconds, seconds, rows, nbytes)
+
+
+def _add(key, seconds, self_seconds, rows, nbytes):
+    rss = peak_rss_mb()
+    with _totals_lock:
+        totals = _totals[key]
+        totals["calls"] += 1
+        totals["seconds"] += seconds
+        totals["self_seconds"] += self_seconds
+        totals["rows"] += rows
+        totals["bytes"] += nbytes
+        totals["peak_rss_mb"] = max(totals["peak_rss_mb"], rss)
+
+
+@contextmanager
+def span(stage, report=None, account=None):
+    """
+      Times the block as `stage` of (report, account).
+
+      Usage:
+          with span("load", report=name) as s:
+              load_to_bigquery(df, TABLE_ID)
+              s.rows = len(df)
+    """
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    current = Span(
+        stage,
+        report or (parent.report if parent else None),
+        account or (parent.account if parent else None),
+    )
+    stack.append(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        seconds = time.perf_counter() - started
+        stack.pop()
+        if parent is not None:
+            parent.child_seconds += seconds
+        _add((current.report, current.account, stage), seconds,
+             seconds - current.child_seconds, current.rows, current.bytes)
+
+
+def timed(stage):
+    """Decorator form of span(stage); rows are taken from a returned DataFrame."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage) as s:
+                result = fn(*args, **kwargs)
+                s.rows = len(result) if hasattr(result, "__len__") else 0
+                return result
+        return wrapper
+    return decorate
+
+
+def reset_spans():
+    with _totals_lock:
+        _totals.clear()
+    _run_started[0] = time.time()
+
+
+
+
+# ========================== #
+#     SUMMARY AND EXPORT     #
+# ========================== #
+def span_totals():
+    """Snapshot of {(report, account, stage): totals} since the last reset."""
+    with _totals_lock:
+        return {key: dict(totals) for key, totals in _totals.items()}
+
+
+def _rollup(totals, key_fn):
+    rolled = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "self_seconds": 0.0,
+                                  "rows": 0, "bytes": 0, "peak_rss_mb": 0.0})
+    for key, values in totals.items():
+        target = rolled[key_fn(key)]
+        for name, value in values.items():
+            target[name] = max(target[name], value) if name == "peak_rss_mb" else target[name] + value
+    return rolled
+
+
+def run_summary(**extra):
+    """
+      JSON-ready summary of the run: wall time, peak RSS, totals per stage,
+      per (report, stage) and per (report, account, stage), plus any extra
+      sections (query / retry stats, failures) the caller passes.
+    """
+    totals = span_totals()
+    by_report = _rollup(totals, lambda key: (key[0], key[2]))
+    return {
+        "started_at": datetime.fromtimestamp(_run_started[0], timezone.utc).isoformat(),
+        "wall_seconds": round(time.time() - _run_started[0], 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": _rollup(totals, lambda key: key[2]),
+        "reports": [{"report": report, "stage": stage, **values}
+                    for (report, stage), values in sorted(by_report.items(), key=str)],
+        "spans": [{"report": report, "account": account, "stage": stage, **values}
+                  for (report, account, stage), values in sorted(totals.items(), key=str)],
+        **extra,
+    }
+
+
+def prometheus_text(summary):
+    """The summary's per (report, stage) totals in Prometheus exposition format."""
+    metrics = [
+        ("bronze_stage_seconds_total", "seconds", "Wall seconds spent in the stage, children included"),
+        ("bronze_stage_self_seconds_total", "self_seconds", "Seconds spent in the stage itself"),
+        ("bronze_stage_calls_total", "calls", "Times the stage ran"),
+        ("bronze_stage_rows_total", "rows", "Rows the stage produced or loaded"),
+        ("bronze_stage_bytes_total", "bytes", "Bytes the stage received or loaded"),
+    ]
+    lines = []
+    for metric, key, help_text in metrics:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for entry in summary["reports"]:
+            labels = f'report="{entry["report"] or ""}",stage="{entry["stage"]}"'
+            lines.append(f"{metric}{{{labels}}} {entry[key]}")
+    lines += [
+        "# HELP bronze_run_wall_seconds Wall seconds of the last run",
+        "# TYPE bronze_run_wall_seconds gauge",
+        f"bronze_run_wall_seconds {summary['wall_seconds']}",
+        "# HELP bronze_run_peak_rss_bytes Peak resident memory of the last run",
+        "# TYPE bronze_run_peak_rss_bytes gauge",
+        f"bronze_run_peak_rss_bytes {int(summary['peak_rss_mb'] * 2**20)}",
+        "# HELP bronze_run_failures Reports that failed in the last run",
+        "# TYPE bronze_run_failures gauge",
+        f"bronze_run_failures {len(summary.get('failed', []))}",
+        "# HELP bronze_run_finished_timestamp_seconds End of the last run",
+        "# TYPE bronze_run_finished_timestamp_seconds gauge",
+        f"bronze_run_finished_timestamp_seconds {int(time.time())}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def export_run_metrics(summary_path=None, metrics_path=None, **extra):
+    """
+      Logs where the run's time went per stage and writes the JSON summary
+      (BRONZE_RUN_SUMMARY_FILE) and Prometheus textfile (BRONZE_METRICS_FILE)
+      when configured. Returns the summary.
+    """
+    summary = run_summary(**extra)
+    for stage, values in sorted(summary["stages"].items(), key=lambda item: -item[1]["self_seconds"]):
+        logger.info(
+            f"⏲️ {stage}: {values['self_seconds']:.1f}s self / {values['seconds']:.1f}s total, "
+            f"{values['calls']} calls, {values['rows']} rows, {values['bytes'] / 2**20:.1f} MB"
+        )
+    logger.info(f"⏲️ Run: {summary['wall_seconds']:.1f}s wall, peak RSS {summary['peak_rss_mb']:.0f} MB")
+
+    summary_path = summary_path or BRONZE_RUN_SUMMARY_FILE
+    if summary_path:
+        _write_atomic(summary_path, json.dumps(summary, indent=2, default=str))
+    metrics_path = metrics_path or BRONZE_METRICS_FILE
+    if metrics_path:
+        _write_atomic(metrics_path, prometheus_text(summary))
+    return summary
@@ -1,25 +1,134 @@
+import atexit
+import contextvars
+import json
 import logging
 import os
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(context)s%(message)s'
+
+# Tags added to every record logged while they are set; the pool threads
+# receive them through contextvars.copy_context() (see iter_job_results)
+_run_id = contextvars.ContextVar("run_id", default=None)
+_report = contextvars.ContextVar("report", default=None)
+_account = contextvars.ContextVar("account", default=None)
+_CONTEXT = {"run_id": _run_id, "report": _report, "account": _account}
+
+_configure_lock = threading.Lock()
+_listener = None
+
+
+class ContextFilter(logging.Filter):
+    """Copies run_id / report / account from the emitting thread's context onto the record."""
+
+    def filter(self, record):
+        for name, var in _CONTEXT.items():
+            setattr(record, name, var.get())
+        tags = [value for value in (record.report, record.account) if value]
+        record.context = f"[{' '.join(tags)}] " if tags else ""
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, context tags, exception."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for name in _CONTEXT:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _InProcessQueueHandler(QueueHandler):
+    # The queue never leaves the process, so the record is passed as is:
+    # message formatting (and JSON encoding) happens on the listener thread
+    # instead of the worker that logged it.
+    def prepare(self, record):
+        return record
+
+
+def _configure():
+    """
+      Configures the root logger once per process: workers only put records
+      on an in-memory queue and a single listener thread formats and writes
+      them, so a slow stderr never stalls an extraction.
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        stream_handler = logging.StreamHandler()
+        if os.getenv("LOG_FORMAT", "text").lower() == "json":
+            stream_handler.setFormatter(JsonFormatter())
+        else:
+            stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _InProcessQueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+
+        root = logging.getLogger()
+        root.setLevel(getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper()))
+        root.addHandler(queue_handler)
+
+        _listener = QueueListener(log_queue, stream_handler)
+        _listener.start()
+        # Drain what is still queued before the interpreter exits
+        atexit.register(_listener.stop)
+
 
 def setup_logger(name: str) -> logging.Logger:
-    """                                                                                      
-      Creates a configured logger.                                                             
-                                                                                               
-      Usage:                                                                                   
-          from utils.logger import setup_logger                                                
-          logger = setup_logger(__name__)                                                      
-                                                                                               
-      Set LOG_LEVEL env var to control verbosity:                                              
-          LOG_LEVEL=DEBUG for detailed output                                                  
-          LOG_LEVEL=INFO for standard output (default)                                         
-          LOG_LEVEL=WARNING for minimal output                                                 
-    """                                                                                      
-
-    log_level = os.getenv("LOG_LEVEL", "INFO").upper()                                       
-                                                                                            
-    logging.basicConfig(                                                                     
-        level=getattr(logging, log_level),                                                   
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'                        
-    )                                                                                        
-                                                                                            
-    return logging.getLogger(name) 
+    """
+      Creates a configured logger.
+
+      Usage:
+          from utils.logger import setup_logger
+          logger = setup_logger(__name__)
+          logger.info("Rows: %s", len(df))   # formatted only if emitted
+
+      Set LOG_LEVEL env var to control verbosity:
+          LOG_LEVEL=DEBUG for detailed output
+          LOG_LEVEL=INFO for standard output (default)
+          LOG_LEVEL=WARNING for minimal output
+
+      Set LOG_FORMAT=json for one JSON object per line (default: text).
+      Either way each line carries the run_id / report / account set with
+      log_context(). Safe to call from every module: the root logger is
+      configured on the first call only.
+    """
+    _configure()
+    return logging.getLogger(name)
+
+
+def new_run_id():
+    """Starts a run: a fresh run_id tags every record logged from here on."""
+    run_id = uuid.uuid4().hex[:12]
+    _run_id.set(run_id)
+    return run_id
+
+
+@contextmanager
+def log_context(report=None, account=None):
+    """Tags records logged inside the block with report and / or account."""
+    tokens = [(var, var.set(value)) for var, value in ((_report, report), (_account, account)) if value]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+import proto
+from utils.date_window import resolve_window
+from utils.instrumentation import record
+from utils.retry import throttle
+
+
+
+
+# ========================== #
+#       REPORT QUERIES       #
+# ========================== #
+class ReportQuery(namedtuple("ReportQuery",
+                             ["report", "resource", "attributes", "segments", "metrics", "conditions", "windowed"],
+                             defaults=[(), True])):
+    """
+      One bronze report's GAQL described as data: the FROM resource, the
+      attribute / segment / metric fields it selects and any WHERE conditions
+      besides the date window. windowed=False drops the date window, for
+      queries without metrics such as the campaign / ad group dimensions.
+
+      Every ReportQuery is issued as its own search_stream per account. Two
+      reports cannot share a stream unless they read the same resource with
+      the same segments: adding a segment changes which rows come back (e.g.
+      segments.conversion_action_name splits every row per conversion
+      action and only allows conversion metrics), and no bronze reports
+      share one today.
+    """
+
+    def fields(self):
+        return list(self.attributes) + list(self.segments) + list(self.metrics)
+
+    def gaql(self, window=None):
+        conditions = list(self.conditions)
+        if self.windowed:
+            conditions.insert(0, (window or resolve_window()).gaql())
+        where = f"\n        WHERE {' AND '.join(conditions)}" if conditions else ""
+        select = ",\n            ".join(self.fields())
+        return f"""
+        SELECT
+            {select}
+        FROM {self.resource}{where}
+    """
+
+
+def describe_plan(queries, accounts=None):
+    """Human-readable summary of the streams a run issues and their selected fields."""
+    summary = f"{len(queries)} streams per account"
+    if accounts is not None:
+        summary += f" ({len(queries) * accounts} API calls for {accounts} accounts)"
+    lines = [summary]
+    for query in queries:
+        lines.append(
+            f"  {query.report}: FROM {query.resource}, "
+            f"{len(query.fields())} fields, segments={list(query.segments)}"
+        )
+    return "\n".join(lines)
+
+
+
+
+# ========================== #
+#      PER-REPORT STATS      #
+# ========================== #
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {"api_calls": 0, "rows": 0, "cells": 0})
+
+
+def run_query(ga_service, customer_id, query, window=None):
+    """
+      Issues query (a ReportQuery) as one search_stream call and yields its
+      batches, counting API calls, rows and cells (rows × fields) for the
+      report as they pass. Waits for the shared rate limiter first, unless
+      the response will come from the local cache (utils.response_cache).
+
+      The time spent waiting on the server, with the rows and serialized
+      bytes received, is recorded as the "api" stage of the enclosing span
+      (see utils.instrumentation), separate from the consumer's decoding.
+      Serializing every batch to size it would cost as much as decoding it,
+      so bytes are estimated from the first non-empty batch's bytes per row.
+    """
+    gaql = query.gaql(window)
+    is_cached = getattr(ga_service, "is_cached", None)
+    if not (is_cached and is_cached(customer_id, gaql)):
+        throttle()
+    started = time.perf_counter()
+    stream = iter(ga_service.search_stream(customer_id=customer_id, query=gaql))
+    waited = time.perf_counter() - started
+    width = len(query.fields())
+    rows = 0
+    row_bytes = None
+    try:
+        while True:
+            started = time.perf_counter()
+            batch = next(stream, None)
+            waited += time.perf_counter() - started
+            if batch is None:
+                break
+            n = len(batch.results)
+            if row_bytes is None and n:
+                row_bytes = _message_bytes(batch) / n
+            rows += n
+            yield batch
+    finally:
+        record("api", waited, rows, int(rows * (row_bytes or 0)))
+        with _stats_lock:
+            stats = _stats[query.report]
+            stats["api_calls"] += 1
+            stats["rows"] += rows
+            stats["cells"] += rows * width
+
+
+def _message_bytes(batch):
+    pb = type(batch).pb(batch) if isinstance(batch, proto.Message) else batch
+    return pb.ByteSize() if hasattr(pb, "ByteSize") else 0
+
+
+def query_stats():
+    """Snapshot of {report: {api_calls, rows, cells}} since the last reset."""
+    with _stats_lock:
+        return {report: dict(stats) for report, stats in _stats.items()}
+
+
+def reset_query_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,178 @@
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+from dotenv import load_dotenv
+from utils.ads_fixtures import RecordingService, ReplayService, fixture_path
+from utils.logger import setup_logger
+
+logger=setup_logger(__name__)
+
+# ✅ Load environment variables
+load_dotenv()
+
+# Opt-in on-disk cache of search_stream responses; unset disables it
+BRONZE_RESPONSE_CACHE_DIR = os.getenv("BRONZE_RESPONSE_CACHE_DIR", "")
+# Hours a response is reused while its window still has open days
+BRONZE_RESPONSE_CACHE_TTL_HOURS = float(os.getenv("BRONZE_RESPONSE_CACHE_TTL_HOURS", "12"))
+# Days after which a date is closed (conversions settled) and its responses never expire
+BRONZE_RESPONSE_CACHE_CLOSED_AFTER_DAYS = int(os.getenv("BRONZE_RESPONSE_CACHE_CLOSED_AFTER_DAYS", "30"))
+# Size cap; least recently used responses are evicted beyond it
+BRONZE_RESPONSE_CACHE_MAX_MB = float(os.getenv("BRONZE_RESPONSE_CACHE_MAX_MB", "2048"))
+
+_WINDOW = re.compile(r"segments\.date BETWEEN '(\d{4}-\d{2}-\d{2})' AND '(\d{4}-\d{2}-\d{2})'")
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(int)
+
+
+
+
+# ========================== #
+#   SEARCH_STREAM RESPONSES  #
+# ========================== #
+class CachingService:
+    """
+      GoogleAdsService wrapper that answers search_stream from disk when
+      the same customer and query were fetched before.
+
+      Keys are the fixture paths of utils.ads_fixtures: customer_id plus a
+      hash of the whitespace-normalized GAQL, whose date literals are the
+      resolved window. A miss streams from the API and is recorded while it
+      passes through; only complete streams are stored.
+
+      A response whose window ends more than CLOSED_AFTER_DAYS ago covers
+      closed days only and is reused until evicted. Any other response
+      (recent days, or no date window, like the dimension queries) expires
+      after the TTL. When the directory outgrows MAX_MB, the least recently
+      used responses are removed. The directory is scanned once, at start;
+      from then on entry sizes and read times are tracked in memory, so a
+      miss costs no walk. search() is passed through uncached.
+    """
+
+    def __init__(self, service, cache_dir=None, ttl_hours=None, closed_after_days=None, max_mb=None,
+                 use_proto_plus=True):
+        self.service = service
+        self.cache_dir = cache_dir or BRONZE_RESPONSE_CACHE_DIR
+        self.ttl = 3600 * (BRONZE_RESPONSE_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours)
+        self.closed_after = BRONZE_RESPONSE_CACHE_CLOSED_AFTER_DAYS if closed_after_days is None else closed_after_days
+        self.max_bytes = 2**20 * (BRONZE_RESPONSE_CACHE_MAX_MB if max_mb is None else max_mb)
+        self.recorder = RecordingService(service, self.cache_dir)
+        self.replayer = ReplayService(self.cache_dir, latency_ms=0, use_proto_plus=use_proto_plus)
+        self._evict_lock = threading.Lock()
+        # path -> [atime, size] of every stored response, and their total size
+        self._entries = {}
+        self._total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".pb.gz"):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    self._entries[path] = [stat.st_atime, stat.st_size]
+                    self._total += stat.st_size
+        # Applies a lowered MAX_MB before the first hit is served
+        self.evict()
+
+    def is_cached(self, customer_id, query):
+        """True when search_stream(customer_id, query) will be served from disk."""
+        path = fixture_path(self.cache_dir, customer_id, "search_stream", query)
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except OSError:
+            return False
+        if self._closed(query):
+            return True
+        return age <= self.ttl
+
+    def _closed(self, query):
+        match = _WINDOW.search(query)
+        if match is None:
+            return False
+        end = date.fromisoformat(match.group(2))
+        return end < date.today() - timedelta(days=self.closed_after)
+
+    def search_stream(self, customer_id, query, **kwargs):
+        path = fixture_path(self.cache_dir, customer_id, "search_stream", query)
+        if self.is_cached(customer_id, query):
+            # A read bumps atime for LRU; mtime stays the write time the TTL runs from
+            now = time.time()
+            os.utime(path, (now, os.path.getmtime(path)))
+            size = os.path.getsize(path)
+            with self._evict_lock:
+                self._track(path, now, size)
+            _count("hits", bytes_served=size)
+            return self.replayer.search_stream(customer_id, query)
+
+        _count("expired" if os.path.exists(path) else "misses")
+        return self._store(path, self.recorder.search_stream(customer_id, query, **kwargs))
+
+    def search(self, customer_id, query, **kwargs):
+        return self.service.search(customer_id=customer_id, query=query, **kwargs)
+
+    def _store(self, path, stream):
+        yield from stream
+        # The recorder only puts complete streams in place
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with self._evict_lock:
+            self._track(path, time.time(), size)
+        self.evict()
+
+    def _track(self, path, atime, size):
+        # Caller holds _evict_lock; a re-recorded response replaces its old size
+        previous = self._entries.get(path)
+        self._total += size - (previous[1] if previous else 0)
+        self._entries[path] = [atime, size]
+
+    def evict(self):
+        """Removes least recently read responses until the cache fits max_bytes."""
+        with self._evict_lock:
+            if self._total <= self.max_bytes:
+                return
+            for path, (_, size) in sorted(self._entries.items(), key=lambda item: item[1][0]):
+                if self._total <= self.max_bytes:
+                    break
+                for victim in (path, path[:-len(".pb.gz")] + ".gaql"):
+                    if os.path.exists(victim):
+                        os.remove(victim)
+                del self._entries[path]
+                self._total -= size
+                _count("evictions")
+
+
+
+
+# ========================== #
+#        CACHE METRICS       #
+# ========================== #
+def _count(key, bytes_served=0):
+    with _stats_lock:
+        _stats[key] += 1
+        _stats["bytes_served"] += bytes_served
+
+
+def cache_stats():
+    """Snapshot since the last reset: hits, misses, expired, evictions, bytes_served."""
+    with _stats_lock:
+        return {key: _stats[key] for key in ("hits", "misses", "expired", "evictions", "bytes_served")}
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def log_cache_stats():
+    stats = cache_stats()
+    lookups = stats["hits"] + stats["misses"] + stats["expired"]
+    if not lookups:
+        return
+    logger.info(
+        f"🗄️ Response cache: {stats['hits']}/{lookups} hits ({stats['bytes_served'] / 2**20:.1f} MB served), "
+        f"{stats['misses']} misses, {stats['expired']} expired, {stats['evictions']} evicted"
+    )
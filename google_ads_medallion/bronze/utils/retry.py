@@ -0,0 +1,207 @@
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
+import grpc
+from dotenv import load_dotenv
+from google.ads.googleads.errors import GoogleAdsException
+from google.api_core import exceptions as api_exceptions
+from utils.logger import setup_logger
+
+logger=setup_logger(__name__)
+
+# ✅ Load environment variables
+load_dotenv()
+
+# Attempts per Google Ads call (first try included) before the error is raised
+BRONZE_RETRY_ATTEMPTS = int(os.getenv("BRONZE_RETRY_ATTEMPTS", "5"))
+# Exponential backoff with full jitter: uniform(0, base * 2**retry), capped at max
+BRONZE_RETRY_BASE_SECONDS = float(os.getenv("BRONZE_RETRY_BASE_SECONDS", "2"))
+BRONZE_RETRY_MAX_SECONDS = float(os.getenv("BRONZE_RETRY_MAX_SECONDS", "120"))
+# Google Ads requests per second shared by all worker threads (0 disables
+# the limiter) and how many may go out back to back after an idle spell
+BRONZE_API_QPS = float(os.getenv("BRONZE_API_QPS", "5"))
+BRONZE_API_BURST = int(os.getenv("BRONZE_API_BURST", "10"))
+
+RETRYABLE_CODES = (
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.ABORTED,
+    grpc.StatusCode.INTERNAL,
+)
+
+_API_CORE_CODES = {
+    api_exceptions.TooManyRequests: grpc.StatusCode.RESOURCE_EXHAUSTED,
+    api_exceptions.ServiceUnavailable: grpc.StatusCode.UNAVAILABLE,
+    api_exceptions.GatewayTimeout: grpc.StatusCode.DEADLINE_EXCEEDED,
+    api_exceptions.InternalServerError: grpc.StatusCode.INTERNAL,
+}
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(float)
+_stats_by_code = defaultdict(int)
+
+
+
+
+# ========================== #
+#    SHARED RATE LIMITER     #
+# ========================== #
+class TokenBucket:
+    """
+      Thread-safe token bucket: `rate` tokens per second, at most `capacity`
+      banked. acquire() takes one token, sleeping until it is due, and
+      returns the seconds it waited.
+
+      A caller that finds the bucket empty reserves the next token by
+      driving the balance negative and sleeps outside the lock, so waiting
+      threads are served in arrival order without holding each other up.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+_limiter = TokenBucket(BRONZE_API_QPS, BRONZE_API_BURST) if BRONZE_API_QPS > 0 else None
+
+
+def throttle():
+    """Waits for the shared limiter before one Google Ads request."""
+    waited = _limiter.acquire() if _limiter is not None else 0.0
+    with _stats_lock:
+        _stats["api_requests"] += 1
+        if waited:
+            _stats["throttled_requests"] += 1
+            _stats["throttle_seconds"] += waited
+
+
+
+
+# ========================== #
+#     RETRY WITH BACKOFF     #
+# ========================== #
+def error_code(exc):
+    """The retryable gRPC status of exc, or None when retrying cannot help."""
+    if isinstance(exc, GoogleAdsException):
+        code = exc.error.code() if exc.error is not None else None
+    elif isinstance(exc, grpc.RpcError) and hasattr(exc, "code"):
+        code = exc.code()
+    else:
+        code = next((c for cls, c in _API_CORE_CODES.items() if isinstance(exc, cls)), None)
+    return code if code in RETRYABLE_CODES else None
+
+
+def retry_delay_hint(exc):
+    """
+      Largest retry_delay the server attached to a GoogleAdsFailure (quota
+      errors carry one in details.quota_error_details), in seconds.
+    """
+    failure = getattr(exc, "failure", None)
+    hints = []
+    for error in getattr(failure, "errors", ()):
+        delay = error.details.quota_error_details.retry_delay
+        # proto-plus gives a timedelta, raw protobuf a Duration
+        seconds = delay.total_seconds() if hasattr(delay, "total_seconds") else delay.seconds + delay.nanos / 1e9
+        if seconds > 0:
+            hints.append(seconds)
+    return max(hints, default=None)
+
+
+def backoff_delay(retry, hint=None):
+    """
+      Seconds to wait before retry number `retry` (1-based). A server hint is
+      honoured as a floor with a little jitter on top; otherwise full-jitter
+      exponential backoff. None when the hint exceeds BRONZE_RETRY_MAX_SECONDS
+      (e.g. a daily quota), since waiting it out is not worth it.
+    """
+    if hint is not None:
+        if hint > BRONZE_RETRY_MAX_SECONDS:
+            return None
+        return hint + random.uniform(0, BRONZE_RETRY_BASE_SECONDS)
+    return random.uniform(0, min(BRONZE_RETRY_MAX_SECONDS, BRONZE_RETRY_BASE_SECONDS * 2 ** retry))
+
+
+def call_with_retries(fn, *args, label=None, attempts=None, sleep=time.sleep, **kwargs):
+    """
+      Calls fn(*args, **kwargs), retrying RESOURCE_EXHAUSTED / UNAVAILABLE /
+      DEADLINE_EXCEEDED / ABORTED / INTERNAL failures with backoff. Anything
+      else, or the last attempt's error, is raised unchanged.
+
+      Wrap a whole unit that can be safely redone, e.g. one account's
+      extraction: a stream that fails half way is re-read from the start
+      rather than resumed.
+    """
+    attempts = attempts or BRONZE_RETRY_ATTEMPTS
+    label = label or getattr(getattr(fn, "func", fn), "__name__", "call")
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            code = error_code(e)
+            if code is None:
+                raise
+            delay = backoff_delay(attempt, retry_delay_hint(e)) if attempt < attempts else None
+            if delay is None:
+                with _stats_lock:
+                    _stats["gave_up"] += 1
+                raise
+            with _stats_lock:
+                _stats["retries"] += 1
+                _stats["backoff_seconds"] += delay
+                _stats_by_code[code.name] += 1
+            logger.warning("🔁 %s: %s, retry %s/%s in %.1fs", label, code.name, attempt, attempts - 1, delay)
+            sleep(delay)
+
+
+
+
+# ========================== #
+#        RETRY METRICS       #
+# ========================== #
+def retry_stats():
+    """
+      Snapshot since the last reset: api_requests, throttled_requests,
+      throttle_seconds, retries (and retries_by_code), backoff_seconds and
+      gave_up (retryable errors that were raised after all).
+    """
+    with _stats_lock:
+        stats = {key: _stats[key] for key in ("api_requests", "throttled_requests", "throttle_seconds",
+                                               "retries", "backoff_seconds", "gave_up")}
+        stats["retries_by_code"] = dict(_stats_by_code)
+        return stats
+
+
+def reset_retry_stats():
+    with _stats_lock:
+        _stats.clear()
+        _stats_by_code.clear()
+
+
+def log_retry_stats():
+    stats = retry_stats()
+    logger.info(
+        f"⏱️ {int(stats['api_requests'])} API requests, {int(stats['throttled_requests'])} throttled "
+        f"({stats['throttle_seconds']:.1f}s), {int(stats['retries'])} retries "
+        f"({stats['backoff_seconds']:.1f}s backoff, {stats['retries_by_code']}), "
+        f"{int(stats['gave_up'])} gave up"
+    )
@@ -0,0 +1,182 @@
+import enum
+import os
+import threading
+from array import array
+from collections import namedtuple
+from operator import attrgetter
+
+import numpy as np
+import pandas as pd
+import proto
+import pyarrow as pa
+from dotenv import load_dotenv
+from utils.instrumentation import timed
+
+# ✅ Load environment variables
+load_dotenv()
+
+# Opt-in: read the protobuf messages under the proto-plus wrappers directly.
+BRONZE_RAW_DECODE = os.getenv("BRONZE_RAW_DECODE", "False").lower() == "true"
+
+
+# ========================== #
+#   COLUMNAR ROW DECODING    #
+# ========================== #
+# A report is described by a list of Fields. Each field names its output
+# column, the GoogleAdsRow attribute path and how to store it:
+#   kind="int64" / "float64" -> packed into array.array, zero-copy to numpy
+#   kind="category"          -> pandas Categorical, for low-cardinality labels
+#                               (device, age range, conversion action, ...)
+#   kind="date"              -> Arrow date32 ("YYYY-MM-DD" parsed once)
+#   kind="object"            -> plain Python list (ids as strings, resource names)
+# transform, when set, is applied to the raw attribute before storing.
+Field = namedtuple("Field", ["column", "path", "kind", "transform"], defaults=["object", None])
+
+_TYPECODES = {"int64": "q", "float64": "d"}
+
+
+def enum_name(value):
+    """Enum label, or 'Unknown' for UNSPECIFIED (0)."""
+    return value.name if value else "Unknown"
+
+
+def _new_column(kind):
+    typecode = _TYPECODES.get(kind)
+    return array(typecode) if typecode else []
+
+
+def _to_series_values(values, kind):
+    if kind in _TYPECODES:
+        return np.frombuffer(values, dtype=kind) if len(values) else np.empty(0, dtype=kind)
+    if kind == "category":
+        return pd.Categorical(values)
+    if kind == "date":
+        return pd.arrays.ArrowExtensionArray(pa.array(values, type=pa.string()).cast(pa.date32()))
+    return values
+
+
+def concat_frames(frames):
+    """
+      pd.concat that keeps categorical columns categorical.
+
+      pd.concat falls back to object when the frames' categories differ
+      (every account has its own campaign / conversion names), which would
+      undo the compact dtypes right before the load. The categories are
+      unioned first, so only the small integer codes are copied.
+    """
+    frames = list(frames)
+    if len(frames) > 1:
+        categorical = [
+            column for column, dtype in frames[0].dtypes.items()
+            if isinstance(dtype, pd.CategoricalDtype)
+            and all(isinstance(df[column].dtype, pd.CategoricalDtype) for df in frames if column in df)
+        ]
+        if categorical:
+            frames = [df.copy(deep=False) for df in frames]
+            for column in categorical:
+                categories = pd.Index([])
+                for df in frames:
+                    if column in df:
+                        categories = categories.union(df[column].cat.categories)
+                for df in frames:
+                    if column in df:
+                        df[column] = df[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+# ========================== #
+#     RAW PROTOBUF ENUMS     #
+# ========================== #
+# Raw protobuf returns enum fields as plain ints. They are mapped to IntEnum
+# members built from the proto descriptor, so transforms written against
+# proto-plus enums (.name, truthiness, int-keyed dict lookups) keep working.
+_raw_enums = {}
+_raw_enums_lock = threading.Lock()
+
+
+def _raw_enum_lookup(enum_descriptor):
+    with _raw_enums_lock:
+        members = _raw_enums.get(enum_descriptor.full_name)
+        if members is None:
+            enum_cls = enum.IntEnum(enum_descriptor.name, [(v.name, v.number) for v in enum_descriptor.values])
+            members = {member.value: member for member in enum_cls}
+            _raw_enums[enum_descriptor.full_name] = members
+        return members
+
+
+def _raw_leaf_getter(descriptor, leaf):
+    getter = attrgetter(leaf)
+    field_descriptor = descriptor.fields_by_name[leaf]
+    if field_descriptor.enum_type is None:
+        return getter
+
+    members = _raw_enum_lookup(field_descriptor.enum_type)
+
+    def get_enum(message):
+        value = getter(message)
+        return members.get(value, value)
+
+    return get_enum
+
+
+def _descriptor_at(row_descriptor, path):
+    descriptor = row_descriptor
+    for part in path.split(".") if path else []:
+        descriptor = descriptor.fields_by_name[part].message_type
+    return descriptor
+
+
+def _compile(fields, columns, row_descriptor=None):
+    """
+      Groups fields by parent message (row.campaign, row.metrics, ...) so each
+      parent wrapper is resolved once per row instead of once per field.
+      With a row_descriptor the leaves are compiled for raw protobuf rows.
+    """
+    groups = {}
+    for field in fields:
+        parent, _, leaf = field.path.rpartition(".")
+        if row_descriptor is None:
+            leaf_getter = attrgetter(leaf)
+        else:
+            leaf_getter = _raw_leaf_getter(_descriptor_at(row_descriptor, parent), leaf)
+        groups.setdefault(parent, []).append(
+            (leaf_getter, columns[field.column].append, field.transform)
+        )
+    return [(attrgetter(parent) if parent else None, leaves) for parent, leaves in groups.items()]
+
+
+@timed("decode")
+def decode_stream(stream, fields, raw=None):
+    """
+      Decodes a search_stream response straight into one typed buffer per
+      column and builds the DataFrame once at the end, without materialising
+      a dict per row.
+
+      raw=True (default: BRONZE_RAW_DECODE env var) skips proto-plus and reads
+      the underlying protobuf messages; it is also used automatically when the
+      client was built with use_proto_plus=False. Output is identical.
+    """
+    raw = BRONZE_RAW_DECODE if raw is None else raw
+    columns = {field.column: _new_column(field.kind) for field in fields}
+    plan = None
+
+    for batch in stream:
+        if raw or not isinstance(batch, proto.Message):
+            if isinstance(batch, proto.Message):
+                batch = type(batch).pb(batch)
+            if plan is None:
+                plan = _compile(fields, columns, batch.DESCRIPTOR.fields_by_name["results"].message_type)
+        elif plan is None:
+            plan = _compile(fields, columns)
+
+        for row in batch.results:
+            for parent_getter, leaves in plan:
+                parent = parent_getter(row) if parent_getter else row
+                for leaf_getter, append, transform in leaves:
+                    value = leaf_getter(parent)
+                    append(transform(value) if transform else value)
+
+    return pd.DataFrame({
+        field.column: _to_series_values(columns[field.column], field.kind)
+        for field in fields
+    })
@@ -1,16 +1,20 @@
 {{ config(alias='age_conversions') }}
 select 
 
-    account_id,
-    account_name,
-    campaign_id,
-    campaign_name,
-    ad_group_id,
-    ad_group_name,
-    age_range,
-    conversion_name,
-    all_conversions,
-    all_conversions_value,
-    CAST(date as date) as date,
-    load_date
-from {{ source('bronze', 'age_conversions') }}
\ No newline at end of file
+    f.account_id,
+    f.account_name,
+    f.campaign_id,
+    c.campaign_name,
+    f.ad_group_id,
+    g.ad_group_name,
+    f.age_range,
+    f.conversion_name,
+    f.all_conversions,
+    f.all_conversions_value,
+    CAST(f.date as date) as date,
+    f.load_date
+from {{ source('bronze', 'age_conversions') }} f
+left join {{ source('bronze', 'campaigns') }} c
+    on c.account_id = f.account_id and c.campaign_id = f.campaign_id
+left join {{ source('bronze', 'ad_groups') }} g
+    on g.account_id = f.account_id and g.ad_group_id = f.ad_group_id
\ No newline at end of file
@@ -1,20 +1,24 @@
 {{ config(alias='age_metrics') }}
 select 
-    account_id,
-    account_name,
-    campaign_id,
-    campaign_name,
-    campaign_type,
-    ad_group_id,
-    ad_group_name,
-    age_range,
-    impressions,
-    video_views,
-    clicks,
-    cost_micros / 1000000.0 as cost,
-    all_conversions,
-    all_conversions_value,
-    cast(date as date) as date,
-    load_date
+    f.account_id,
+    f.account_name,
+    f.campaign_id,
+    c.campaign_name,
+    c.campaign_type,
+    f.ad_group_id,
+    g.ad_group_name,
+    f.age_range,
+    f.impressions,
+    f.video_views,
+    f.clicks,
+    f.cost_micros / 1000000.0 as cost,
+    f.all_conversions,
+    f.all_conversions_value,
+    cast(f.date as date) as date,
+    f.load_date
     
-from {{ source('bronze', 'age_metrics') }}
\ No newline at end of file
+from {{ source('bronze', 'age_metrics') }} f
+left join {{ source('bronze', 'campaigns') }} c
+    on c.account_id = f.account_id and c.campaign_id = f.campaign_id
+left join {{ source('bronze', 'ad_groups') }} g
+    on g.account_id = f.account_id and g.ad_group_id = f.ad_group_id
\ No newline at end of file
@@ -1,21 +1,27 @@
 {{ config(alias='location_conversions') }}
 
 select
-    account_id,
-    account_name,
-    campaign_id,
-    campaign_name,
-    campaign_type,
-    ad_group_id,
-    ad_group_name,
-    targeting_location,
-    geo_target_city,
-    geo_target_province,
-    country_code,
-    conversion_name,
-    all_conversions,
-    all_conversions_value,
-    cast(date as date) as date,
-    load_date
+    f.account_id,
+    f.account_name,
+    f.campaign_id,
+    c.campaign_name,
+    c.campaign_type,
+    f.ad_group_id,
+    g.ad_group_name,
+    f.targeting_location,
+    f.geo_target_city,
+    f.geo_target_province,
+    f.country_code,
+    f.country_name,
+    f.province_name,
+    f.conversion_name,
+    f.all_conversions,
+    f.all_conversions_value,
+    cast(f.date as date) as date,
+    f.load_date
 
-from {{ source('bronze', 'location_conversions') }}
+from {{ source('bronze', 'location_conversions') }} f
+left join {{ source('bronze', 'campaigns') }} c
+    on c.account_id = f.account_id and c.campaign_id = f.campaign_id
+left join {{ source('bronze', 'ad_groups') }} g
+    on g.account_id = f.account_id and g.ad_group_id = f.ad_group_id
@@ -1,17 +1,19 @@
 {{ config(alias='main_conversions') }}
 
 select
-    account_id,
-    account_name,
-    campaign_id,
-    campaign_name,
-    campaign_type,
-    device,
-    conversion_name,
-    all_conversions,
-    all_conversions_value,
-    currency_code,
-    cast(date as date) as date,
-    load_date
+    f.account_id,
+    f.account_name,
+    f.campaign_id,
+    c.campaign_name,
+    c.campaign_type,
+    f.device,
+    f.conversion_name,
+    f.all_conversions,
+    f.all_conversions_value,
+    f.currency_code,
+    cast(f.date as date) as date,
+    f.load_date
 
-from {{ source('bronze', 'main_conversions') }}
+from {{ source('bronze', 'main_conversions') }} f
+left join {{ source('bronze', 'campaigns') }} c
+    on c.account_id = f.account_id and c.campaign_id = f.campaign_id
@@ -1,20 +1,22 @@
 {{ config(alias='main_metrics') }}
 
 select
-    account_id,
-    account_name,
-    campaign_id,
-    campaign_name,
-    campaign_type,
-    device,
-    impressions,
-    video_views,
-    clicks,
-    cost_micros / 1000000.0 as cost,
-    all_conversions,
-    all_conversions_value,
-    currency_code,
-    cast(date as date) as date,
-    load_date
+    f.account_id,
+    f.account_name,
+    f.campaign_id,
+    c.campaign_name,
+    c.campaign_type,
+    f.device,
+    f.impressions,
+    f.video_views,
+    f.clicks,
+    f.cost_micros / 1000000.0 as cost,
+    f.all_conversions,
+    f.all_conversions_value,
+    f.currency_code,
+    cast(f.date as date) as date,
+    f.load_date
 
-from {{ source('bronze', 'main_metrics') }}
+from {{ source('bronze', 'main_metrics') }} f
+left join {{ source('bronze', 'campaigns') }} c
+    on c.account_id = f.account_id and c.campaign_id = f.campaign_id
@@ -0,0 +1,40 @@
+import pandas as pd
+
+
+# ========================== #
+#  BATCH-INCREMENTAL FRAMES  #
+# ========================== #
+class StreamFrameBuilder:
+    """
+      Collects a search_stream into one DataFrame, one batch at a time.
+
+      columns maps each output column to a function of the GoogleAdsRow.
+      add_batch() reads every row of a batch exactly once into per-column
+      lists and build() creates the DataFrame once at the end, so the work
+      stays linear in the number of rows however many batches the stream
+      is split into. Post-processing (id parsing, lookups, CSV dumps)
+      belongs after build(), never inside the batch loop.
+    """
+
+    def __init__(self, columns):
+        self.getters = list(columns.items())
+        self.values = {column: [] for column in columns}
+        self.rows = 0
+
+    def add_batch(self, batch):
+        appends = [(getter, self.values[column].append) for column, getter in self.getters]
+        for row in batch.results:
+            for getter, append in appends:
+                append(getter(row))
+        self.rows += len(batch.results)
+
+    def build(self):
+        return pd.DataFrame(self.values)
+
+
+def frame_from_stream(stream, columns):
+    """Builds the DataFrame of a whole search_stream with StreamFrameBuilder."""
+    builder = StreamFrameBuilder(columns)
+    for batch in stream:
+        builder.add_batch(batch)
+    return builder.build()